@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+"""plugins/callback/fujitsu_metrics.py
+
+callback plugin to export per-command latency of fujitsu modules
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+DOCUMENTATION = '''
+    callback: fujitsu_metrics
+    type: aggregate
+    short_description: export per-command latency histograms of fujitsu modules
+    version_added: "2.9"
+    description:
+      - Collects C(command_timings) returned by fujitsu_ipcom_*, fujitsu_sir_* and fujitsu_srs_* modules.
+      - Builds latency histograms per device family, model and command.
+      - Model is taken from C(ansible_net_model) (or C(ansible_net_system) on IPCOM) gathered by the facts modules.
+      - Writes a Prometheus textfile and a JSON summary when the playbook ends.
+    requirements:
+      - whitelisting in configuration
+    options:
+      prometheus_file:
+        description: Path of the Prometheus textfile (node_exporter textfile collector format)
+        default: ./log/fujitsu_metrics.prom
+        env:
+          - name: FUJITSU_METRICS_PROMETHEUS_FILE
+        ini:
+          - section: callback_fujitsu_metrics
+            key: prometheus_file
+      json_file:
+        description: Path of the JSON summary
+        default: ./log/fujitsu_metrics.json
+        env:
+          - name: FUJITSU_METRICS_JSON_FILE
+        ini:
+          - section: callback_fujitsu_metrics
+            key: json_file
+      buckets:
+        description: Upper bounds of the histogram buckets in seconds
+        type: list
+        default: [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120]
+        env:
+          - name: FUJITSU_METRICS_BUCKETS
+        ini:
+          - section: callback_fujitsu_metrics
+            key: buckets
+'''
+
+EXAMPLES = '''
+example: >
+  To enable, add this to your ansible.cfg file in the defaults block
+    [defaults]
+    callback_whitelist = profile_tasks, fujitsu_metrics
+'''
+
+import json
+import os
+import re
+import time
+
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.plugins.callback import CallbackBase
+
+# fujitsu_ipcom_command -> fujitsu_ipcom
+FAMILY_RE = re.compile(r'^(fujitsu_(?:ipcom|sir|srs))_')
+
+METRIC_NAME = 'fujitsu_command_duration_seconds'
+
+
+class Histogram(object):
+  """cumulative histogram in the prometheus style
+  """
+
+  def __init__(self, buckets):
+    self.buckets = buckets
+    self.counts = [0] * len(buckets)
+    self.count = 0
+    self.sum = 0.0
+    self.max = 0.0
+
+  def observe(self, value):
+    for i, bound in enumerate(self.buckets):
+      if value <= bound:
+        self.counts[i] += 1
+    self.count += 1
+    self.sum += value
+    self.max = max(self.max, value)
+
+  def to_dict(self):
+    return {
+      'buckets': dict(zip([str(b) for b in self.buckets], self.counts)),
+      'count': self.count,
+      'sum': round(self.sum, 6),
+      'max': round(self.max, 6),
+      'avg': round(self.sum / self.count, 6) if self.count else 0.0,
+    }
+
+
+def escape_label(value):
+  """escape label value for the prometheus text format
+  """
+  return to_text(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def write_atomic(path, data):
+  """write file via rename, textfile collector may read it at any time
+  """
+  path = os.path.expanduser(path)
+  dirname = os.path.dirname(path)
+  if dirname and not os.path.isdir(dirname):
+    os.makedirs(dirname)
+  tmp = '%s.%d.tmp' % (path, os.getpid())
+  with open(tmp, 'wb') as f:
+    f.write(to_bytes(data))
+  os.rename(tmp, path)
+
+
+class CallbackModule(CallbackBase):
+  """
+  This callback module collects per-command timings of the fujitsu modules.
+  """
+  CALLBACK_VERSION = 2.0
+  CALLBACK_TYPE = 'aggregate'
+  CALLBACK_NAME = 'fujitsu_metrics'
+  CALLBACK_NEEDS_WHITELIST = True
+
+  def __init__(self):
+    super(CallbackModule, self).__init__()
+    self.prometheus_file = None
+    self.json_file = None
+    self.buckets = None
+
+    # (family, model, command) -> Histogram
+    self.histograms = dict()
+
+    # host -> command -> Histogram
+    self.hosts = dict()
+
+    # host -> model
+    self.models = dict()
+
+    self.variable_manager = None
+
+
+  def set_options(self, task_keys=None, var_options=None, direct=None):
+    super(CallbackModule, self).set_options(task_keys=task_keys, var_options=var_options, direct=direct)
+    self.prometheus_file = self.get_option('prometheus_file')
+    self.json_file = self.get_option('json_file')
+    self.buckets = sorted(float(b) for b in self.get_option('buckets'))
+
+
+  def v2_playbook_on_play_start(self, play):
+    self.variable_manager = play.get_variable_manager()
+
+
+  def get_model(self, host):
+    """model name of the host from gathered facts
+    """
+    if self.models.get(host.get_name()):
+      return self.models[host.get_name()]
+
+    model = None
+    if self.variable_manager is not None:
+      try:
+        hostvars = self.variable_manager.get_vars(host=host)
+        model = hostvars.get('ansible_net_model') or hostvars.get('ansible_net_system')
+      except Exception:  # pylint: disable=broad-except
+        model = None
+
+    if model:
+      self.models[host.get_name()] = model
+    return model or 'unknown'
+
+
+  def v2_runner_on_ok(self, result):
+    self.record(result)
+
+
+  def v2_runner_on_failed(self, result, ignore_errors=False):
+    self.record(result)
+
+
+  def record(self, result):
+    match = FAMILY_RE.match(result._task.action)
+    if not match:
+      return
+    family = match.group(1)
+    host = result._host
+
+    # facts module returns the model in the same result
+    facts = result._result.get('ansible_facts') or {}
+    model = facts.get('ansible_net_model') or facts.get('ansible_net_system')
+    if model:
+      self.models[host.get_name()] = model
+
+    timings = result._result.get('command_timings')
+    if not timings:
+      return
+
+    model = self.get_model(host)
+    per_host = self.hosts.setdefault(host.get_name(), dict())
+    for item in timings:
+      command = item.get('command')
+      elapsed = item.get('elapsed')
+      if command is None or elapsed is None:
+        continue
+      key = (family, model, command)
+      if key not in self.histograms:
+        self.histograms[key] = Histogram(self.buckets)
+      self.histograms[key].observe(elapsed)
+
+      if command not in per_host:
+        per_host[command] = Histogram(self.buckets)
+      per_host[command].observe(elapsed)
+
+
+  def v2_playbook_on_stats(self, stats):
+    if not self.histograms:
+      return
+
+    try:
+      if self.prometheus_file:
+        write_atomic(self.prometheus_file, self.to_prometheus())
+      if self.json_file:
+        write_atomic(self.json_file, json.dumps(self.to_summary(), indent=2, sort_keys=True))
+    except (IOError, OSError) as e:
+      self._display.warning('fujitsu_metrics: failed to write metrics: %s' % to_text(e))
+
+
+  def to_prometheus(self):
+    lines = []
+    lines.append('# HELP %s Latency of commands sent by fujitsu modules.' % METRIC_NAME)
+    lines.append('# TYPE %s histogram' % METRIC_NAME)
+    for (family, model, command), hist in sorted(self.histograms.items()):
+      labels = 'family="%s",model="%s",command="%s"' % (escape_label(family), escape_label(model), escape_label(command))
+      for bound, count in zip(hist.buckets, hist.counts):
+        lines.append('%s_bucket{%s,le="%s"} %d' % (METRIC_NAME, labels, repr(bound), count))
+      lines.append('%s_bucket{%s,le="+Inf"} %d' % (METRIC_NAME, labels, hist.count))
+      lines.append('%s_sum{%s} %f' % (METRIC_NAME, labels, hist.sum))
+      lines.append('%s_count{%s} %d' % (METRIC_NAME, labels, hist.count))
+    return '\n'.join(lines) + '\n'
+
+
+  def to_summary(self):
+    commands = []
+    for (family, model, command), hist in sorted(self.histograms.items()):
+      item = dict(family=family, model=model, command=command)
+      item.update(hist.to_dict())
+      commands.append(item)
+
+    hosts = dict()
+    for host, per_host in self.hosts.items():
+      hosts[host] = dict(model=self.models.get(host, 'unknown'))
+      hosts[host]['commands'] = dict((command, hist.to_dict()) for command, hist in per_host.items())
+
+    return dict(timestamp=int(time.time()), commands=commands, hosts=hosts)
@@ -0,0 +1,706 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+"""plugins/cliconf/fujitsu_common.py
+
+Base of the cliconf plugins for fujitsu_ipcom, fujitsu_sir and fujitsu_srs.
+
+This is not a plugin for any network_os, the plugins of the families load it with the plugin loader,
+because the controller can not import the files in module_utils.
+
+  Cliconf = cliconf_loader.get('fujitsu_common', class_only=True)
+
+The differences of the families are in FAMILIES, the keys are network_os.
+The family specific dialogues (the commit of IPCOM) and get_device_info() are in the plugins of the families.
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+import base64
+import datetime
+import functools
+import json
+import math
+import os
+import re
+import signal
+import time
+import zlib
+
+from ansible.errors import AnsibleConnectionFailure, AnsibleError
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.module_utils.common._collections_compat import Mapping
+from ansible.module_utils.network.common.config import NetworkConfig, dumps
+from ansible.module_utils.network.common.utils import to_list
+from ansible.plugins.cliconf import CliconfBase
+
+# per-family descriptors, the key is network_os
+FAMILIES = {
+  'fujitsu_ipcom': {
+    # the command to enter the configuration mode
+    'configure': 'configure terminal',
+    # the commands to commit the configuration, see _commit().
+    # save is not sent here, it is sent by save_when of the config module
+    'commit': ['commit force-update'],
+    # replace=config, the word to remove a line of running-config
+    'negate': 'no',
+  },
+  'fujitsu_sir': {
+    'configure': 'configure',
+    'commit': ['commit'],
+    'negate': 'delete',
+  },
+  'fujitsu_srs': {
+    'configure': 'configure',
+    'commit': ['commit'],
+    'negate': 'delete',
+  },
+}
+
+# 'show' and its abbreviations, other commands may change the device
+SHOW_COMMAND_RE = re.compile(r'^\s*sh(?:o|ow)?\s')
+
+# adaptive timeout, see _adaptive_timeout()
+LATENCY_HISTORY = 100      # latencies kept per command
+LATENCY_MIN_SAMPLES = 5    # persistent_command_timeout is used until this number of samples
+LATENCY_PERCENTILE = 0.99
+LATENCY_MARGIN = 2.0
+LATENCY_FLOOR = 5          # seconds
+
+# outputs smaller than this are not compressed, see _compress()
+COMPRESS_MIN_SIZE = 8192
+# the fastest level, the outputs are text and shrink well enough
+COMPRESS_LEVEL = 1
+
+
+def enable_mode(func):
+  """same as enable_mode of ansible.plugins.cliconf, using the mode cached by the terminal plugin
+  """
+  @functools.wraps(func)
+  def wrapped(self, *args, **kwargs):
+    privileged, _ = self._connection._terminal.get_mode()
+    if not privileged:
+      raise AnsibleError('operation requires privilege escalation')
+    return func(self, *args, **kwargs)
+  return wrapped
+
+
+def replace_commands(candidate, running, negate='no'):
+  """return the commands to make running-config the same as candidate
+
+  The lines of running-config not in candidate are removed first, with the negate word,
+  then the lines of candidate not in running-config are added.
+  A line of running-config which is already negated is removed without the word.
+  The children of a removed line are not removed one by one.
+  A sub-mode is left with exit before the commands out of it, the exit lines of the configs are not compared.
+  The lines are compared by hash, so the cost is linear to the size of the configs.
+  """
+  prefix = negate + ' '
+  running_obj = NetworkConfig(indent=1, contents=running)
+  candidate_obj = NetworkConfig(indent=1, contents=candidate)
+  running_lines = set(item.line for item in running_obj.items)
+  candidate_lines = set(item.line for item in candidate_obj.items)
+
+  commands = []
+  context = []
+
+  def append(parents, command, enter):
+    # leave the modes out of the path of the command with exit, then enter the parents not entered yet
+    depth = 0
+    while depth < min(len(context), len(parents)) and context[depth] == parents[depth]:
+      depth += 1
+    commands.extend(['exit'] * (len(context) - depth))
+    commands.extend(parents[depth:])
+    context[:] = parents + [command] if enter else parents
+    commands.append(command)
+
+  for item in running_obj.items:
+    if item.line in candidate_lines or item.text == 'exit':
+      continue
+    parents = item.parents
+    if parents and ' '.join(parents) not in candidate_lines:
+      # removed with the parent
+      continue
+    if item.text.startswith(prefix):
+      append(parents, item.text[len(prefix):], False)
+    else:
+      append(parents, prefix + item.text, False)
+
+  for item in candidate_obj.items:
+    if item.line not in running_lines and item.text != 'exit':
+      append(item.parents, item.text, item.has_children)
+
+  return commands
+
+
+def filter_lines(out, include=None, exclude=None, section=None):
+  """return the lines of the output matching the patterns
+
+  Arguments:
+    include {list} -- regexps, only the lines matching any of them are kept
+    exclude {list} -- regexps, the lines matching any of them are dropped
+    section {list} -- regexps, only the lines matching any of them and the indented lines following them are kept
+  """
+  include = [re.compile(p) for p in to_list(include)]
+  exclude = [re.compile(p) for p in to_list(exclude)]
+  section = [re.compile(p) for p in to_list(section)]
+
+  lines = []
+  in_section = False
+  for line in to_text(out, errors='surrogate_or_strict').splitlines():
+    if section:
+      if line[:1] not in (u' ', u'\t'):
+        in_section = any(p.search(line) for p in section)
+      if not in_section:
+        continue
+    if include and not any(p.search(line) for p in include):
+      continue
+    if exclude and any(p.search(line) for p in exclude):
+      continue
+    lines.append(line)
+  return u'\n'.join(lines)
+
+
+class Cliconf(CliconfBase):
+
+  # set by the plugins of the families, the key of FAMILIES
+  network_os = None
+
+  def __init__(self, *args, **kwargs):
+    super(Cliconf, self).__init__(*args, **kwargs)
+
+    self._family = FAMILIES[self.network_os]
+
+    # candidate lines staged by edit_config(commit=False).
+    # this lives as long as the persistent connection, see commit() and discard_changes()
+    self._staged_candidate = []
+
+    # outputs of show commands cached by get_cached(), {command: (time, output)}
+    # this is cleared when anything but show is sent to the device
+    self._show_cache = {}
+
+    # latencies loaded from the latency_store, {command: [seconds, ...]}
+    self._latencies = None
+
+
+  # connection.get_capabilities()
+  def get_capabilities(self):
+    """Retrieves supported capabilities
+
+    CliconfBaseの中でget_capabilities()は最小限以下の情報を返せ、と書かれている。
+      {
+        'rpc': [list of supported rpcs],
+        'network_api': <str>, # the name of the transport
+        'device_info': {
+          'network_os': <str>,
+          'network_os_version': <str>,
+          'network_os_model': <str>,
+          'network_os_hostname': <str>,
+          'network_os_image': <str>,
+          'network_os_platform': <str>,
+        },
+        'device_operations': {
+          'supports_replace': <bool>,            # identify if config should be merged or replaced is supported
+          'supports_commit': <bool>,             # identify if commit is supported by device or not
+          'supports_rollback': <bool>,           # identify if rollback is supported or not
+          'supports_defaults': <bool>,           # identify if fetching running config with default is supported
+          'supports_commit_comment': <bool>,     # identify if adding comment to commit is supported of not
+          'supports_onbox_diff: <bool>,          # identify if on box diff capability is supported or not
+          'supports_generate_diff: <bool>,       # identify if diff capability is supported within plugin
+          'supports_multiline_delimiter: <bool>, # identify if multiline demiliter is supported within config
+          'support_match: <bool>,                # identify if match is supported
+          'support_diff_ignore_lines: <bool>,    # identify if ignore line in diff is supported
+        }
+        'format': [list of supported configuration format],
+        'match': ['line', 'strict', 'exact', 'none'],
+        'replace': ['line', 'block', 'config'],
+      }
+    """
+
+    result = dict()
+
+    # CliconfBaseのget_base_rpc()は ['get_config', 'edit_config', 'get_capabilities', 'get'] を返却する。
+    # Fujitsuの装置はcommitとdiscard_changesをサポートするので、それらを追加する。
+    result['rpc'] = self.get_base_rpc() + ['commit', 'discard_changes', 'rollback', 'get_cached']
+
+    # トランスポートは'cliconf'の一択
+    result['network_api'] = 'cliconf'
+
+    # デバイス情報
+    result['device_info'] = self.get_device_info()
+
+    # デバイスがサポートするオペレーション
+    result['device_operations'] = self.get_device_operations()
+
+    # サポートしているコンフィグのフォーマット
+    result['format'] = ['text']
+
+    result['match'] = ['line', 'strict', 'exact', 'none']
+
+    result['replace'] = ['line', 'config']
+
+    # 接続先のアドレス、モジュール側でホスト毎に保存するときのキーになる
+    result['host'] = self._connection._play_context.remote_addr
+
+    return json.dumps(result)
+
+
+  @enable_mode
+  def get_config(self, source='running', flags=None, format='text', compress=False):
+    # pylint: disable=redefined-builtin
+    if source not in ('running', 'startup'):
+      raise AnsibleError("fetching configuration from %s is not supported" % source)
+
+    if source == 'running':
+      cmd = 'show running-config '
+    else:
+      cmd = 'show startup-config '
+
+    if flags:
+      cmd += ' '.join(to_list(flags))
+
+    cmd = cmd.strip()
+    out = self.send_command(cmd)
+    return self._compress(out) if compress else out
+
+
+  @enable_mode
+  def get_diff(self, candidate=None, running=None, diff_match='line', diff_ignore_lines=None, path=None, diff_replace='line'):
+    """
+    Generate diff between candidate and running configuration.
+
+    the same parser is used by module_utils/fujitsu_diff.py to compute diff offline.
+    """
+    diff = {}
+
+    if candidate is None:
+      raise ValueError('must provide a candidate config')
+
+    candidate_obj = NetworkConfig(indent=1)
+    candidate_obj.load('\n'.join(to_list(candidate)))
+
+    if running and diff_match != 'none':
+      running_obj = NetworkConfig(indent=1, contents=running, ignore_lines=diff_ignore_lines)
+      configdiffobjs = candidate_obj.difference(running_obj, path=path, match=diff_match, replace=diff_replace)
+    else:
+      configdiffobjs = candidate_obj.items
+
+    diff['config_diff'] = dumps(configdiffobjs, 'commands') if configdiffobjs else ''
+    return json.dumps(diff)
+
+
+  @enable_mode
+  def edit_config(self, candidate=None, commit=True, replace=None, diff=False, comment=None, checkpoint_dir=None, on_error='abort'):
+    """send configuration commands
+
+    Keyword Arguments:
+      candidate {list} -- configuration commands to be sent (default: {None})
+      commit {bool} -- do commit, if False the commands are staged in this connection
+                       and sent all together by the next commit (default: {True})
+      replace {str} -- 'config' to replace running-config with candidate, which is the whole config.
+                       only the difference is sent, see replace_commands() (default: {None})
+      comment {str} -- not supported yet (default: {None})
+      checkpoint_dir {str} -- store running-config before the change in this directory,
+                              see rollback() (default: {None})
+      on_error {str} -- what to do when a line is rejected by the device, see _send_candidate() (default: {'abort'})
+
+    Raises:
+      ValueError -- raise error when candidate is not provided.
+
+    Returns:
+      dict -- { request: [], response: [], commit_response: [], staged: int, errors: []
+                [, aborted: bool][, checkpoint: str]}
+    """
+    # pylint: disable=signature-differs
+
+    if replace == 'config':
+      if not commit:
+        raise ValueError('replace=config can not be staged')
+      if self._staged_candidate:
+        raise ValueError('replace=config can not be mixed with the staged candidate')
+      if isinstance(candidate, list):
+        candidate = '\n'.join(candidate)
+      running = to_text(self.get_config(), errors='surrogate_or_strict')
+      lines = [{'command': cmd} for cmd in self.replace_commands(candidate, running)]
+      if not lines:
+        return dict(request=[], response=[], commit_response=[], staged=0)
+      checkpoint = self._write_checkpoint(checkpoint_dir, running) if checkpoint_dir else None
+      self._show_cache.clear()
+      return self._with_checkpoint(self._send_candidate(lines, on_error), checkpoint)
+
+    lines = []
+    for line in to_list(candidate):
+      if not isinstance(line, Mapping):
+        line = {'command': line}
+
+      cmd = line['command']
+      if cmd != 'end' and cmd != 'commit' and cmd != 'discard' and cmd[0] != '#':
+        lines.append(line)
+
+    if not lines and not (commit and self._staged_candidate):
+      raise ValueError('must provide a candidate config to load')
+
+    if not commit:
+      # defer_commit, nothing is sent to the device here
+      self._staged_candidate.extend(lines)
+      return dict(request=[], response=[], commit_response=[], staged=len(self._staged_candidate))
+
+    lines = self._staged_candidate + lines
+    self._staged_candidate = []
+
+    checkpoint = None
+    if checkpoint_dir:
+      checkpoint = self._write_checkpoint(checkpoint_dir, to_text(self.get_config(), errors='surrogate_or_strict'))
+    self._show_cache.clear()
+
+    return self._with_checkpoint(self._send_candidate(lines, on_error), checkpoint)
+
+
+  @staticmethod
+  def _with_checkpoint(result, checkpoint):
+    if checkpoint:
+      result['checkpoint'] = checkpoint
+    return result
+
+
+  def _checkpoint_path(self, checkpoint_dir, checkpoint=None):
+    path = os.path.join(os.path.expanduser(checkpoint_dir), self._connection._play_context.remote_addr)
+    if checkpoint is None:
+      return path
+    return os.path.join(path, '%s.cfg' % checkpoint)
+
+
+  def _write_checkpoint(self, checkpoint_dir, running):
+    """store running-config before the change, return the checkpoint id
+    """
+    checkpoint = datetime.datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    path = self._checkpoint_path(checkpoint_dir, checkpoint)
+    if not os.path.isdir(os.path.dirname(path)):
+      os.makedirs(os.path.dirname(path))
+    with open(path, 'wb') as f:
+      f.write(to_bytes(running, errors='surrogate_or_strict'))
+    return checkpoint
+
+
+  @enable_mode
+  def rollback(self, rollback_id=None, commit=True, checkpoint_dir=None, on_error='abort'):
+    """restore running-config of the checkpoint stored by edit_config()
+
+    Only the inverse diff is sent, see replace_commands().
+
+    Keyword Arguments:
+      rollback_id {str} -- checkpoint id, the latest one if None (default: {None})
+      commit {bool} -- if False, the commands are returned without being sent (default: {True})
+      checkpoint_dir {str} -- directory of the checkpoints
+      on_error {str} -- see _send_candidate() (default: {'abort'})
+
+    Returns:
+      dict -- { request: [], response: [], commit_response: [], staged: int, checkpoint: str}
+    """
+    if not checkpoint_dir:
+      raise ValueError('must provide checkpoint_dir')
+
+    if rollback_id is None:
+      try:
+        names = sorted(name for name in os.listdir(self._checkpoint_path(checkpoint_dir)) if name.endswith('.cfg'))
+      except OSError:
+        names = []
+      if not names:
+        raise ValueError('no checkpoint is found in %s' % self._checkpoint_path(checkpoint_dir))
+      rollback_id = names[-1][:-len('.cfg')]
+
+    try:
+      with open(self._checkpoint_path(checkpoint_dir, rollback_id), 'rb') as f:
+        candidate = to_text(f.read(), errors='surrogate_or_strict')
+    except (IOError, OSError) as e:
+      raise ValueError('failed to read the checkpoint %s: %s' % (rollback_id, e))
+
+    running = to_text(self.get_config(), errors='surrogate_or_strict')
+    lines = self.replace_commands(candidate, running)
+    if not commit or not lines:
+      return dict(request=lines, response=[], commit_response=[], staged=len(self._staged_candidate), checkpoint=rollback_id)
+
+    self._show_cache.clear()
+    return self._with_checkpoint(self._send_candidate([{'command': cmd} for cmd in lines], on_error), rollback_id)
+
+
+  def replace_commands(self, candidate, running):
+    """replace_commands() with the negate word of the family
+    """
+    return replace_commands(candidate, running, self._family['negate'])
+
+
+  def _send_candidate(self, lines, on_error='abort'):
+    """send configuration commands and commit them
+
+    When a line is rejected by the device (terminal_stderr_re),
+      abort -- the rest is not sent, and the configuration mode is left without commit
+      discard -- same as abort, and the changes made by the lines before it are discarded
+      continue -- the rest is sent and committed, the error is only recorded
+    The rejected lines are returned in errors, [{ index: int, command: str, error: str }].
+    """
+    # change to configuration mode
+    self._enter_config()
+
+    requests = []
+    responses = []
+    errors = []
+    for index, line in enumerate(lines):
+      requests.append(line['command'])
+      try:
+        r = self.send_command(**line)
+      except AnsibleConnectionFailure as e:
+        if not self._is_device_error(e):
+          raise
+        r = to_text(e.message)
+        errors.append(dict(index=index, command=line['command'], error=r))
+        if on_error != 'continue':
+          responses.append(r)
+          self._leave_config(discard=on_error == 'discard')
+          return dict(request=requests, response=responses, commit_response=[], staged=0, errors=errors, aborted=True)
+      responses.append(r)
+
+    result = dict(request=requests, response=responses, staged=0, errors=errors)
+    result.update(self._commit())
+    return result
+
+
+  def _enter_config(self):
+    self.send_command(self._family['configure'])
+
+
+  def _commit(self):
+    """send the commit commands of the family and leave the configuration mode
+
+    Returns:
+      dict -- { commit_response: [] }, merged into the result of _send_candidate()
+    """
+    commit_responses = []
+    for cmd in self._family['commit'] + ['end']:
+      r = self.send_command(cmd)
+      if r:
+        commit_responses.append(r)
+    return dict(commit_response=commit_responses)
+
+
+  def _is_device_error(self, e):
+    """return True if the error is the response of the device matched to terminal_stderr_re
+
+    The prompt has been received in that case, so the session can be used to leave the configuration mode.
+    Timeouts and closed sessions are not.
+    """
+    message = to_bytes(e.message, errors='surrogate_or_strict')
+    return any(regex.search(message) for regex in getattr(self._connection, '_terminal_stderr_re', None) or [])
+
+
+  def _leave_config(self, discard=False):
+    """leave the configuration mode without commit after an error
+    """
+    try:
+      if discard:
+        self.send_command('discard')
+      _, config_mode = self._connection._terminal.get_mode()
+      if config_mode:
+        self._end_config()
+    except AnsibleConnectionFailure:
+      # the first error is reported
+      pass
+
+
+  def _end_config(self):
+    self.send_command('end')
+
+
+  def commit(self, comment=None, checkpoint_dir=None, on_error='abort'):
+    """commit the candidate staged by edit_config(commit=False)
+    """
+    # pylint: disable=unused-argument
+    if not self._staged_candidate:
+      return dict(request=[], response=[], commit_response=[], staged=0)
+    return self.edit_config(commit=True, checkpoint_dir=checkpoint_dir, on_error=on_error)
+
+
+  def discard_changes(self):
+    """drop the candidate staged by edit_config(commit=False)
+
+    staged lines are not sent to the device yet, so nothing to do on the device
+    """
+    discarded = len(self._staged_candidate)
+    self._staged_candidate = []
+    return dict(discarded=discarded)
+
+
+  def get(self, command=None, prompt=None, answer=None, sendonly=False, newline=True, output=None, check_all=False,
+          timeout=None, latency_store=None, compress=False, include=None, exclude=None, section=None):
+    """send the command and return the output
+
+    Keyword Arguments:
+      timeout {int} -- seconds to wait for this command instead of persistent_command_timeout
+      latency_store {str} -- directory to keep the latencies per host and command,
+                             the timeout is learned from them when it is not given
+      compress {bool} -- return large output compressed, see _compress()
+      include, exclude, section {list} -- return only the matching lines, see filter_lines().
+                                          the output is filtered here, before it is sent to the module
+    """
+    if not SHOW_COMMAND_RE.match(command):
+      self._on_change(command)
+
+    if latency_store and not timeout:
+      timeout = self._adaptive_timeout(latency_store, command)
+
+    start = time.time()
+    out = self._send_command_with_timeout(timeout, command=command, prompt=prompt, answer=answer, sendonly=sendonly)
+    if latency_store:
+      self._record_latency(latency_store, command, time.time() - start)
+    if include or exclude or section:
+      out = filter_lines(out, include, exclude, section)
+    return self._compress(out) if compress else out
+
+
+  def _on_change(self, command):
+    """called by get() before the command other than show, which may change the device
+    """
+    # pylint: disable=unused-argument
+    # cached outputs are not reliable any more
+    self._show_cache.clear()
+
+
+  def get_cached(self, command=None, ttl=0, timeout=None, latency_store=None, compress=False, include=None, exclude=None,
+                 section=None):
+    """return the output of the show command from the cache if it is younger than ttl seconds
+
+    The cache lives as long as the persistent connection,
+    so that the same show command in the following tasks is not sent again.
+    The whole output is cached, and filtered by include, exclude and section for each call, see get().
+
+    Returns:
+      dict -- { output: str, cached: bool }
+    """
+    if not SHOW_COMMAND_RE.match(command):
+      out = self.get(command, timeout=timeout, latency_store=latency_store, compress=compress,
+                     include=include, exclude=exclude, section=section)
+      return dict(output=out, cached=False)
+
+    key = ' '.join(command.split())
+    now = time.time()
+    entry = self._show_cache.get(key)
+    cached = bool(entry and now - entry[0] < ttl)
+    if cached:
+      out = entry[1]
+    else:
+      out = to_text(self.get(command, timeout=timeout, latency_store=latency_store), errors='surrogate_or_strict')
+      self._show_cache[key] = (now, out)
+
+    if include or exclude or section:
+      out = filter_lines(out, include, exclude, section)
+    return dict(output=self._compress(out) if compress else out, cached=cached)
+
+
+  @staticmethod
+  def _compress(out):
+    """compress the output to reduce the json-rpc payload to the module
+
+    The output is escaped into json twice, for the response of the rpc and for the module result.
+    Large outputs such as configs are sent as zlib + base64 instead, and decompressed by
+    module_utils/fujitsu_common.py. Small outputs are returned as is.
+
+    Returns:
+      str or dict -- { encoding: 'zlib+base64', data: str }
+    """
+    out = to_text(out, errors='surrogate_or_strict')
+    if len(out) < COMPRESS_MIN_SIZE:
+      return out
+    data = zlib.compress(to_bytes(out, errors='surrogate_or_strict'), COMPRESS_LEVEL)
+    return dict(encoding='zlib+base64', data=base64.b64encode(data).decode('ascii'))
+
+
+  def _send_command_with_timeout(self, timeout, **kwargs):
+    """send_command() with persistent_command_timeout replaced during the command
+    """
+    if not timeout:
+      return self.send_command(**kwargs)
+
+    saved = self._connection.get_option('persistent_command_timeout')
+    self._connection.set_option('persistent_command_timeout', timeout)
+    # ansible-connection has armed the alarm with the global timeout before calling this rpc,
+    # it is replaced during the command, then armed again with the rest of the time
+    start = time.time()
+    remaining = signal.alarm(timeout)
+    try:
+      return self.send_command(**kwargs)
+    finally:
+      self._connection.set_option('persistent_command_timeout', saved)
+      if remaining:
+        # at least 1, alarm(0) cancels it
+        signal.alarm(max(1, remaining - int(time.time() - start)))
+      else:
+        signal.alarm(0)
+
+
+  def _latency_file(self, latency_store):
+    host = self._connection._play_context.remote_addr
+    return os.path.join(os.path.expanduser(latency_store), '%s.json' % host)
+
+
+  def _load_latencies(self, latency_store):
+    if self._latencies is None:
+      try:
+        with open(self._latency_file(latency_store)) as f:
+          self._latencies = json.load(f)
+      except (IOError, OSError, ValueError):
+        self._latencies = {}
+    return self._latencies
+
+
+  def _adaptive_timeout(self, latency_store, command):
+    """return the timeout learned from the latencies of the command on this host
+
+    The timeout is the LATENCY_PERCENTILE of the history with LATENCY_MARGIN,
+    so that dead devices fail fast while slow commands still succeed.
+    None is returned until enough samples are recorded.
+    """
+    history = self._load_latencies(latency_store).get(' '.join(command.split()))
+    if not history or len(history) < LATENCY_MIN_SAMPLES:
+      return None
+    history = sorted(history)
+    index = int(math.ceil(LATENCY_PERCENTILE * len(history))) - 1
+    return max(LATENCY_FLOOR, int(math.ceil(history[index] * LATENCY_MARGIN)))
+
+
+  def _record_latency(self, latency_store, command, elapsed):
+    latencies = self._load_latencies(latency_store)
+    history = latencies.setdefault(' '.join(command.split()), [])
+    history.append(round(elapsed, 3))
+    del history[:-LATENCY_HISTORY]
+
+    path = self._latency_file(latency_store)
+    try:
+      if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+      tmp = path + '.tmp'
+      with open(tmp, 'w') as f:
+        json.dump(latencies, f)
+      os.rename(tmp, path)
+    except (IOError, OSError) as e:
+      self._connection.queue_message('warning', 'failed to write latencies to %s: %s' % (path, e))
+
+
+  def get_device_info(self):
+    raise NotImplementedError('get_device_info() is implemented by the plugins of the families')
+
+
+  def get_device_operations(self):
+    return {
+      'supports_replace': True,
+      'supports_commit': True,
+      'supports_rollback': True,
+      'supports_defaults': True,
+      'supports_onbox_diff': True,
+      'supports_commit_comment': False,
+      'supports_multiline_delimiter': False,
+      'support_match': True,
+      'support_diff_ignore_lines': True,
+      'supports_generate_diff': True,
+    }
@@ -7,178 +7,176 @@ __metaclass__ = type
 
 cliconf plugin for fujitsu_ipcom
 
+The family-independent part is in cliconf/fujitsu_common.py.
+
 Takamitsu IIDA (@takamitsu-iida)
 """
 
-import collections
-import json
+import datetime
 import re
+import time
 
-from ansible.errors import AnsibleError
-from ansible.module_utils._text import to_text
-from ansible.module_utils.network.common.utils import to_list
-# from ansible.module_utils.network.common.config import NetworkConfig
-from ansible.plugins.cliconf import CliconfBase, enable_mode
-
-
-class Cliconf(CliconfBase):
-
-  # connection.get_capabilities()
-  def get_capabilities(self):
-    """Retrieves supported capabilities
-
-    CliconfBaseの中でget_capabilities()は最小限以下の情報を返せ、と書かれている。
-      {
-        'rpc': [list of supported rpcs],
-        'network_api': <str>, # the name of the transport
-        'device_info': {
-          'network_os': <str>,
-          'network_os_version': <str>,
-          'network_os_model': <str>,
-          'network_os_hostname': <str>,
-          'network_os_image': <str>,
-          'network_os_platform': <str>,
-        },
-        'device_operations': {
-          'supports_replace': <bool>,            # identify if config should be merged or replaced is supported
-          'supports_commit': <bool>,             # identify if commit is supported by device or not
-          'supports_rollback': <bool>,           # identify if rollback is supported or not
-          'supports_defaults': <bool>,           # identify if fetching running config with default is supported
-          'supports_commit_comment': <bool>,     # identify if adding comment to commit is supported of not
-          'supports_onbox_diff: <bool>,          # identify if on box diff capability is supported or not
-          'supports_generate_diff: <bool>,       # identify if diff capability is supported within plugin
-          'supports_multiline_delimiter: <bool>, # identify if multiline demiliter is supported within config
-          'support_match: <bool>,                # identify if match is supported
-          'support_diff_ignore_lines: <bool>,    # identify if ignore line in diff is supported
-        }
-        'format': [list of supported configuration format],
-        'match': ['line', 'strict', 'exact', 'none'],
-        'replace': ['line', 'block', 'config'],
-      }
-    """
-
-    result = dict()
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.plugins.loader import cliconf_loader
 
-    # CliconfBaseのget_base_rpc()は ['get_config', 'edit_config', 'get_capabilities', 'get'] を返却する。
-    # Fujitsu IPCOMはcommitとdiscard_changesをサポートするので、それらを追加する。
-    result['rpc'] = self.get_base_rpc() + ['commit', 'discard_changes']
+# 'configure' and its abbreviations, the edit buffer may be changed after them
+CONFIGURE_COMMAND_RE = re.compile(r'^\s*conf\w*(?:\s|$)')
 
-    # トランスポートは'cliconf'の一択
-    result['network_api'] = 'cliconf'
+# the timestamps in show system info are in seconds,
+# and Current-time is read a round trip before the controller reads its clock, see _buffer_is_current()
+BUFFER_TIME_SLACK = 2
 
-    # デバイス情報
-    result['device_info'] = self.get_device_info()
+# questions of commit force-update, (name, pattern, answer) in the order asked
+COMMIT_QUESTIONS = [
+  # Do you overwrite "running-config" by the current configuration? (y|[n]):
+  ('overwrite_running', r'overwrite "running-config".*\(y\|\[n\]\):', 'y'),
+  # Do you update "startup-config" for the restarting system? (y|[n]):
+  # Does it save also at "startup-config"?([y]|n):
+  ('update_startup', r'"startup-config".*\((?:y\|\[n\]|\[y\]\|n)\):', 'y'),
+]
 
-    # デバイスがサポートするオペレーション
-    result['device_operations'] = self.get_device_operations()
 
-    # サポートしているコンフィグのフォーマット
-    result['format'] = ['text']
+class Cliconf(cliconf_loader.get('fujitsu_common', class_only=True)):
 
-    result['match'] = ['none']
+  network_os = 'fujitsu_ipcom'
 
-    result['replace'] = ['line']
+  def __init__(self, *args, **kwargs):
+    super(Cliconf, self).__init__(*args, **kwargs)
 
-    return json.dumps(result)
+    # time.time() when the edit buffer was committed as running-config.
+    # None if the buffer may differ, see _enter_config()
+    self._committed_at = None
 
 
-  @enable_mode
-  def get_config(self, source='running', flags=None, format='text'):
-    # pylint: disable=redefined-builtin
-    if source not in ('running', 'startup'):
-      raise AnsibleError("fetching configuration from %s is not supported" % source)
+  # called by connection/fujitsu_cli.py
+  def on_session_resumed(self):
+    """the session has been opened again, the edit buffer of the old session is gone
+    """
+    self._committed_at = None
 
-    if source == 'running':
-      cmd = 'show running-config '
-    else:
-      cmd = 'show startup-config '
 
-    if flags:
-      cmd += ' '.join(to_list(flags))
+  def _on_change(self, command):
+    super(Cliconf, self)._on_change(command)
+    if CONFIGURE_COMMAND_RE.match(command):
+      self._committed_at = None
 
-    cmd = cmd.strip()
-    return self.send_command(cmd)
 
+  def _enter_config(self):
+    # the edit buffer is kept in the session after end.
+    # it is the same as running-config after our commit, unless running-config is changed by others,
+    # which updates the timestamp of running-config
+    committed_at = self._committed_at
+    self._committed_at = None
+    current = committed_at is not None and self._buffer_is_current(committed_at)
 
-  @enable_mode
-  def get_diff(self, candidate=None, running=None, diff_match='line', diff_ignore_lines=None, path=None, diff_replace='line'):
-    """
-    Generate diff between candidate and running configuration.
-    """
-    # pylint: disable=unused-argument
-    diff = {}
-    return json.dumps(diff)
+    super(Cliconf, self)._enter_config()
 
+    if current:
+      self._connection.queue_message('vvvv', 'edit buffer is current, load running-config is skipped')
+    else:
+      self.send_command('load running-config')
 
-  @enable_mode
-  def edit_config(self, candidate, commit=True, replace=None, diff=False, comment=None):
-    """send configuration commands
 
-    Keyword Arguments:
-      candidate {list} -- configuration commands to be sent (default: {None})
-      commit {bool} -- do commit, this must be True (default: {True})
-      replace {list} -- not supported yet (default: {None})
-      comment {str} -- not supported yet (default: {None})
+  def _commit(self):
+    commit_responses, answered = self._commit_dialogue()
 
-    Raises:
-      ValueError -- raise error when candidate is not provided.
+    r = self.send_command('end')
+    if r:
+      commit_responses.append(r)
 
-    Returns:
-      dict -- { request: [], response: []}
-    """
-    # pylint: disable=signature-differs
+    # the edit buffer has been committed as running-config,
+    # the timestamps are read by the next edit, see _buffer_is_current()
+    self._committed_at = time.time()
 
-    if not candidate:
-      raise ValueError('must provide a candidate config to load')
+    return dict(commit_response=commit_responses, answered=answered)
 
-    if not commit:
-      raise ValueError('check mode is not supported')
 
-    # change to configuration mode
-    self.send_command('configure terminal')
+  def _commit_dialogue(self):
+    """send commit force-update and answer its questions in one exchange
 
-    # loading configuration shoud be configurable.
-    self.send_command('load running-config')
+    All questions and answers are given to send_command() with check_all,
+    so each question is answered as soon as it appears while the response is received.
+    When the device echoes the answer later than persistent_buffer_read_timeout,
+    the receive stops at the question which has been answered already,
+    then the rest of the dialogue is received without sending anything,
+    until the prompt of the CLI is received, so that the commit has finished.
 
-    requests = []
+    Returns:
+      tuple -- (responses, names of the answered questions in COMMIT_QUESTIONS)
+    """
     responses = []
-    for line in to_list(candidate):
-      if not isinstance(line, collections.Mapping):
-        line = {'command': line}
+    dialogue = []
 
-      cmd = line['command']
-      if cmd != 'end' and cmd != 'commit' and cmd != 'discard' and cmd[0] != '#':
-        r = self.send_command(**line)
-        responses.append(r)
-        requests.append(cmd)
+    def remaining():
+      text = '\n'.join(dialogue)
+      return [q for q in COMMIT_QUESTIONS if not re.search(q[1], text, re.I)]
 
-    commit_responses = []
-    r = self.send_command('commit force-update')
+    r = self.send_command(self._family['commit'][0],
+                          prompt=[pattern for _, pattern, _ in COMMIT_QUESTIONS],
+                          answer=[answer for _, _, answer in COMMIT_QUESTIONS],
+                          check_all=True)
     if r:
-      commit_responses.append(r)
-    matched_prompt = to_text(self._connection.get_prompt())
-    if '(y|[n]):' in matched_prompt:
-      # Do you overwrite "running-config" by the current configuration? (y|[n]):
-      r = self.send_command('y')
+      responses.append(r)
+    # the question lines are removed from r when the receive stops at them
+    dialogue.append(to_text(self._connection._last_response, errors='surrogate_or_strict'))
+
+    while True:
+      matched_prompt = to_text(self._connection.get_prompt(), errors='surrogate_or_strict')
+      if '(y|[n]):' not in matched_prompt and '([y]|n):' not in matched_prompt:
+        break
+      questions = remaining()
+      if questions:
+        out = self._connection.receive(prompts=[to_bytes(pattern) for _, pattern, _ in questions],
+                                       answer=[to_bytes(answer) for _, _, answer in questions],
+                                       check_all=True)
+      else:
+        # all questions have been answered, the commit is still running
+        out = self._connection.receive()
+      r = to_text(out, errors='surrogate_or_strict')
       if r:
-        commit_responses.append(r)
-      matched_prompt = to_text(self._connection.get_prompt())
-      if '(y|[n]):' in matched_prompt or '([y]|n):' in matched_prompt:
-        # Do you update "startup-config" for the restarting system? (y|[n]):
-        # Does it save also at "startup-config"?([y]|n):
-        r = self.send_command('y')
-        if r:
-          commit_responses.append(r)
+        responses.append(r)
+      dialogue.append(to_text(self._connection._last_response, errors='surrogate_or_strict'))
 
-    r = self.send_command('end')
-    if r:
-      commit_responses.append(r)
+    questions = remaining()
+    return responses, [q[0] for q in COMMIT_QUESTIONS if q not in questions]
 
-    return dict(request=requests, response=responses, commit_response=commit_responses)
 
+  def _buffer_is_current(self, committed_at):
+    """return True if running-config has not been changed since our commit at committed_at, time.time()
+
+    show system info is read only here, when the edit buffer may be reused by the next edit.
+    The time of our commit on the device is estimated from Current-time and the time elapsed on the controller,
+    and running-config must not be newer than it.
+    The timestamps are in seconds, so a commit by another session within BUFFER_TIME_SLACK seconds
+    after ours is not detected, and the edit buffer is taken as current.
+    """
+    # Current-time:   2019/03/19(Tue)18:05:19
+    # Running-config: 2019/03/19(Tue)16:52:42
+    out = to_text(self.send_command('show system info'), errors='surrogate_or_strict')
+    current_time = self._parse_time(out, 'Current-time')
+    running_time = self._parse_time(out, 'Running-config')
+    if current_time is None or running_time is None:
+      return False
+    committed = current_time - datetime.timedelta(seconds=time.time() - committed_at)
+    return running_time <= committed + datetime.timedelta(seconds=BUFFER_TIME_SLACK)
+
+
+  @staticmethod
+  def _parse_time(out, name):
+    match = re.search(r'^\s*%s\s*:\s*(\d+/\d+/\d+)\(\w+\)(\d+:\d+:\d+)' % name, out, re.M)
+    if not match:
+      return None
+    try:
+      return datetime.datetime.strptime('%s %s' % match.groups(), '%Y/%m/%d %H:%M:%S')
+    except ValueError:
+      return None
 
-  def get(self, command=None, prompt=None, answer=None, sendonly=False, newline=True, output=None, check_all=False):
-    return self.send_command(command, prompt=prompt, answer=answer, sendonly=sendonly)
+
+  def _end_config(self):
+    self.send_command('end')
+    # the edit buffer has uncommitted lines, answered in the same way as on_unbecome() of the terminal plugin
+    if b'(y|[n]):' in (self._connection.get_prompt() or b''):
+      self.send_command('y')
 
 
   def get_device_info(self):
@@ -232,18 +230,3 @@ class Cliconf(CliconfBase):
     device_info['network_os_hostname'] = prompt
 
     return device_info
-
-
-  def get_device_operations(self):
-    return {
-      'supports_replace': False,
-      'supports_commit': True,
-      'supports_rollback': False,
-      'supports_defaults': True,
-      'supports_onbox_diff': True,
-      'supports_commit_comment': False,
-      'supports_multiline_delimiter': False,
-      'support_match': False,
-      'support_diff_ignore_lines': False,
-      'supports_generate_diff': False,
-    }
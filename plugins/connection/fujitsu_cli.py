@@ -0,0 +1,1123 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = """
+---
+author: "Takamitsu IIDA (@takamitsu-iida)"
+connection: fujitsu_cli
+short_description: network_cli for fujitsu ipcom, si-r and sr-s
+description:
+  - This connection plugin is network_cli with the receive buffer bounded in memory.
+  - The options of network_cli are available as they are.
+  - Set C(ansible_connection=fujitsu_cli) instead of C(network_cli) to use it.
+  - With C(ansible_network_os=fujitsu), the family is detected from the System line of show system info
+    at the first connection, and cached on disk per host, so the later connections load the terminal
+    and cliconf plugins of the family without probing.
+  - The modules are per family, C(ansible_network_os=fujitsu) does not choose the module of the family.
+version_added: "2.9"
+options:
+  host:
+    description:
+      - Specifies the remote device FQDN or IP address to establish the SSH
+        connection to.
+    default: inventory_hostname
+    vars:
+      - name: ansible_host
+  port:
+    type: int
+    description:
+      - Specifies the port on the remote device that listens for connections
+        when establishing the SSH connection.
+    default: 22
+    ini:
+      - section: defaults
+        key: remote_port
+    env:
+      - name: ANSIBLE_REMOTE_PORT
+    vars:
+      - name: ansible_port
+  network_os:
+    description:
+      - Configures the device platform network operating system.  This value is
+        used to load the correct terminal and cliconf plugins to communicate
+        with the remote device.
+    vars:
+      - name: ansible_network_os
+  remote_user:
+    description:
+      - The username used to authenticate to the remote device when the SSH
+        connection is first established.  If the remote_user is not specified,
+        the connection will use the username of the logged in user.
+      - Can be configured from the CLI via the C(--user) or C(-u) options.
+    ini:
+      - section: defaults
+        key: remote_user
+    env:
+      - name: ANSIBLE_REMOTE_USER
+    vars:
+      - name: ansible_user
+  password:
+    description:
+      - Configures the user password used to authenticate to the remote device
+        when first establishing the SSH connection.
+    vars:
+      - name: ansible_password
+      - name: ansible_ssh_pass
+      - name: ansible_ssh_password
+  private_key_file:
+    description:
+      - The private SSH key or certificate file used to authenticate to the
+        remote device when first establishing the SSH connection.
+    ini:
+      - section: defaults
+        key: private_key_file
+    env:
+      - name: ANSIBLE_PRIVATE_KEY_FILE
+    vars:
+      - name: ansible_private_key_file
+  timeout:
+    type: int
+    description:
+      - Sets the connection time, in seconds, for communicating with the
+        remote device.  This timeout is used as the default timeout value for
+        commands when issuing a command to the network CLI.  If the command
+        does not return in timeout seconds, an error is generated.
+    default: 120
+  become:
+    type: boolean
+    description:
+      - The become option will instruct the CLI session to attempt privilege
+        escalation on platforms that support it.  Normally this means
+        transitioning from user mode to C(enable) mode in the CLI session.
+        If become is set to True and the remote device does not support
+        privilege escalation or the privilege has already been elevated, then
+        this option is silently ignored.
+      - Can be configured from the CLI via the C(--become) or C(-b) options.
+    default: False
+    ini:
+      - section: privilege_escalation
+        key: become
+    env:
+      - name: ANSIBLE_BECOME
+    vars:
+      - name: ansible_become
+  become_method:
+    description:
+      - This option allows the become method to be specified in for handling
+        privilege escalation.  Typically the become_method value is set to
+        C(enable) but could be defined as other values.
+    default: sudo
+    ini:
+      - section: privilege_escalation
+        key: become_method
+    env:
+      - name: ANSIBLE_BECOME_METHOD
+    vars:
+      - name: ansible_become_method
+  host_key_auto_add:
+    type: boolean
+    description:
+      - By default, Ansible will prompt the user before adding SSH keys to the
+        known hosts file.  Since persistent connections such as network_cli run
+        in background processes, the user will never be prompted.  By enabling
+        this option, unknown host keys will automatically be added to the
+        known hosts file.
+      - Be sure to fully understand the security implications of enabling this
+        option on production systems as it could create a security vulnerability.
+    default: False
+    ini:
+      - section: paramiko_connection
+        key: host_key_auto_add
+    env:
+      - name: ANSIBLE_HOST_KEY_AUTO_ADD
+  persistent_connect_timeout:
+    type: int
+    description:
+      - Configures, in seconds, the amount of time to wait when trying to
+        initially establish a persistent connection.  If this value expires
+        before the connection to the remote device is completed, the connection
+        will fail.
+    default: 30
+    ini:
+      - section: persistent_connection
+        key: connect_timeout
+    env:
+      - name: ANSIBLE_PERSISTENT_CONNECT_TIMEOUT
+    vars:
+      - name: ansible_connect_timeout
+  persistent_command_timeout:
+    type: int
+    description:
+      - Configures, in seconds, the amount of time to wait for a command to
+        return from the remote device.  If this timer is exceeded before the
+        command returns, the connection plugin will raise an exception and
+        close.
+    default: 30
+    ini:
+      - section: persistent_connection
+        key: command_timeout
+    env:
+      - name: ANSIBLE_PERSISTENT_COMMAND_TIMEOUT
+    vars:
+      - name: ansible_command_timeout
+  persistent_buffer_read_timeout:
+    type: float
+    description:
+      - Configures, in seconds, the amount of time to wait for the data to be read
+        from Paramiko channel after the command prompt is matched. This timeout
+        value ensures that command prompt matched is correct and there is no more data
+        left to be received from remote host.
+    default: 0.1
+    ini:
+      - section: persistent_connection
+        key: buffer_read_timeout
+    env:
+      - name: ANSIBLE_PERSISTENT_BUFFER_READ_TIMEOUT
+    vars:
+      - name: ansible_buffer_read_timeout
+  persistent_log_messages:
+    type: boolean
+    description:
+      - This flag will enable logging the command executed and response received from
+        target device in the ansible log file. For this option to work 'log_path' ansible
+        configuration option is required to be set to a file path with write access.
+      - Be sure to fully understand the security implications of enabling this
+        option as it could create a security vulnerability by logging sensitive information in log file.
+    default: False
+    ini:
+      - section: persistent_connection
+        key: log_messages
+    env:
+      - name: ANSIBLE_PERSISTENT_LOG_MESSAGES
+    vars:
+      - name: ansible_persistent_log_messages
+  terminal_stdout_re:
+    type: list
+    elements: dict
+    version_added: '2.9'
+    description:
+      - A single regex pattern or a sequence of patterns along with optional flags
+        to match the command prompt from the received response chunk. This option
+        accepts C(pattern) and C(flags) keys. The value of C(pattern) is a python
+        regex pattern to match the response and the value of C(flags) is the value
+        accepted by I(flags) argument of I(re.compile) python method to control
+        the way regex is matched with the response, for example I('re.I').
+    vars:
+      - name: ansible_terminal_stdout_re
+  terminal_stderr_re:
+    type: list
+    elements: dict
+    version_added: '2.9'
+    description:
+      - This option provides the regex pattern and optional flags to match the
+        error string from the received response chunk. This option
+        accepts C(pattern) and C(flags) keys. The value of C(pattern) is a python
+        regex pattern to match the response and the value of C(flags) is the value
+        accepted by I(flags) argument of I(re.compile) python method to control
+        the way regex is matched with the response, for example I('re.I').
+    vars:
+      - name: ansible_terminal_stderr_re
+  terminal_initial_prompt:
+    type: list
+    version_added: '2.9'
+    description:
+      - A single regex pattern or a sequence of patterns to evaluate the expected
+        prompt at the time of initial login to the remote host.
+    vars:
+      - name: ansible_terminal_initial_prompt
+  terminal_initial_answer:
+    type: list
+    version_added: '2.9'
+    description:
+      - The answer to reply with if the C(terminal_initial_prompt) is matched. The value can be a single answer
+        or a list of answers for multiple terminal_initial_prompt. In case the login menu has
+        multiple prompts the sequence of the prompt and excepted answer should be in same order and the value
+        of I(terminal_prompt_checkall) should be set to I(True) if all the values in C(terminal_initial_prompt) are
+        expected to be matched and set to I(False) if any one login prompt is to be matched.
+    vars:
+      - name: ansible_terminal_initial_answer
+  terminal_initial_prompt_checkall:
+    type: boolean
+    version_added: '2.9'
+    description:
+      - By default the value is set to I(False) and any one of the prompts mentioned in C(terminal_initial_prompt)
+        option is matched it won't check for other prompts. When set to I(True) it will check for all the prompts
+        mentioned in C(terminal_initial_prompt) option in the given order and all the prompts
+        should be received from remote host if not it will result in timeout.
+    default: False
+    vars:
+      - name: ansible_terminal_initial_prompt_checkall
+  terminal_inital_prompt_newline:
+    type: boolean
+    version_added: '2.9'
+    description:
+      - This boolean flag, that when set to I(True) will send newline in the response if any of values
+        in I(terminal_initial_prompt) is matched.
+    default: True
+    vars:
+      - name: ansible_terminal_initial_prompt_newline
+  network_cli_retries:
+    description:
+      - Number of attempts to connect to remote host. The delay time between the retires increases after
+        every attempt by power of 2 in seconds till either the maximum attempts are exhausted or any of the
+        C(persistent_command_timeout) or C(persistent_connect_timeout) timers are triggered.
+    default: 3
+    version_added: '2.9'
+    type: integer
+    env:
+        - name: ANSIBLE_NETWORK_CLI_RETRIES
+    ini:
+        - section: persistent_connection
+          key: network_cli_retries
+    vars:
+        - name: ansible_network_cli_retries
+  receive_chunk_size:
+    type: int
+    description:
+      - Number of bytes read from the channel at once. network_cli reads 256 bytes.
+    default: 4096
+    vars:
+      - name: ansible_fujitsu_receive_chunk_size
+  receive_max_size:
+    type: int
+    description:
+      - The response of a command larger than this number of bytes is aborted,
+        and the session is closed to discard the rest of it. The next command opens a new session.
+      - The response is kept in memory while it is received, this bounds the memory of the persistent connection.
+      - 0 means no limit.
+    default: 16777216
+    vars:
+      - name: ansible_fujitsu_receive_max_size
+  family_cache:
+    type: path
+    description:
+      - Directory of the families detected with C(ansible_network_os=fujitsu), one file per host.
+      - Remove the file of the host when the device is replaced with another family.
+    default: ~/.ansible/fujitsu_families
+    vars:
+      - name: ansible_fujitsu_family_cache
+  bastion:
+    description:
+      - The jump host, C(user@host) or C(user@host:port), to reach the device through.
+      - All devices share one ssh session to the jump host (OpenSSH ControlMaster),
+        and each device is a channel in it (C(ssh -W)), instead of a ProxyCommand session per device.
+      - Do not set ProxyCommand in C(ansible_ssh_common_args) together, it takes precedence.
+    vars:
+      - name: ansible_fujitsu_bastion
+  bastion_channels:
+    type: int
+    description:
+      - Maximum number of devices connected through the jump host at the same time.
+        The connections over it wait for a free channel up to I(persistent_connect_timeout).
+      - Keep this equal to or less than MaxSessions of sshd on the jump host, which is 10 by default.
+    default: 10
+    vars:
+      - name: ansible_fujitsu_bastion_channels
+  bastion_control_dir:
+    type: path
+    description:
+      - Directory of the control sockets of the shared sessions and the lock files of the channels.
+    default: ~/.ansible/fujitsu_bastion
+    vars:
+      - name: ansible_fujitsu_bastion_control_dir
+  bastion_control_persist:
+    type: int
+    description:
+      - Seconds the shared session is kept open after the last device is disconnected.
+    default: 60
+    vars:
+      - name: ansible_fujitsu_bastion_control_persist
+  bastion_ssh_args:
+    description:
+      - Extra arguments of ssh to the jump host, e.g. C(-i ~/.ssh/bastion_key).
+    vars:
+      - name: ansible_fujitsu_bastion_ssh_args
+  keepalive_interval:
+    type: int
+    description:
+      - Seconds between the ssh keepalives on the idle session, 0 disables them.
+      - They keep the state of the firewalls and NAT on the way while the persistent connection waits for the next task,
+        and make a dead session found before the next command is sent.
+    default: 30
+    vars:
+      - name: ansible_fujitsu_keepalive_interval
+  resume_retries:
+    type: int
+    description:
+      - Number of times the session is opened again within a command when it is dropped, 0 disables it.
+      - The terminal is set up again (on_become and on_open_shell), and the command is sent again
+        if the session was found dropped before sending it, or if it is a show command.
+        The other commands may have been run on the device, so they fail after the session is opened again,
+        and so does a command in the configuration mode, which is lost with the session.
+      - The commands completed before the drop are not run again, their outputs have been returned.
+    default: 2
+    vars:
+      - name: ansible_fujitsu_resume_retries
+  record_dir:
+    type: path
+    description:
+      - Directory to record the sessions in, one cassette C(<host>.jsonl) per host.
+      - Everything sent and received in the shell is recorded with the time, including the terminal setup,
+        the answers to the prompts and the configuration dialogue. The password of become is not recorded.
+      - The sessions are appended to the cassette, including those of the later persistent connections.
+        Remove the cassette to record from scratch.
+    vars:
+      - name: ansible_fujitsu_record_dir
+  replay_dir:
+    type: path
+    description:
+      - Directory of the cassettes recorded by I(record_dir). The sessions are replayed without the device.
+      - The sent data must be found in the cassette in order, the exchanges not sent are skipped.
+    vars:
+      - name: ansible_fujitsu_replay_dir
+  replay_speed:
+    type: float
+    description:
+      - Speed of the replay to the recorded timing, 2.0 is twice as fast. 0 replays without waiting.
+    default: 1.0
+    vars:
+      - name: ansible_fujitsu_replay_speed
+"""
+
+"""plugins/connection/fujitsu_cli.py
+
+connection plugin for fujitsu_ipcom, fujitsu_sir and fujitsu_srs
+
+receive() of network_cli keeps the whole response in memory,
+and searches terminal_stderr_re only in the last 256 bytes, so an error followed by
+a long output is not found when the prompt is received.
+
+A session dropped on a flaky link is opened again by send(), see resume_retries.
+
+The sessions are recorded in the cassette of the host with record_dir, and replayed with replay_dir.
+A cassette is a json object per line,
+  {"session": 1, "host": str, "network_os": str, "time": str}  start of the session
+  {"t": float, "send": str}    data sent to the shell, t is seconds from the start of the session
+  {"t": float, "recv": str}    data received from the shell, "" when the session is closed
+  {"t": float, "prompt": str}  the prompt matched at the end of a command, not used by the replay
+The data is the raw bytes decoded with surrogateescape.
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+import fcntl
+import json
+import os
+import re
+import shlex
+import signal
+import socket
+import subprocess
+import tempfile
+import time
+
+from ansible.errors import AnsibleConnectionFailure
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.module_utils.six.moves import shlex_quote
+from ansible.plugins.cliconf import CliconfBase
+from ansible.plugins.connection.network_cli import AnsibleCmdRespRecv
+from ansible.plugins.connection.network_cli import Connection as NetworkCliConnection
+from ansible.plugins.loader import cliconf_loader, terminal_loader
+
+# bytes read after an error to find the prompt, see receive()
+ERROR_TAIL_SIZE = 65536
+
+# bytes of the previous data searched together with the chunk,
+# a prompt or an error across the boundary of the chunks is found in the window
+WINDOW_OVERLAP = 256
+
+# ansible_network_os to detect the family
+AUTO_NETWORK_OS = 'fujitsu'
+
+# the terminal plugin used until the family is detected,
+# its prompts include the questions of IPCOM, and the other commands are common to the families
+PROBE_NETWORK_OS = 'fujitsu_ipcom'
+
+# System line of show system info
+#   System:         IPCOM VE2-100_LS_PLUS
+#   System : Si-R220C
+#   System : SR-S716C2
+SYSTEM_RE = re.compile(r'^\s*System\s*:\s*(\S.*?)\s*$', re.M)
+
+FAMILIES = [
+  ('IPCOM', 'fujitsu_ipcom'),
+  ('Si-R', 'fujitsu_sir'),
+  ('SR-S', 'fujitsu_srs'),
+]
+
+# the command which is safe to send again after the session is dropped while it is running
+RESEND_COMMAND_RE = re.compile(br'^\s*sh(?:o|ow)?\s')
+
+# the become password in the cassette, which matches any answer in the replay
+REDACTED = b'<redacted>'
+
+# seconds between the attempts to get a channel of the jump host
+BASTION_POLL = 0.2
+
+
+class SessionDropped(AnsibleConnectionFailure):
+  """the ssh session is closed while sending a command or receiving the response
+  """
+
+
+def _encode(data):
+  return to_text(data, errors='surrogateescape')
+
+
+def _decode(text):
+  return to_bytes(text, errors='surrogateescape')
+
+
+class CassetteWriter(object):
+  """write the sessions of the host to the cassette
+  """
+
+  def __init__(self, path, header, secrets):
+    if not os.path.isdir(os.path.dirname(path)):
+      os.makedirs(os.path.dirname(path))
+    # appended, the persistent connection opens the cassette again after close()
+    self._sessions = len(load_cassette(path)) if os.path.exists(path) else 0
+    self._file = open(path, 'a')
+    self._header = header
+    self._secrets = [to_bytes(secret) for secret in secrets if secret]
+    self._start = time.time()
+
+  def start_session(self):
+    self._sessions += 1
+    self._start = time.time()
+    record = dict(self._header, session=self._sessions, time=time.strftime('%Y-%m-%dT%H:%M:%S'))
+    self._file.write(json.dumps(record) + '\n')
+    self._file.flush()
+
+  def write(self, kind, data):
+    if kind == 'send' and data in self._secrets:
+      # the answer to the password prompt is sent alone by _handle_prompt() of network_cli
+      data = REDACTED
+    self._file.write(json.dumps({'t': round(time.time() - self._start, 6), kind: _encode(data or b'')}) + '\n')
+    # kept even if the process is killed
+    self._file.flush()
+
+  def close(self):
+    self._file.close()
+
+
+class RecordingShell(object):
+  """the channel of paramiko, which records what is sent and received
+  """
+
+  def __init__(self, shell, cassette):
+    self._shell = shell
+    self._cassette = cassette
+
+  def sendall(self, data):
+    self._cassette.write('send', data)
+    return self._shell.sendall(data)
+
+  def recv(self, size):
+    data = self._shell.recv(size)
+    self._cassette.write('recv', data)
+    return data
+
+  def __getattr__(self, name):
+    return getattr(self._shell, name)
+
+
+def load_cassette(path):
+  """return the sessions in the cassette, [(header, [(t, kind, data)])]
+  """
+  sessions = []
+  with open(path) as f:
+    for line in f:
+      if not line.strip():
+        continue
+      record = json.loads(line)
+      if 'session' in record:
+        sessions.append((record, []))
+      elif sessions:
+        t = record.pop('t')
+        kind, text = record.popitem()
+        sessions[-1][1].append((t, kind, _decode(text)))
+  return sessions
+
+
+def _sent_matches(recorded, data):
+  if recorded == REDACTED:
+    # any answer, which is sent without the newline unlike the commands
+    return b'\r' not in data
+  return recorded == data
+
+
+class ReplayShell(object):
+  """the channel of paramiko, which replays a session in the cassette
+
+  recv() returns the data recorded after the last data sent, at the recorded timing divided by speed,
+  and blocks like the device when nothing more was received.
+  """
+
+  def __init__(self, events, speed):
+    self._events = [event for event in events if event[1] in ('send', 'recv')]
+    self._speed = speed
+    self._index = 0
+    self._pending = b''
+    self._time = 0.0
+    self._timeout = None
+    self.closed = False
+
+  def sendall(self, data):
+    for index in range(self._index, len(self._events)):
+      t, kind, recorded = self._events[index]
+      if kind == 'send' and _sent_matches(recorded, data):
+        self._index = index + 1
+        self._pending = b''
+        self._time = t
+        return
+    raise AnsibleConnectionFailure('%r is not found in the cassette' % data)
+
+  def recv(self, size):
+    if not self._pending and self._index < len(self._events) and self._events[self._index][1] == 'recv':
+      t, _, data = self._events[self._index]
+      self._index += 1
+      if self._speed and t > self._time:
+        time.sleep((t - self._time) / self._speed)
+      self._time = t
+      if not data:
+        # the session was closed here
+        self.closed = True
+        return b''
+      self._pending = data
+    if self._pending:
+      data, self._pending = self._pending[:size], self._pending[size:]
+      return data
+    # like the device waiting for the next command, the timer of receive() breaks this
+    time.sleep(self._timeout or 30)
+    raise socket.timeout()
+
+  def idle(self):
+    """True if nothing more was received until the next data sent
+    """
+    return not self._pending and (self._index >= len(self._events) or self._events[self._index][1] != 'recv')
+
+  def settimeout(self, timeout):
+    self._timeout = timeout
+
+  def gettimeout(self):
+    return self._timeout
+
+  def get_transport(self):
+    return self
+
+  def is_active(self):
+    return not self.closed
+
+  def set_keepalive(self, interval):
+    pass
+
+  def close(self):
+    self.closed = True
+
+
+class ReplayClient(object):
+  """stands for the paramiko connection plugin used by _connect() of network_cli
+  """
+
+  def __init__(self, shell):
+    self.ssh = self
+    self._shell = shell
+    self.force_persistence = False
+
+  def _set_log_channel(self, name):
+    pass
+
+  def _connect(self):
+    return self
+
+  def invoke_shell(self):
+    return self._shell
+
+  def close(self):
+    pass
+
+
+def bastion_ssh(bastion, control_dir, control_persist, ssh_args=None, *options):
+  """return the argument list of ssh to the jump host, user@host[:port], sharing the session in control_dir
+
+  %C of ControlPath is the hash of the jump host expanded by ssh, so all devices share the same socket.
+  """
+  user_host, _, port = bastion.partition(':')
+  args = ['ssh', '-o', 'ControlPath=%s' % os.path.join(control_dir, '%C'),
+          '-o', 'ControlPersist=%d' % control_persist, '-o', 'BatchMode=yes']
+  args.extend(shlex.split(ssh_args or ''))
+  args.extend(options)
+  if port:
+    args.extend(['-p', port])
+  args.append(user_host)
+  return args
+
+
+def bastion_proxy_command(bastion, control_dir, control_persist, ssh_args=None):
+  """return ProxyCommand to the device through the shared session of the jump host
+
+  %h and %p are the device expanded by the paramiko plugin.
+  ControlMaster=auto opens the session by itself if the master has gone.
+  """
+  args = bastion_ssh(bastion, control_dir, control_persist, ssh_args, '-o', 'ControlMaster=auto', '-q', '-W', '%h:%p')
+  return ' '.join(shlex_quote(arg) if arg != '%h:%p' else arg for arg in args)
+
+
+def start_bastion_master(bastion, control_dir, control_persist, ssh_args=None):
+  """open the shared session of the jump host unless it is running
+
+  The connections starting at the same time would each become the master with ControlMaster=auto,
+  so the master is started by one of them under the lock, and the others wait for it.
+
+  Returns:
+    tuple -- (started, error message or None)
+  """
+  fd = os.open(os.path.join(control_dir, '%s.master.lock' % bastion), os.O_RDWR | os.O_CREAT, 0o600)
+  try:
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    check = subprocess.Popen(bastion_ssh(bastion, control_dir, control_persist, ssh_args, '-O', 'check'),
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    check.communicate()
+    if check.returncode == 0:
+      return False, None
+    # -f returns after the authentication, the master stays in background for ControlPersist.
+    # the pipes would be kept open by the master, so stderr is taken through a file
+    with open(os.devnull, 'r+b') as devnull, tempfile.TemporaryFile() as err:
+      master = subprocess.Popen(bastion_ssh(bastion, control_dir, control_persist, ssh_args, '-o', 'ControlMaster=yes', '-N', '-f'),
+                                stdin=devnull, stdout=devnull, stderr=err)
+      if master.wait() != 0:
+        err.seek(0)
+        return False, to_text(err.read(), errors='surrogate_then_replace').strip() or 'ssh exited with %d' % master.returncode
+    return True, None
+  finally:
+    os.close(fd)
+
+
+def detect_family(output):
+  """return (network_os, system) from the output of show system info, network_os is None if unknown
+  """
+  match = SYSTEM_RE.search(output)
+  if not match:
+    return None, None
+  system = match.group(1)
+  for prefix, network_os in FAMILIES:
+    if system.upper().startswith(prefix.upper()):
+      return network_os, system
+  return None, system
+
+
+class Connection(NetworkCliConnection):
+  """network_cli with the receive buffer bounded in memory
+  """
+
+  def __init__(self, play_context, new_stdin, *args, **kwargs):
+    # the family is not known until set_options() reads the cache or _connect() probes the device
+    probe = play_context.network_os == AUTO_NETWORK_OS
+    if probe:
+      play_context.network_os = PROBE_NETWORK_OS
+    super(Connection, self).__init__(play_context, new_stdin, *args, **kwargs)
+    self._detect_family = probe
+
+    # file descriptor of the lock file of the channel of the jump host, see _acquire_channel()
+    self._bastion_channel = None
+
+    # True while _resume() sets up the new session, which is not resumed again
+    self._resuming = False
+
+    # CassetteWriter with record_dir, or the sessions to be replayed with replay_dir
+    self._cassette = None
+
+
+  # network_cli sets the channel of paramiko here, which is recorded with record_dir
+  @property
+  def _ssh_shell(self):
+    return self.__dict__.get('_shell')
+
+  @_ssh_shell.setter
+  def _ssh_shell(self, shell):
+    cassette = self.__dict__.get('_cassette')
+    if shell is not None and isinstance(cassette, CassetteWriter):
+      cassette.start_session()
+      shell = RecordingShell(shell, cassette)
+    self.__dict__['_shell'] = shell
+
+
+  def __getattr__(self, name):
+    # the methods of the cliconf plugin are looked up here by the json-rpc server,
+    # the device is probed before the first of them, so that the plugin of the family serves it.
+    # the others, like reset_history of CliconfBase looked up by update_play_context(), do not probe
+    if self.__dict__.get('_detect_family') and self._provided_by_cliconf(name):
+      self._connect()
+    return super(Connection, self).__getattr__(name)
+
+
+  def _provided_by_cliconf(self, name):
+    """True if name is defined by the cliconf plugins of this repo, not by CliconfBase
+    """
+    if name.startswith('_'):
+      return False
+    cliconf = self.__dict__.get('cliconf')
+    return any(name in vars(klass) for klass in type(cliconf).__mro__
+               if klass is not CliconfBase and issubclass(klass, CliconfBase))
+
+
+  def set_options(self, task_keys=None, var_options=None, direct=None):
+    super(Connection, self).set_options(task_keys=task_keys, var_options=var_options, direct=direct)
+    if self._detect_family:
+      cached = self._load_family()
+      if cached:
+        self._detect_family = False
+        self._set_family(cached['network_os'])
+
+
+  def _connect(self):
+    # cleared first, __getattr__ must not probe again while connecting
+    probe, self._detect_family = self._detect_family, False
+    if not self.connected:
+      if self.get_option('replay_dir'):
+        self._connect_replay()
+      else:
+        if self.get_option('record_dir') and self._cassette is None:
+          self._cassette = CassetteWriter(self._cassette_file('record_dir'),
+                                          dict(host=self._play_context.remote_addr, network_os=self._network_os),
+                                          [self._play_context.become_pass])
+        if self.get_option('bastion'):
+          self._connect_bastion()
+    super(Connection, self)._connect()
+    if self.get_option('keepalive_interval'):
+      self._ssh_shell.get_transport().set_keepalive(self.get_option('keepalive_interval'))
+    if probe:
+      out = to_text(self.send(command=b'show system info'), errors='surrogate_or_strict')
+      network_os, system = detect_family(out)
+      if network_os is None:
+        raise AnsibleConnectionFailure('unable to detect the family of %s from the System line of show system info: %s'
+                                       % (self._play_context.remote_addr, system))
+      self._set_family(network_os)
+      self._save_family(network_os, system)
+    return self
+
+
+  def close(self):
+    super(Connection, self).close()
+    if isinstance(self._cassette, CassetteWriter):
+      self._cassette.close()
+      self._cassette = None
+    if self._bastion_channel is not None:
+      # the lock is released with the file
+      os.close(self._bastion_channel)
+      self._bastion_channel = None
+
+
+  def send(self, command, prompt=None, answer=None, newline=True, sendonly=False, prompt_retry_check=False, check_all=False):
+    """send the command, and open the session again when it has been dropped
+
+    The modules call a cliconf method per command over json-rpc, and their outputs are returned one by one,
+    so only the command running at the drop has to be sent again, see resume_retries.
+    """
+    retries = 0 if self._resuming else self.get_option('resume_retries')
+    attempt = 0
+    while True:
+      if retries and not self._session_active():
+        # found dead by the keepalive or the idle timeout of the device, or failed to be opened again by the last command.
+        # the command has not been sent yet
+        config_mode = self._terminal.get_mode()[1]
+        self._resume('the session is closed')
+        if config_mode:
+          raise AnsibleConnectionFailure('the session was dropped in the configuration mode, %s is not sent'
+                                         % to_text(command, errors='surrogate_or_strict'))
+
+      config_mode = self._terminal.get_mode()[1]
+      try:
+        response = super(Connection, self).send(command, prompt, answer, newline, sendonly, prompt_retry_check, check_all)
+        if isinstance(self._cassette, CassetteWriter) and not sendonly:
+          self._cassette.write('prompt', self._matched_prompt)
+        return response
+      except (SessionDropped, EOFError, socket.error) as e:
+        # socket.timeout is caught in send() of network_cli, this is the closed channel
+        if attempt >= retries:
+          raise AnsibleConnectionFailure('the session was dropped while running %s: %s'
+                                         % (to_text(command, errors='surrogate_or_strict'), to_text(e)))
+        attempt += 1
+        self._resume(to_text(e))
+        if config_mode:
+          raise AnsibleConnectionFailure('the session was dropped in the configuration mode while running %s, '
+                                         'the changes not committed are lost' % to_text(command, errors='surrogate_or_strict'))
+        if not RESEND_COMMAND_RE.match(command):
+          raise AnsibleConnectionFailure('the session was dropped while running %s, it may have been run on the device '
+                                         'and is not sent again' % to_text(command, errors='surrogate_or_strict'))
+
+
+  def _session_active(self):
+    if self._ssh_shell is None:
+      return False
+    transport = self._ssh_shell.get_transport()
+    return not self._ssh_shell.closed and transport is not None and transport.is_active()
+
+
+  def _resume(self, reason):
+    """open the session again, the terminal is set up by _connect() of network_cli
+
+    The channel of the jump host is kept, close() would release it.
+    """
+    self.queue_message('warning', 'the session to %s was dropped (%s), opening it again'
+                       % (self._play_context.remote_addr, reason))
+    for obj in (self._ssh_shell, self._paramiko_conn):
+      try:
+        if obj is not None:
+          obj.close()
+      except Exception:  # pylint: disable=broad-except
+        pass
+    self._ssh_shell = None
+    self._paramiko_conn = None
+    self._connected = False
+    self._resuming = True
+    try:
+      self._connect()
+    except AnsibleConnectionFailure as e:
+      raise AnsibleConnectionFailure('failed to open the session to %s again: %s' % (self._play_context.remote_addr, e))
+    finally:
+      self._resuming = False
+
+    # the states of the cliconf plugin bound to the old session
+    on_resume = getattr(self.cliconf, 'on_session_resumed', None)
+    if on_resume:
+      on_resume()
+
+
+  def _cassette_file(self, option):
+    return os.path.join(os.path.expanduser(self.get_option(option)), '%s.jsonl' % self._play_context.remote_addr)
+
+
+  def _connect_replay(self):
+    """replay the next session in the cassette through the paramiko connection of network_cli
+    """
+    if self._cassette is None:
+      path = self._cassette_file('replay_dir')
+      try:
+        self._cassette = load_cassette(path)
+      except (IOError, OSError, ValueError) as e:
+        raise AnsibleConnectionFailure('failed to load the cassette %s: %s' % (path, e))
+    if not self._cassette:
+      raise AnsibleConnectionFailure('no more session of %s in the cassette' % self._play_context.remote_addr)
+    header, events = self._cassette.pop(0)
+    self.queue_message('vvvv', 'replaying session %d of %s recorded at %s' % (header['session'], header['host'], header['time']))
+    self._paramiko_conn = ReplayClient(ReplayShell(events, self.get_option('replay_speed')))
+
+
+  def _connect_bastion(self):
+    """get a channel of the jump host and set ProxyCommand through the shared session
+    """
+    bastion = self.get_option('bastion')
+    control_dir = os.path.expanduser(self.get_option('bastion_control_dir'))
+    if not os.path.isdir(control_dir):
+      os.makedirs(control_dir, 0o700)
+
+    if self._bastion_channel is None:
+      self._bastion_channel = self._acquire_channel(control_dir, bastion)
+
+    control_persist = self.get_option('bastion_control_persist')
+    ssh_args = self.get_option('bastion_ssh_args')
+    started, error = start_bastion_master(bastion, control_dir, control_persist, ssh_args)
+    if error:
+      raise AnsibleConnectionFailure('failed to connect to the jump host %s: %s' % (bastion, error))
+    if started:
+      self.queue_message('vvvv', 'opened the shared session of the jump host %s' % bastion)
+
+    proxy_command = bastion_proxy_command(bastion, control_dir, control_persist, ssh_args)
+    self.paramiko_conn.set_option('proxy_command', proxy_command)
+    self.queue_message('vvvv', 'connecting to %s through %s' % (self._play_context.remote_addr, bastion))
+
+
+  def _acquire_channel(self, control_dir, bastion):
+    """return the file descriptor locking one of bastion_channels slots of the jump host
+
+    The lock is held as long as the persistent connection, and released by close() or the exit of the process.
+    """
+    limit = self.get_option('bastion_channels')
+    deadline = time.time() + self.get_option('persistent_connect_timeout')
+    while True:
+      for index in range(limit):
+        fd = os.open(os.path.join(control_dir, '%s.%d.lock' % (bastion, index)), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+          fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except (IOError, OSError):
+          os.close(fd)
+          continue
+        return fd
+      if time.time() > deadline:
+        raise AnsibleConnectionFailure('all %d channels of the jump host %s are in use' % (limit, bastion))
+      time.sleep(BASTION_POLL)
+
+
+  def _family_file(self):
+    return os.path.join(os.path.expanduser(self.get_option('family_cache')), '%s.json' % self._play_context.remote_addr)
+
+
+  def _load_family(self):
+    try:
+      with open(self._family_file()) as f:
+        return json.load(f)
+    except (IOError, OSError, ValueError):
+      return None
+
+
+  def _save_family(self, network_os, system):
+    path = self._family_file()
+    try:
+      if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+      tmp = path + '.tmp'
+      with open(tmp, 'w') as f:
+        json.dump(dict(network_os=network_os, system=system, time=time.strftime('%Y-%m-%dT%H:%M:%S')), f)
+      os.rename(tmp, path)
+    except (IOError, OSError) as e:
+      self.queue_message('warning', 'failed to write the family to %s: %s' % (path, e))
+
+
+  def _set_family(self, network_os):
+    """load the terminal and cliconf plugins of the family in place of the probing ones
+    """
+    self.queue_message('vvvv', 'network_os of %s is %s' % (self._play_context.remote_addr, network_os))
+    self._play_context.network_os = network_os
+    if network_os == self._network_os:
+      return
+    self._network_os = network_os
+    self._terminal = terminal_loader.get(network_os, self)
+    self.cliconf = cliconf_loader.get(network_os, self)
+    if not self._terminal or not self.cliconf:
+      raise AnsibleConnectionFailure('network os %s is not supported' % network_os)
+    self._sub_plugin = {'type': 'cliconf', 'name': self.cliconf._load_name, 'obj': self.cliconf}
+
+
+  def _find_prompt(self, response):
+    try:
+      return super(Connection, self)._find_prompt(response)
+    finally:
+      # the terminal plugin tracks the mode from the prompts received, instead of examining the prompt again
+      on_prompt = getattr(self._terminal, 'on_prompt', None)
+      if on_prompt and self._matched_prompt is not None:
+        on_prompt(self._matched_prompt)
+
+
+  def receive(self, command=None, prompts=None, answer=None, newline=True, prompt_retry_check=False, check_all=False):
+    """receive the response of the command
+
+    Same as receive() of network_cli, except that
+      - the session is closed when the response exceeds receive_max_size, which bounds the memory.
+      - each chunk is searched with the tail of the previous data,
+        and the first error found is raised when the prompt is received, however long the output after it is.
+      - the response after the error is not kept, and only ERROR_TAIL_SIZE bytes of it are read to find the prompt.
+        the session is closed beyond that, instead of reading the rest of the output.
+    """
+    # pylint: disable=too-many-branches, too-many-statements
+    self._matched_prompt = None
+    self._matched_cmd_prompt = None
+    handled = False
+    command_prompt_matched = False
+    matched_prompt_window = window_count = 0
+
+    # set terminal regex values for command prompt and errors in response
+    self._terminal_stderr_re = self._get_terminal_std_re('terminal_stderr_re')
+    self._terminal_stdout_re = self._get_terminal_std_re('terminal_stdout_re')
+
+    cache_socket_timeout = self._ssh_shell.gettimeout()
+    command_timeout = self.get_option('persistent_command_timeout')
+    self._validate_timeout_value(command_timeout, "persistent_command_timeout")
+    if cache_socket_timeout != command_timeout:
+      self._ssh_shell.settimeout(command_timeout)
+
+    buffer_read_timeout = self.get_option('persistent_buffer_read_timeout')
+    self._validate_timeout_value(buffer_read_timeout, "persistent_buffer_read_timeout")
+
+    chunk_size = self.get_option('receive_chunk_size')
+    max_size = self.get_option('receive_max_size')
+
+    # chunks of the response, joined when the prompt is received
+    recv = []
+    received = 0
+    tail = b''
+    errored_window = None
+    # bytes received after the error
+    errored_size = 0
+
+    self._log_messages("command: %s" % command)
+    while True:
+      if command_prompt_matched and isinstance(self._ssh_shell, ReplayShell) and self._ssh_shell.idle():
+        # nothing more was received in the cassette, the buffer read timeout is not waited
+        self._ssh_shell.settimeout(cache_socket_timeout)
+        return self._command_response
+      if command_prompt_matched:
+        try:
+          signal.signal(signal.SIGALRM, self._handle_buffer_read_timeout)
+          signal.setitimer(signal.ITIMER_REAL, buffer_read_timeout)
+          data = self._ssh_shell.recv(chunk_size)
+          signal.alarm(0)
+          self._log_messages("response-%s: %s" % (window_count + 1, data))
+          # data is still received, the prompt was matched in the middle of the response
+          command_prompt_matched = False
+
+          # restart command_timeout timer
+          signal.signal(signal.SIGALRM, self._handle_command_timeout)
+          signal.alarm(command_timeout)
+
+        except AnsibleCmdRespRecv:
+          # reset socket timeout to global timeout
+          self._ssh_shell.settimeout(cache_socket_timeout)
+          return self._command_response
+      else:
+        data = self._ssh_shell.recv(chunk_size)
+        self._log_messages("response-%s: %s" % (window_count + 1, data))
+
+      # when a channel stream is closed, received data will be empty
+      if not data:
+        raise SessionDropped('the session is closed while receiving the response of %s'
+                             % to_text(command, errors='surrogate_or_strict'))
+
+      received += len(data)
+      if max_size and received > max_size:
+        # the rest of the response would be received by the next command, drop the session
+        self.close()
+        raise AnsibleConnectionFailure('response of %s exceeded receive_max_size %d bytes, the session is closed'
+                                       % (to_text(command, errors='surrogate_or_strict'), max_size))
+
+      window = self._strip(tail + data)
+      tail = (tail + data)[-WINDOW_OVERLAP:]
+      self._last_recv_window = window
+      window_count += 1
+
+      if errored_window is None:
+        recv.append(data)
+        if any(regex.search(window) for regex in self._terminal_stderr_re):
+          errored_window = window
+      else:
+        errored_size += len(data)
+
+      if prompts and not handled:
+        handled = self._handle_prompt(window, prompts, answer, newline, False, check_all)
+        matched_prompt_window = window_count
+      elif prompts and handled and prompt_retry_check and matched_prompt_window + 1 == window_count:
+        # the same prompt repeats in the next window (like a wrong enable password), the answer is wrong
+        if self._handle_prompt(window, prompts, answer, newline, prompt_retry_check, check_all):
+          raise AnsibleConnectionFailure("For matched prompt '%s', answer is not valid" % self._matched_cmd_prompt)
+
+      # raises the error if it is in this window together with the prompt
+      if self._find_prompt(window):
+        if errored_window is not None:
+          # the error was found in the former chunk
+          raise AnsibleConnectionFailure(errored_window)
+        self._last_response = b''.join(recv)
+        resp = self._strip(self._last_response)
+        self._command_response = self._sanitize(resp, command)
+        if buffer_read_timeout == 0.0:
+          # reset socket timeout to global timeout
+          self._ssh_shell.settimeout(cache_socket_timeout)
+          return self._command_response
+        command_prompt_matched = True
+      elif errored_window is not None and errored_size > ERROR_TAIL_SIZE:
+        # a long output follows the error, the session is closed instead of reading the rest of it
+        self.close()
+        raise AnsibleConnectionFailure('%s (the output after the error is not read, the session is closed)'
+                                       % to_text(errored_window, errors='surrogate_or_strict'))
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""module_utils/fujitsu_backup.py
+
+Implementation of the fujitsu_*_backup modules.
+
+The configs are stored in a content-addressed store.
+
+  <backup_dir>/objects/<sha256[:2]>/<sha256>  normalized config, written once per content
+                                              (timestamp lines, blank lines and trailing spaces removed)
+  <backup_dir>/hosts/<host>/<source>.json     history, [{time, sha256}], appended only when the hash changes
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from ansible.module_utils.basic import AnsibleModule
+
+# pylint: disable=no-name-in-module
+from ansible.module_utils.fujitsu_common import run_commands, get_timings, get_host, check_args
+from ansible.module_utils.fujitsu_common import fujitsu_argument_spec
+from ansible.module_utils.fujitsu_snapshot import normalize
+
+SOURCES = {
+  'running': 'show running-config',
+  'startup': 'show startup-config',
+}
+
+
+def object_path(backup_dir, digest):
+  return os.path.join(backup_dir, 'objects', digest[:2], digest)
+
+
+def history_path(backup_dir, host, source):
+  return os.path.join(backup_dir, 'hosts', host, '%s.json' % source)
+
+
+def load_history(backup_dir, host, source):
+  try:
+    with open(history_path(backup_dir, host, source)) as f:
+      return json.load(f)
+  except (IOError, OSError, ValueError):
+    return []
+
+
+def _write_atomic(path, data):
+  """write the file through a temporary file of its own
+
+  The hosts with the same config share the object, and the forks may write it at the same time.
+  """
+  dirname = os.path.dirname(path)
+  try:
+    os.makedirs(dirname)
+  except OSError:
+    if not os.path.isdir(dirname):
+      raise
+  fd, tmp = tempfile.mkstemp(dir=dirname, prefix='.tmp')
+  try:
+    with os.fdopen(fd, 'wb') as f:
+      f.write(data)
+    os.rename(tmp, path)
+  except Exception:
+    os.unlink(tmp)
+    raise
+
+
+def store_config(backup_dir, host, source, config, check_mode=False):
+  """store the config if its hash differs from the last one of the host
+
+  Returns:
+    dict -- { sha256: str, path: str, changed: bool, new_object: bool }
+  """
+  data = normalize(config).encode('utf-8')
+  digest = hashlib.sha256(data).hexdigest()
+  path = object_path(backup_dir, digest)
+
+  history = load_history(backup_dir, host, source)
+  changed = not history or history[-1]['sha256'] != digest
+  new_object = not os.path.exists(path)
+
+  if not check_mode:
+    # written by another fork since it was checked
+    if new_object and not os.path.exists(path):
+      _write_atomic(path, data)
+    if changed:
+      history.append({'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'sha256': digest})
+      _write_atomic(history_path(backup_dir, host, source), json.dumps(history, indent=2).encode('utf-8'))
+
+  return dict(sha256=digest, path=path, changed=changed, new_object=new_object)
+
+
+def run_module(network_os):
+  """main entry point for fujitsu_*_backup module execution
+  """
+  # pylint: disable=unused-argument
+
+  argument_spec = dict(
+    backup_dir=dict(type='path', default='./backup'),
+    sources=dict(type='list', default=['running', 'startup'], choices=list(SOURCES)),
+  )
+
+  argument_spec.update(fujitsu_argument_spec)
+
+  module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=True)
+
+  warnings = list()
+  check_args(module, warnings)
+
+  backup_dir = os.path.expanduser(module.params['backup_dir'])
+  sources = module.params['sources']
+  host = get_host(module)
+
+  # configs are large, they are compressed in the persistent connection
+  responses = run_commands(module, [SOURCES[source] for source in sources], compress=True)
+
+  backups = dict()
+  for source, config in zip(sources, responses):
+    backups[source] = store_config(backup_dir, host, source, config, check_mode=module.check_mode)
+
+  result = {
+    'changed': any(item['changed'] for item in backups.values()),
+    'host': host,
+    'backups': backups,
+    'warnings': warnings,
+    'command_timings': get_timings(module),
+  }
+
+  module.exit_json(**result)
@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""module_utils/fujitsu_command.py
+
+Implementation of the fujitsu_*_command modules.
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+import random
+import re
+import time
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.six import string_types
+
+# pylint: disable=no-name-in-module
+from ansible.module_utils.fujitsu_common import run_commands, get_timings, get_cache_stats, check_args, to_list
+from ansible.module_utils.fujitsu_common import get_host
+from ansible.module_utils.fujitsu_common import fujitsu_argument_spec
+
+
+def to_lines(stdout):
+  """split text to lines and yield it
+  """
+  for item in stdout:
+    if isinstance(item, string_types):
+      item = str(item).split('\n')
+    yield item
+
+
+def parse_commands(module, warnings):
+  """parse commands
+
+  The result is same as ComplexList(dict(command=dict(key=True), prompt=dict(), answer=dict(), timeout=dict(type='int')))
+  of module_utils/network/common/utils.py, which is not imported to keep the module light.
+  """
+  commands = list()
+  for item in to_list(module.params['commands']):
+    if isinstance(item, dict):
+      invalid = set(item) - set(['command', 'prompt', 'answer', 'timeout'])
+      if invalid:
+        module.fail_json(msg='unsupported parameters: %s' % ', '.join(sorted(invalid)))
+      if not item.get('command'):
+        module.fail_json(msg='missing required key: command')
+      timeout = item.get('timeout')
+      if timeout is not None:
+        try:
+          timeout = int(timeout)
+        except (TypeError, ValueError):
+          module.fail_json(msg='timeout must be an integer: %s' % item['command'])
+      commands.append(dict(command=item['command'], prompt=item.get('prompt'), answer=item.get('answer'), timeout=timeout))
+    else:
+      commands.append(dict(command=item, prompt=None, answer=None, timeout=None))
+
+  # check_mode restrict command except 'show'
+  if module.check_mode:
+    for item in list(commands):
+      if not item['command'].startswith('show'):
+        warnings.append('only show commands are supported when using check mode, not executing `%s`' % item['command'])
+        commands.remove(item)
+
+  return commands
+
+
+def load_conditionals(wait_for):
+  """return Conditional objects
+
+  parsing.py is imported only when wait_for is given.
+  """
+  if not wait_for:
+    return list()
+  from ansible.module_utils.network.common.parsing import Conditional
+  return [Conditional(c) for c in wait_for]
+
+
+def parse_responses(network_os, commands, responses):
+  """apply the parsers shared with the facts modules
+
+  None is set for the commands without parser.
+  """
+  from ansible.module_utils.fujitsu_parsers import parse_output
+  return [parse_output(network_os, cmd['command'], out) for cmd, out in zip(commands, responses)]
+
+
+def snapshot_responses(module, commands, responses):
+  """compare the outputs with the snapshot of compare_to, and store them as the snapshot
+
+  fujitsu_snapshot.py is imported only when snapshot or compare_to is given.
+  """
+  from ansible.module_utils.fujitsu_snapshot import load_snapshot, save_snapshot, compare_snapshot
+
+  host = get_host(module)
+  snapshot_dir = module.params['snapshot_dir']
+  names = [cmd['command'] for cmd in commands]
+
+  result = dict()
+  compare_to = module.params['compare_to']
+  if compare_to:
+    snapshot = load_snapshot(snapshot_dir, compare_to, host)
+    if snapshot is None:
+      module.fail_json(msg='snapshot %s of %s is not found in %s' % (compare_to, host, snapshot_dir))
+    diff = compare_snapshot(snapshot, names, responses)
+    result['snapshot_diff'] = diff
+    result['differs'] = any(item['changed'] for item in diff.values())
+
+  if module.params['snapshot']:
+    result['snapshot_path'] = save_snapshot(snapshot_dir, module.params['snapshot'], host, names, responses)
+
+  return result
+
+
+def referenced_indexes(conditionals):
+  """return the set of command indexes referenced by the conditionals
+
+  'result[1] contains ...' references the second command.
+  None is returned when any of them references the whole result.
+  """
+  indexes = set()
+  for item in conditionals:
+    match = re.match(r'^result\[(\d+)\]', item.key)
+    if not match:
+      return None
+    indexes.add(int(match.group(1)))
+  return indexes
+
+
+def get_delay(attempt, interval, backoff, max_interval):
+  """return seconds to sleep before the next attempt (attempt starts from 1)
+  """
+  if backoff == 'fixed':
+    return interval
+  delay = min(interval * (2 ** (attempt - 1)), max_interval)
+  if backoff == 'jitter':
+    # equal jitter, half of the delay is kept to avoid hammering the device
+    delay = delay / 2.0 + random.uniform(0, delay / 2.0)
+  return delay
+
+
+def run_module(network_os):
+  """main entry point for fujitsu_*_command module execution
+  """
+
+  argument_spec = dict(
+    commands=dict(type='list', required=True),
+    wait_for=dict(type='list', aliases=['waitfor']),
+    match=dict(default='all', choices=['all', 'any']),
+    retries=dict(default=10, type='int'),
+    interval=dict(default=1, type='float'),
+    backoff=dict(default='fixed', choices=['fixed', 'exponential', 'jitter']),
+    max_interval=dict(default=30, type='float'),
+    deadline=dict(type='float'),
+    parse=dict(type='bool', default=False),
+    cache_ttl=dict(type='int', default=0),
+    adaptive_timeout=dict(type='bool', default=False),
+    latency_store=dict(type='path', default='~/.ansible/fujitsu_latency'),
+    compress=dict(type='bool', default=False),
+    include=dict(type='list'),
+    exclude=dict(type='list'),
+    section=dict(type='list'),
+    snapshot=dict(),
+    compare_to=dict(),
+    snapshot_dir=dict(type='path', default='~/.ansible/fujitsu_snapshots')
+  )
+
+  argument_spec.update(fujitsu_argument_spec)
+
+  module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=True)
+
+  warnings = list()
+
+  commands = parse_commands(module, warnings)
+
+  result = {
+    'changed': False
+  }
+
+  check_args(module, warnings)
+  result['warnings'] = warnings
+
+  conditionals = load_conditionals(module.params['wait_for'])
+
+  retries = module.params['retries']
+  interval = module.params['interval']
+  match = module.params['match']
+  backoff = module.params['backoff']
+  max_interval = module.params['max_interval']
+  cache_ttl = module.params['cache_ttl']
+
+  # options of run_commands() shared by the retries
+  options = dict(compress=module.params['compress'])
+  if module.params['adaptive_timeout']:
+    options['latency_store'] = module.params['latency_store']
+
+  # the lines are filtered in the persistent connection, the patterns are checked here before that
+  line_filter = dict((key, module.params[key]) for key in ('include', 'exclude', 'section') if module.params[key])
+  try:
+    for pattern in sum(line_filter.values(), []):
+      re.compile(pattern)
+  except re.error as e:
+    module.fail_json(msg='invalid pattern in include, exclude or section: %s' % e)
+  if line_filter:
+    options['line_filter'] = line_filter
+
+  deadline = None
+  if module.params['deadline']:
+    deadline = time.time() + module.params['deadline']
+
+  # the first attempt runs all commands
+  responses = run_commands(module, commands, cache_ttl=cache_ttl, **options)
+  attempts = 1
+
+  while True:
+
+    for item in list(conditionals):
+      if item(responses):
+        if match == 'any':
+          conditionals = list()
+          break
+        conditionals.remove(item)
+
+    if not conditionals or attempts >= retries:
+      break
+
+    delay = get_delay(attempts, interval, backoff, max_interval)
+    if deadline is not None:
+      remaining = deadline - time.time()
+      if remaining <= 0:
+        break
+      delay = min(delay, remaining)
+    time.sleep(delay)
+
+    # re-run only the commands whose outputs are referenced by the unsatisfied conditionals
+    indexes = referenced_indexes(conditionals)
+    if indexes is None:
+      responses = run_commands(module, commands, **options)
+    else:
+      indexes = sorted(i for i in indexes if i < len(commands))
+      for index, out in zip(indexes, run_commands(module, [commands[i] for i in indexes], **options)):
+        responses[index] = out
+
+    attempts += 1
+
+  if conditionals:
+    failed_conditions = [item.raw for item in conditionals]
+    msg = 'One or more conditional statements have not been satisfied'
+    module.fail_json(msg=msg, failed_conditions=failed_conditions, attempts=attempts)
+
+  result.update({'changed': False, 'stdout': responses, 'stdout_lines': list(to_lines(responses))})
+  result['attempts'] = attempts
+
+  if module.params['parse']:
+    result['parsed'] = parse_responses(network_os, commands, responses)
+  if module.params['snapshot'] or module.params['compare_to']:
+    result.update(snapshot_responses(module, commands, responses))
+  if cache_ttl:
+    result['cache'] = get_cache_stats(module)
+  result['command_timings'] = get_timings(module)
+
+  module.exit_json(**result)
@@ -0,0 +1,415 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+# pylint: disable=protected-access
+"""module_utils/fujitsu_common.py
+
+Runtime shared by the fujitsu ipcom, si-r and sr-s modules.
+
+Only the standard library and the minimum of ansible.module_utils are imported here,
+because every module ships and imports this file.
+Heavy imports such as Conditional or NetworkConfig are deferred to
+module_utils/fujitsu_command.py and module_utils/fujitsu_config.py.
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+import base64
+import codecs
+import hashlib
+import json
+import time
+import zlib
+
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.module_utils.basic import env_fallback
+from ansible.module_utils.connection import Connection
+from ansible.module_utils.connection import ConnectionError as AnsibleConnectionError
+
+# per-family descriptors, the key is ansible_network_os
+FAMILIES = {
+  'fujitsu_ipcom': {
+    'network_os': 'fujitsu_ipcom',
+    'label': 'IPCOM',
+    # command(s) for save_when, None if save_when is not supported
+    'save_command': 'copy running-config startup-config\r',
+    # the default of save_when
+    'save_when': 'never',
+    # the word which negates a command, used by the syntax check of fujitsu_grammar.py
+    'negate': 'no',
+  },
+  'fujitsu_sir': {
+    'network_os': 'fujitsu_sir',
+    'label': 'Si-R',
+    'save_command': ['configure', 'save', 'end'],
+    # the commit does not save, save_when does
+    'save_when': 'changed',
+    'negate': 'delete',
+  },
+  'fujitsu_srs': {
+    'network_os': 'fujitsu_srs',
+    'label': 'SR-S',
+    'save_command': ['configure', 'save', 'end'],
+    'save_when': 'changed',
+    'negate': 'delete',
+  },
+}
+
+# cache for device configuration
+_DEVICE_CONFIGS = {}
+
+fujitsu_provider_spec = {
+  'host': dict(),
+  'port': dict(type='int'),
+  'username': dict(fallback=(env_fallback, ['ANSIBLE_NET_USERNAME'])),
+  'password': dict(fallback=(env_fallback, ['ANSIBLE_NET_PASSWORD']), no_log=True),
+  'ssh_keyfile': dict(fallback=(env_fallback, ['ANSIBLE_NET_SSH_KEYFILE']), type='path'),
+  'authorize': dict(fallback=(env_fallback, ['ANSIBLE_NET_AUTHORIZE']), type='bool'),
+  'auth_pass': dict(fallback=(env_fallback, ['ANSIBLE_NET_AUTH_PASS']), no_log=True),
+  'timeout': dict(type='int')
+}
+
+# required argument to create module
+fujitsu_argument_spec = {
+  'provider': dict(type='dict', options=fujitsu_provider_spec),
+}
+
+fujitsu_top_spec = {
+  'host': dict(removed_in_version=2.9),
+  'port': dict(removed_in_version=2.9, type='int'),
+  'username': dict(removed_in_version=2.9),
+  'password': dict(removed_in_version=2.9, no_log=True),
+  'ssh_keyfile': dict(removed_in_version=2.9, type='path'),
+  'authorize': dict(fallback=(env_fallback, ['ANSIBLE_NET_AUTHORIZE']), type='bool'),
+  'auth_pass': dict(removed_in_version=2.9, no_log=True),
+  'timeout': dict(removed_in_version=2.9, type='int')
+}
+
+fujitsu_argument_spec.update(fujitsu_top_spec)
+
+
+def get_family(network_os):
+  """return the descriptor of the family
+  """
+  return FAMILIES[network_os]
+
+
+def to_list(val):
+  """same as network.common.utils.to_list(), which is too heavy to import only for this
+  """
+  if isinstance(val, (list, tuple, set)):
+    return list(val)
+  elif val is not None:
+    return [val]
+  return list()
+
+
+def get_provider_argspec():
+  """return provider_argspec
+  """
+  return fujitsu_provider_spec
+
+
+def get_connection(module):
+  """Retrieves the Connection class object or cache
+  """
+  if hasattr(module, '_fujitsu_connection'):
+    return module._fujitsu_connection
+
+  capabilities = get_capabilities(module)
+  network_api = capabilities.get('network_api')
+  if network_api == 'cliconf':
+    module._fujitsu_connection = Connection(module._socket_path)
+  else:
+    module.fail_json(msg='Invalid connection type %s' % network_api)
+
+  return module._fujitsu_connection
+
+
+def get_capabilities(module):
+  """Retrieves the capabilities object or cache
+  """
+  if hasattr(module, '_fujitsu_capabilities'):
+    return module._fujitsu_capabilities
+
+  connection = Connection(module._socket_path)
+
+  # see cliconf/fujitsu_*.py
+  capabilities = connection.get_capabilities()
+
+  # cache it
+  module._fujitsu_capabilities = json.loads(capabilities)
+  return module._fujitsu_capabilities
+
+
+def get_host(module):
+  """return the address of the device, the key of the files stored per host
+  """
+  return get_capabilities(module).get('host')
+
+
+def check_args(module, warnings):
+  """check args.
+  """
+  # pylint: disable=unnecessary-pass
+  # pylint: disable=unused-argument
+  pass
+
+
+def get_config(module, flags=None, compress=False):
+  """Retrieves the current config from the device or cache
+
+  the config is compressed in the persistent connection if compress is True, see decompress()
+  """
+  flags = [] if flags is None else flags
+
+  cmd = 'show running-config '
+  cmd += ' '.join(flags)
+  cmd = cmd.strip()
+
+  try:
+    return _DEVICE_CONFIGS[cmd]
+  except KeyError:
+    connection = get_connection(module)
+    # see cliconf/fujitsu_*.py
+    out = decompress(connection.get_config(flags=flags, compress=compress))
+    cfg = to_text(out, errors='surrogate_then_replace').strip()
+    _DEVICE_CONFIGS[cmd] = cfg
+    return cfg
+
+
+def decompress(out):
+  """restore the output compressed by the cliconf plugin, see _compress() in cliconf/fujitsu_common.py
+  """
+  if isinstance(out, dict) and out.get('encoding') == 'zlib+base64':
+    return to_text(zlib.decompress(base64.b64decode(out['data'])), errors='surrogate_or_strict')
+  return out
+
+
+def iter_lines(out):
+  """yield the lines of the output without building the list of them
+
+  the compressed output is decompressed chunk by chunk, see decompress()
+  """
+  if isinstance(out, dict) and out.get('encoding') == 'zlib+base64':
+    chunks = _iter_decompressed(out['data'])
+  else:
+    chunks = [to_text(out, errors='surrogate_or_strict')]
+
+  rest = u''
+  for chunk in chunks:
+    rest += chunk
+    start = 0
+    while True:
+      end = rest.find(u'\n', start)
+      if end < 0:
+        break
+      yield rest[start:end]
+      start = end + 1
+    rest = rest[start:]
+  if rest:
+    yield rest
+
+
+def _iter_decompressed(data, chunk_size=65536):
+  decompressor = zlib.decompressobj()
+  decoder = codecs.getincrementaldecoder('utf-8')()
+  data = base64.b64decode(data)
+  for i in range(0, len(data), chunk_size):
+    yield decoder.decode(decompressor.decompress(data[i:i + chunk_size]))
+  yield decoder.decode(decompressor.flush(), final=True)
+
+
+def run_commands(module, commands, check_rc=True, cache_ttl=None, latency_store=None, compress=False, line_filter=None):
+  """execute commands on remote node.
+
+  if cache_ttl is given, the outputs of show commands are taken from the cache
+  in the persistent connection when they are younger than cache_ttl seconds, see get_cache_stats()
+
+  if latency_store is given, the latencies are recorded per host and command in the directory
+  and the timeout of each command is learned from them, unless 'timeout' is given in the command
+
+  if compress is True, large outputs are compressed in the persistent connection
+  and decompressed here, which saves the cost of the json-rpc for configs and logs
+
+  if line_filter is given, {include: [], exclude: [], section: []} of regexps,
+  only the matching lines are returned by the persistent connection, see filter_lines() in cliconf/fujitsu_common.py
+  """
+
+  responses = list()
+  connection = get_connection(module)
+
+  for cmd in to_list(commands):
+    if isinstance(cmd, dict):
+      command = cmd['command']
+      prompt = cmd['prompt']
+      answer = cmd['answer']
+      timeout = cmd.get('timeout')
+    else:
+      command = cmd
+      prompt = None
+      answer = None
+      timeout = None
+
+    kwargs = dict()
+    if timeout:
+      kwargs['timeout'] = timeout
+    if latency_store:
+      kwargs['latency_store'] = latency_store
+    if compress:
+      kwargs['compress'] = True
+    if line_filter:
+      kwargs.update(line_filter)
+
+    start = time.time()
+    try:
+      # see cliconf/fujitsu_*.py
+      if cache_ttl and prompt is None:
+        r = connection.get_cached(command, cache_ttl, **kwargs)
+        _record_cache(module, r['cached'])
+        out = r['output']
+      else:
+        out = connection.get(command, prompt, answer, **kwargs)
+    except AnsibleConnectionError as e:
+      if check_rc:
+        raise
+      out = e
+    finally:
+      _record_timing(module, command, time.time() - start)
+
+    try:
+      out = to_text(decompress(out), errors='surrogate_or_strict')
+    except UnicodeError:
+      module.fail_json(msg=u'Failed to decode output from %s: %s' % (cmd, to_text(out)))
+
+    responses.append(out)
+
+  return responses
+
+
+def hash_output(module, command, ignore_lines=None):
+  """return sha1 of the output of the command
+
+  The output is compressed in the persistent connection, and hashed line by line
+  while it is decompressed, so the whole text is never built in the module.
+  Blank lines and the lines matching any of ignore_lines (compiled regexps) are skipped.
+  """
+  ignore_lines = ignore_lines or []
+  connection = get_connection(module)
+
+  start = time.time()
+  try:
+    # see cliconf/fujitsu_*.py
+    out = connection.get(command, compress=True)
+  finally:
+    _record_timing(module, command, time.time() - start)
+
+  digest = hashlib.sha1()
+  for line in iter_lines(out):
+    line = line.rstrip()
+    if line and not any(p.search(line) for p in ignore_lines):
+      digest.update(to_bytes(line, errors='surrogate_or_strict') + b'\n')
+  return digest.hexdigest()
+
+
+def edit_config(module, commands, commit=True, replace=None, checkpoint_dir=None, on_error=None):
+  """edit config
+
+  if commit is False, commands are staged in the persistent connection
+  and committed later by commit_config()
+
+  if replace is 'config', commands is the whole config which replaces running-config
+
+  if checkpoint_dir is given, running-config before the change is stored there, see rollback_config()
+
+  on_error is abort, continue or discard, what to do when a command is rejected by the device.
+  the rejected commands are returned in errors, and aborted is set unless continue
+  """
+  connection = get_connection(module)
+
+  kwargs = dict()
+  if replace:
+    kwargs['replace'] = replace
+  if checkpoint_dir:
+    kwargs['checkpoint_dir'] = checkpoint_dir
+  if on_error:
+    kwargs['on_error'] = on_error
+
+  start = time.time()
+  try:
+    # see plugin/cliconf/fujitsu_*.py
+    return connection.edit_config(candidate=commands, commit=commit, **kwargs)
+  finally:
+    _record_timing(module, 'edit_config', time.time() - start)
+
+
+def commit_config(module, checkpoint_dir=None, on_error=None):
+  """commit the commands staged by edit_config(commit=False)
+  """
+  connection = get_connection(module)
+
+  kwargs = dict()
+  if checkpoint_dir:
+    kwargs['checkpoint_dir'] = checkpoint_dir
+  if on_error:
+    kwargs['on_error'] = on_error
+
+  start = time.time()
+  try:
+    # see plugin/cliconf/fujitsu_*.py
+    return connection.commit(**kwargs)
+  finally:
+    _record_timing(module, 'commit', time.time() - start)
+
+
+def rollback_config(module, checkpoint_dir, rollback_id=None, commit=True):
+  """restore running-config of the checkpoint stored by edit_config()
+
+  only the inverse diff is sent, the commands are returned without being sent if commit is False
+  """
+  connection = get_connection(module)
+
+  start = time.time()
+  try:
+    # see plugin/cliconf/fujitsu_*.py
+    return connection.rollback(rollback_id=rollback_id, commit=commit, checkpoint_dir=checkpoint_dir)
+  finally:
+    _record_timing(module, 'rollback', time.time() - start)
+
+
+def discard_config(module):
+  """drop the commands staged by edit_config(commit=False)
+  """
+  connection = get_connection(module)
+  return connection.discard_changes()
+
+
+def _record_timing(module, command, elapsed):
+  """record elapsed time of a command, see get_timings()
+  """
+  if not hasattr(module, '_fujitsu_timings'):
+    module._fujitsu_timings = list()
+  module._fujitsu_timings.append({'command': command, 'elapsed': round(elapsed, 6)})
+
+
+def _record_cache(module, cached):
+  """count cache hits and misses, see get_cache_stats()
+  """
+  if not hasattr(module, '_fujitsu_cache_stats'):
+    module._fujitsu_cache_stats = {'hits': 0, 'misses': 0}
+  module._fujitsu_cache_stats['hits' if cached else 'misses'] += 1
+
+
+def get_cache_stats(module):
+  """Retrieves the hit and miss counts of the show command cache used by run_commands()
+  """
+  return dict(getattr(module, '_fujitsu_cache_stats', {'hits': 0, 'misses': 0}))
+
+
+def get_timings(module):
+  """Retrieves per-command timings recorded by run_commands() and edit_config()
+
+  The list is returned as 'command_timings' in the module result,
+  and consumed by callback/fujitsu_metrics.py
+  """
+  return list(getattr(module, '_fujitsu_timings', []))
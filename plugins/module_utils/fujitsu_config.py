@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""module_utils/fujitsu_config.py
+
+Implementation of the fujitsu_*_config modules.
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+import os
+import re
+
+from ansible.module_utils.basic import AnsibleModule
+
+# pylint: disable=no-name-in-module
+from ansible.module_utils.fujitsu_common import get_family, edit_config, commit_config, run_commands, get_timings
+from ansible.module_utils.fujitsu_common import hash_output, to_list
+
+
+def save_config(module, result, family):
+  result['changed'] = True
+  if not module.check_mode:
+    run_commands(module, family['save_command'])
+  else:
+    module.warn('Configuration not saved due to check mode')
+
+
+def is_modified(module):
+  """return True if running-config differs from startup-config
+
+  The timestamps in show system info are compared first,
+  running-config is not modified if it is not newer than startup-config.
+  Otherwise, both configs are hashed without blank lines and diff_ignore_lines.
+  """
+  from ansible.module_utils.fujitsu_parsers import get_config_times
+
+  startup, running = get_config_times(run_commands(module, 'show system info')[0])
+  if startup is not None and running is not None and running <= startup:
+    return False
+
+  try:
+    ignore_lines = [re.compile(p) for p in to_list(module.params['diff_ignore_lines'])]
+  except re.error as e:
+    module.fail_json(msg='invalid pattern in diff_ignore_lines: %s' % e)
+
+  return hash_output(module, 'show running-config', ignore_lines) != hash_output(module, 'show startup-config', ignore_lines)
+
+
+def validate_config(module, family, lines):
+  """check the syntax of the lines with the grammar of the family before anything is sent
+
+  fujitsu_grammar.py is imported only when validate is true.
+  The grammars are seeds, so the lines of the commands not in the grammar are only warned.
+
+  Returns:
+    list -- the warnings of the unknown commands
+  """
+  from ansible.module_utils.fujitsu_grammar import load_grammar, validate_lines
+
+  grammar = module.params['grammar'] or '~/.ansible/plugins/grammars/%s.txt' % family['network_os']
+  try:
+    errors = validate_lines(load_grammar(os.path.expanduser(grammar)), lines, family['negate'])
+  except (IOError, OSError, ValueError) as e:
+    module.fail_json(msg='failed to load grammar %s: %s' % (grammar, e))
+
+  invalid = [e for e in errors if not e['unknown']]
+  if invalid:
+    module.fail_json(msg='%d invalid line(s), nothing is sent' % len(invalid), errors=invalid)
+
+  return ['line %d is not in the grammar, not checked: %s' % (e['index'], e['line'].strip()) for e in errors]
+
+
+def run_module(network_os):
+  """main entry point for fujitsu_*_config module execution
+  """
+
+  family = get_family(network_os)
+
+  argument_spec = dict(
+    lines=dict(type='list', aliases=['commands']),
+    src=dict(type='path'),
+    replace=dict(default='line', choices=['line', 'config']),
+    defer_commit=dict(type='bool', default=False),
+    flush=dict(type='bool', default=False),
+    checkpoint=dict(type='bool', default=False),
+    checkpoint_dir=dict(type='path', default='~/.ansible/fujitsu_checkpoints'),
+    validate=dict(type='bool', default=False),
+    grammar=dict(type='path'),
+    on_error=dict(default='abort', choices=['abort', 'continue', 'discard']),
+  )
+
+  if family['save_command']:
+    argument_spec['save_when'] = dict(choices=['always', 'never', 'modified', 'changed'], default=family['save_when'])
+    argument_spec['diff_ignore_lines'] = dict(type='list')
+
+  # defer_commit and flush are bools, so they are checked by the values below, not by the presence
+  module = AnsibleModule(
+    argument_spec=argument_spec,
+    mutually_exclusive=[['lines', 'src']],
+    required_if=[['replace', 'config', ['lines', 'src'], True]],
+    supports_check_mode=True
+  )
+
+  lines = module.params['lines']
+  replace = module.params['replace']
+
+  if module.params['src']:
+    try:
+      with open(module.params['src']) as f:
+        lines = [line for line in f.read().split('\n') if line.strip()]
+    except (IOError, OSError) as e:
+      module.fail_json(msg='failed to read %s: %s' % (module.params['src'], e))
+
+  if not (lines or module.params['src'] or module.params['flush']):
+    module.fail_json(msg='one of the following is required: lines, src, flush=true')
+
+  if module.params['defer_commit'] and module.params['flush']:
+    module.fail_json(msg='defer_commit and flush are mutually exclusive')
+
+  if replace == 'config' and (module.params['defer_commit'] or module.params['flush']):
+    module.fail_json(msg='replace=config can not be used with defer_commit or flush')
+
+  warnings = list()
+  if module.params['validate'] and lines:
+    warnings = validate_config(module, family, lines)
+
+  checkpoint_dir = module.params['checkpoint_dir'] if module.params['checkpoint'] else None
+  on_error = module.params['on_error']
+
+  result = {
+    'changed': False
+  }
+
+  if module.check_mode:
+    pass
+  elif module.params['defer_commit']:
+    if lines:
+      r = edit_config(module, lines, commit=False)
+      # nothing is sent yet, changed notifies the handler to flush, see the doc of defer_commit
+      result['changed'] = True
+      result['commands'] = lines
+      result['staged'] = r.get('staged')
+  else:
+    if replace == 'config':
+      # lines is the whole config, only the difference is sent
+      r = edit_config(module, lines, replace='config', checkpoint_dir=checkpoint_dir, on_error=on_error)
+    elif lines:
+      r = edit_config(module, lines, checkpoint_dir=checkpoint_dir, on_error=on_error)
+    else:
+      # flush only
+      r = commit_config(module, checkpoint_dir=checkpoint_dir, on_error=on_error)
+
+    errors = r.get('errors')
+    if r.get('aborted'):
+      # the lines after the failed one are not sent, and nothing is committed
+      module.fail_json(msg='line %d was rejected by the device: %s' % (errors[0]['index'], errors[0]['command']),
+                       failed_index=errors[0]['index'], errors=errors, request=r.get('request'),
+                       response=r.get('response'), discarded=on_error == 'discard')
+
+    result['changed'] = bool(r.get('request'))
+    # with replace=config, lines is the whole config
+    result['commands'] = r.get('request') if replace == 'config' else (lines or [])
+    result['updates'] = r.get('request')
+    result['result'] = r
+    if r.get('checkpoint'):
+      result['checkpoint'] = r['checkpoint']
+    if errors:
+      # on_error=continue
+      result['errors'] = errors
+
+    # "<ERROR> Need to do reset after execute the save command."
+    # これが戻ってきたときに、警告を出す
+    commit_resp = r.get('commit_response')
+    if commit_resp:
+      result['warnings'] = commit_resp
+
+  save_when = module.params.get('save_when')
+  if save_when == 'always':
+    save_config(module, result, family)
+  elif save_when == 'changed' and result['changed'] and not module.params['defer_commit']:
+    save_config(module, result, family)
+  elif save_when == 'modified' and is_modified(module):
+    save_config(module, result, family)
+
+  if warnings:
+    result['warnings'] = list(result.get('warnings') or []) + warnings
+
+  result['command_timings'] = get_timings(module)
+
+  module.exit_json(**result)
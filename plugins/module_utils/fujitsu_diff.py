@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""module_utils/fujitsu_diff.py
+
+Offline config diff functions shared by the fujitsu modules.
+
+The config is parsed by NetworkConfig(indent=1) in the same way as get_diff() of the cliconf plugins,
+so the result is the same as the one computed on the persistent connection.
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+from ansible.module_utils._text import to_text
+from ansible.module_utils.network.common.config import NetworkConfig, dumps
+
+# pylint: disable=no-name-in-module
+from ansible.module_utils.fujitsu_pool import map_jobs
+
+
+def read_config(path):
+  with open(path, 'rb') as f:
+    return to_text(f.read(), errors='surrogate_then_replace')
+
+
+def get_config_diff(candidate, running, diff_match='line', diff_ignore_lines=None):
+  """return the list of commands in candidate which are not in running
+
+  see get_diff() in cliconf/fujitsu_common.py
+  """
+  candidate_obj = NetworkConfig(indent=1, contents=candidate)
+
+  if running and diff_match != 'none':
+    running_obj = NetworkConfig(indent=1, contents=running, ignore_lines=diff_ignore_lines)
+    configdiffobjs = candidate_obj.difference(running_obj, match=diff_match)
+  else:
+    configdiffobjs = candidate_obj.items
+
+  if not configdiffobjs:
+    return []
+
+  return [line for line in dumps(configdiffobjs, 'commands').split('\n') if line.strip()]
+
+
+def diff_host(args):
+  """worker function of the process pool
+
+  args is a tuple of (host, running_path, candidate, candidate_path, diff_match, diff_ignore_lines),
+  candidate_path is used when candidate is None.
+  """
+  host, running_path, candidate, candidate_path, diff_match, diff_ignore_lines = args
+  try:
+    running = read_config(running_path)
+    if candidate is None:
+      candidate = read_config(candidate_path)
+    return host, get_config_diff(candidate, running, diff_match, diff_ignore_lines), None
+  except (IOError, OSError, ValueError) as e:
+    return host, None, to_text(e)
+
+
+def diff_hosts(jobs, workers=None):
+  """compute diff of many hosts using process pool
+
+  Returns:
+    list -- [(host, commands, error), ...] in the order of jobs
+  """
+  return map_jobs(diff_host, jobs, workers)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""module_utils/fujitsu_facts.py
+
+Implementation of the fujitsu_*_facts modules.
+The parsers of each family are in module_utils/fujitsu_parsers.py.
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.six import iteritems
+
+# pylint: disable=no-name-in-module
+from ansible.module_utils.fujitsu_common import run_commands, get_timings, check_args
+from ansible.module_utils.fujitsu_common import fujitsu_argument_spec
+
+
+class FactsBase(object):
+  """base class to store device facts
+  """
+
+  COMMANDS = list()
+
+  def __init__(self, module):
+    self.module = module
+    self.facts = dict()
+    self.responses = None
+
+  def populate(self):
+    self.responses = run_commands(self.module, commands=self.COMMANDS, check_rc=False)
+
+  def run(self, cmd):
+    return run_commands(self.module, commands=cmd, check_rc=False)
+
+
+def run_module(fact_subsets):
+  """main entry point for fujitsu_*_facts module execution
+
+  Arguments:
+    fact_subsets {dict} -- subset name to FactsBase subclass
+  """
+
+  valid_subsets = frozenset(fact_subsets.keys())
+
+  argument_spec = dict(gather_subset=dict(default=['!config'], type='list'))
+
+  argument_spec.update(fujitsu_argument_spec)
+
+  module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=True)
+
+  gather_subset = module.params['gather_subset']
+
+  runable_subsets = set()
+  exclude_subsets = set()
+
+  for subset in gather_subset:
+    if subset == 'all':
+      runable_subsets.update(valid_subsets)
+      continue
+
+    if subset.startswith('!'):
+      subset = subset[1:]
+      if subset == 'all':
+        exclude_subsets.update(valid_subsets)
+        continue
+      exclude = True
+    else:
+      exclude = False
+
+    if subset not in valid_subsets:
+      module.fail_json(msg='Bad subset')
+
+    if exclude:
+      exclude_subsets.add(subset)
+    else:
+      runable_subsets.add(subset)
+
+  if not runable_subsets:
+    runable_subsets.update(valid_subsets)
+
+  runable_subsets.difference_update(exclude_subsets)
+  runable_subsets.add('default')
+
+  facts = dict()
+  facts['gather_subset'] = list(runable_subsets)
+
+  instances = list()
+  for key in runable_subsets:
+    instances.append(fact_subsets[key](module))
+
+  for inst in instances:
+    inst.populate()
+    facts.update(inst.facts)
+
+  # prepend 'ansible_net_' to the facts key
+  ansible_facts = dict()
+  for key, value in iteritems(facts):
+    key = 'ansible_net_%s' % key
+    ansible_facts[key] = value
+
+  warnings = list()
+  check_args(module, warnings)
+
+  module.exit_json(ansible_facts=ansible_facts, warnings=warnings, command_timings=get_timings(module))
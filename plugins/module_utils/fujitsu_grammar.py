@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""module_utils/fujitsu_grammar.py
+
+Offline syntax check of config lines with the command grammar of each family.
+
+The grammar is a text file of command templates written from the help (?) of the CLI, one command per line.
+
+  # comment
+  hostname <word>
+  interface <word>
+   ip address <ipv4> <ipv4>
+   description <string>
+  lan <number> ip address <ipv4/len> <number>
+  lan <number> mode auto|100full|100half
+
+  <type> is a parameter, see TYPES. <string> takes the rest of the line.
+  a|b is a keyword which is a or b.
+  The indented templates are the commands of the mode entered by the template above them.
+  exit and end, which leave the modes, are known without the templates.
+
+The grammars are seeds with the commands in use, not the whole CLI.
+A line whose command is not in the grammar at all is reported as unknown, which is a warning,
+and a line of a known command with the wrong parameters is an error.
+
+The grammars are in plugins/grammars/ and installed to ~/.ansible/plugins/grammars/
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+import re
+
+from ansible.module_utils._text import to_text
+
+# pylint: disable=no-name-in-module
+from ansible.module_utils.fujitsu_pool import map_jobs
+
+TYPES = {
+  'word': re.compile(r'^\S+$'),
+  'number': re.compile(r'^\d+$'),
+  'ipv4': re.compile(r'^\d{1,3}(?:\.\d{1,3}){3}$'),
+  'ipv4/len': re.compile(r'^\d{1,3}(?:\.\d{1,3}){3}/\d{1,2}$'),
+  'ipv6': re.compile(r'^[0-9a-fA-F]*:[0-9a-fA-F:.]*$'),
+  'ipv6/len': re.compile(r'^[0-9a-fA-F]*:[0-9a-fA-F:.]*/\d{1,3}$'),
+  'mac': re.compile(r'^(?:[0-9a-fA-F]{2}[:-]){5}[0-9a-fA-F]{2}$|^[0-9a-fA-F]{12}$'),
+  'string': None,
+}
+
+# the commands leaving the modes, (command, the number of modes to leave or None for all)
+LEAVE_COMMANDS = {'exit': 1, 'end': None}
+
+# a quoted string is one token
+TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|\S+')
+
+# compiled grammars per path, kept in each worker process
+_GRAMMARS = dict()
+
+
+def _new_node():
+  # kw: keyword -> node, ph: [(type, node)], end: the command can end here, mode: tree of the sub mode
+  return {'kw': dict(), 'ph': list(), 'end': False, 'mode': None}
+
+
+def _add_template(tree, template):
+  """add the template to the tree, return the nodes at the end of it
+  """
+  nodes = [tree]
+  for token in template.split():
+    next_nodes = list()
+    for node in nodes:
+      for alt in token.split('|'):
+        if alt.startswith('<') and alt.endswith('>'):
+          type_ = alt[1:-1]
+          if type_ not in TYPES:
+            raise ValueError('unknown parameter type %s in: %s' % (alt, template))
+          for t, child in node['ph']:
+            if t == type_:
+              break
+          else:
+            child = _new_node()
+            node['ph'].append((type_, child))
+        else:
+          child = node['kw'].setdefault(alt, _new_node())
+        next_nodes.append(child)
+    nodes = next_nodes
+  for node in nodes:
+    node['end'] = True
+  return nodes
+
+
+def compile_grammar(text):
+  """return the tree of the command templates
+  """
+  root = _new_node()
+  # (indent, nodes of the template), the sub mode is created when an indented template follows
+  stack = [(-1, [{'mode': root}])]
+  for line in to_text(text).split('\n'):
+    if not line.strip() or line.lstrip().startswith('#'):
+      continue
+    indent = len(line) - len(line.lstrip())
+    while stack[-1][0] >= indent:
+      stack.pop()
+    parents = stack[-1][1]
+    if parents[0]['mode'] is None:
+      mode = _new_node()
+      for node in parents:
+        node['mode'] = mode
+    stack.append((indent, _add_template(parents[0]['mode'], line.strip())))
+  return root
+
+
+def load_grammar(path):
+  """return the compiled grammar of the file, cached per process
+  """
+  if path not in _GRAMMARS:
+    with open(path, 'rb') as f:
+      _GRAMMARS[path] = compile_grammar(to_text(f.read(), errors='surrogate_then_replace'))
+  return _GRAMMARS[path]
+
+
+def _match(node, tokens, i, prefix=False):
+  """return (the node matched to the tokens or None, the furthest index of the tokens reached)
+
+  if prefix is True, the tokens may end in the middle of a command
+  """
+  if i == len(tokens):
+    return (node if node['end'] or prefix else None), i
+
+  candidates = list()
+  if tokens[i] in node['kw']:
+    candidates.append(node['kw'][tokens[i]])
+  for type_, child in node['ph']:
+    if type_ == 'string':
+      if child['end'] or prefix:
+        return child, len(tokens)
+    elif TYPES[type_].match(tokens[i]):
+      candidates.append(child)
+
+  reached = i
+  for child in candidates:
+    found, index = _match(child, tokens, i + 1, prefix)
+    if found is not None:
+      return found, index
+    reached = max(reached, index)
+  return None, reached
+
+
+def match_line(tree, line, negate=None):
+  """return (node, error, the number of tokens matched) of the line in the tree of the mode
+  """
+  tokens = TOKEN_RE.findall(line)
+  if not tokens:
+    return None, 'empty line', 0
+
+  node, reached = _match(tree, tokens, 0)
+  if node is not None:
+    return node, None, reached
+
+  if negate and tokens[0] == negate and len(tokens) > 1:
+    # 'no' or 'delete' takes the head of a command
+    negated, index = _match(tree, tokens[1:], 0, prefix=True)
+    if negated is not None:
+      return negated, None, len(tokens)
+    reached = max(reached, index + 1)
+
+  if reached >= len(tokens):
+    return None, 'incomplete command', reached
+  return None, 'invalid input at "%s"' % tokens[reached], reached
+
+
+def validate_lines(grammar, lines, negate=None):
+  """check the lines with the grammar
+
+  The lines may be indented like running-config, or not indented like the commands sent one by one.
+  In both cases, a line is checked in the current mode and then in the outer modes.
+
+  Returns:
+    list -- [{ index: int, line: str, error: str, unknown: bool }], empty if all lines are valid,
+            unknown is True when the command is not in the grammar at all
+  """
+  errors = list()
+  # (indent, tree of the mode), innermost last
+  modes = [(-1, grammar)]
+  for index, line in enumerate(lines):
+    if not line.strip() or line.lstrip()[0] in ('!', '#'):
+      continue
+    indent = len(line) - len(line.lstrip())
+
+    if line.strip() in LEAVE_COMMANDS:
+      depth = LEAVE_COMMANDS[line.strip()]
+      del modes[max(1, (len(modes) - depth) if depth else 1):]
+      continue
+
+    # the tokens of the command itself, after no or delete
+    head = 1 if negate and line.split(None, 1)[0] == negate else 0
+    error = None
+    furthest = -1
+    for level in range(len(modes) - 1, -1, -1):
+      if indent and modes[level][0] >= indent:
+        continue
+      node, err, reached = match_line(modes[level][1], line.strip(), negate)
+      if node is not None:
+        del modes[level + 1:]
+        if node['mode'] is not None:
+          modes.append((indent, node['mode']))
+        error = None
+        break
+      # the error of the mode which matched the most tokens is reported
+      if reached > furthest:
+        error, furthest = err, reached
+
+    if error:
+      errors.append({'index': index, 'line': line, 'error': error, 'unknown': furthest <= head})
+  return errors
+
+
+def read_lines(path):
+  with open(path, 'rb') as f:
+    return to_text(f.read(), errors='surrogate_then_replace').split('\n')
+
+
+def validate_host(args):
+  """worker function of the process pool
+
+  args is a tuple of (host, grammar_path, negate, lines, lines_path), lines_path is used when lines is None.
+  """
+  host, grammar_path, negate, lines, lines_path = args
+  try:
+    grammar = load_grammar(grammar_path)
+    if lines is None:
+      lines = read_lines(lines_path)
+    return host, validate_lines(grammar, lines, negate), None
+  except (IOError, OSError, ValueError) as e:
+    return host, None, to_text(e)
+
+
+def validate_hosts(jobs, workers=None):
+  """check the configs of many hosts using process pool
+
+  Returns:
+    list -- [(host, errors, error), ...] in the order of jobs
+  """
+  return map_jobs(validate_host, jobs, workers)
@@ -0,0 +1,467 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""module_utils/fujitsu_parsers.py
+
+Registry of the parsers for the outputs of show commands.
+
+The parsers are shared by the fujitsu_*_facts modules and the parse option of fujitsu_*_command modules.
+Each parser takes the output text and returns a dict.
+
+  parse_output('fujitsu_srs', 'show system info', output)
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+import re
+from datetime import datetime
+
+# ansible_network_os -> list of (compiled command pattern, parser function)
+_PARSERS = dict()
+
+# the commands can be abbreviated, e.g. 'sh sys info'
+SHOW_SYSTEM_INFO = r'^sh(?:ow?)?\s+sys(?:tem)?\s+info(?:rmation)?$'
+SHOW_SYSTEM_STATUS = r'^sh(?:ow?)?\s+sys(?:tem)?\s+stat(?:us)?$'
+SHOW_INTERFACE = r'^sh(?:ow?)?\s+int(?:erfaces?)?(?:\s+\S+)?$'
+SHOW_ETHER = r'^sh(?:ow?)?\s+ether(?:\s+\S+)?$'
+
+IPV4_RE = re.compile(r"\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}\/\d{1,2}")
+
+
+def register(network_os, pattern):
+  """decorator to register the parser of the command
+  """
+  def decorator(func):
+    _PARSERS.setdefault(network_os, list()).append((re.compile(pattern), func))
+    return func
+  return decorator
+
+
+def get_parser(network_os, command):
+  """return the parser function of the command, or None
+  """
+  command = ' '.join(command.split())
+  for regex, func in _PARSERS.get(network_os, list()):
+    if regex.match(command):
+      return func
+  return None
+
+
+def parse_output(network_os, command, output):
+  """parse the output of the command
+
+  Returns:
+    dict -- parsed data, None if the command is not known or the output is empty
+  """
+  parser = get_parser(network_os, command)
+  if parser is None or not output:
+    return None
+  return parser(output)
+
+
+def get_config_times(data):
+  """return the timestamps of startup-config and running-config in the output of show system info
+
+  None is set for the timestamp which is not found or can not be parsed.
+
+  IPCOM
+    Startup-config: 2019/03/19(Tue)16:52:42
+    Running-config: 2019/03/19(Tue)16:52:42
+  Si-R, SR-S
+    Startup-config : Fri Sep  1 18:08:39 2017 config1
+    Running-config : Mon Feb  5 10:01:03 2018
+  """
+  times = []
+  for name in ('Startup-config', 'Running-config'):
+    value = _search(r'^\s*%s\s*:\s*(?P<target>\S.*)$' % name, data, re.M)
+    times.append(_parse_time(value) if value else None)
+  return tuple(times)
+
+
+def _parse_time(value):
+  match = re.match(r'(\d+/\d+/\d+)\(\w+\)(\d+:\d+:\d+)', value)
+  if match:
+    value, fmt = '%s %s' % match.groups(), '%Y/%m/%d %H:%M:%S'
+  else:
+    # the name of the config file follows the year
+    value, fmt = ' '.join(value.split()[:5]), '%a %b %d %H:%M:%S %Y'
+  try:
+    return datetime.strptime(value, fmt)
+  except ValueError:
+    return None
+
+
+def _search(pattern, data, flags=0):
+  match = re.search(pattern, data, flags)
+  if match:
+    return match.group('target')
+  return None
+
+
+def _split_blocks(data, header_re, continuation):
+  """split the output into blocks which start with the line matched to header_re
+
+  Arguments:
+    continuation {function} -- returns True if the line belongs to the current block
+  """
+  parsed = dict()
+  key = ''
+  for line in data.split('\n'):
+    if not line:
+      # blank line
+      continue
+    if line.startswith('---'):
+      # command timestamp
+      continue
+
+    match = re.match(header_re, line)
+    if match:
+      key = match.group(1)
+      parsed[key] = line
+      continue
+
+    if key and continuation(line):
+      parsed[key] += '\n%s' % line
+
+  return parsed
+
+
+#
+# fujitsu_ipcom
+#
+
+@register('fujitsu_ipcom', SHOW_SYSTEM_INFO)
+def ipcom_system_info(data):
+  """
+  ipcom# show system info
+  System information
+
+  Current-time:   2019/03/20(Wed)20:49:40
+  Startup-time:   2019/03/19(Tue)16:14:26
+  System:         IPCOM VE2-100_LS_PLUS
+  Device ID:      00VE2100LSP###NB751022XX##BG990001200172
+  Software ID:    00VE2100LSP###NB751022XX##BG990001200172
+  Firm Ver.:      V01L04 NF0001 B14  Tue, 29 Jan 2019 20:15:49 +0900
+  Security Ver.:  V4.2.00
+  Startup-config: 2019/03/19(Tue)16:52:42
+  Running-config: 2019/03/19(Tue)16:52:42
+  CPU Load:
+  5seconds:      0%
+  1minutes:      0%
+  5minutes:      0%
+  Memory usage:   41% (1.60GB/3.86GB)
+  Connections:    0% (1/100000)
+  Process:        139
+  ipcom#
+  """
+  parsed = dict()
+  patterns = (
+    ('firm', r'Firm Ver\.(?:\s*):(?:\s*)(?P<target>\S.*)'),
+    ('security', r'Security Ver\.(?:\s*):(?:\s*)(?P<target>\S.*)'),
+    ('deviceid', r'Device ID(?:\s*):(?:\s*)(?P<target>\S+)'),
+    ('softwareid', r'Software ID(?:\s*):(?:\s*)(?P<target>\S+)'),
+    ('system', r'System(?:\s*):(?:\s*)(?P<target>\S.*)'),
+  )
+  for key, pattern in patterns:
+    value = _search(pattern, data)
+    if value is not None:
+      parsed[key] = value
+  return parsed
+
+
+@register('fujitsu_ipcom', SHOW_SYSTEM_STATUS)
+def ipcom_system_status(data):
+  """
+  IPCOM EX2-1100
+  ipcom# show system status
+  System status
+
+  Current-time: 2017/07/05(Wed)08:21:56
+  Fan status: LOW
+  Intake status:NORMAL
+  Exhaust status:NORMAL
+  Cpu0 status:NORMAL
+  Fan Speed(RPM)
+  Fan0 :7848
+  Fan1 :7848
+  Fan2 :7848
+  Temperature(deg)
+  Intake :28C
+  Exhaust :33C
+  Cpu0 :44C
+  Power Consumption(W)
+  Current :100W
+  Maximum :200W
+  Hardware Information
+  PSU0 Status:NORMAL
+  Memory:4096MB
+  Hardware Option Status
+  HDD: PRESENT
+  Slot1:NO_PRESENT
+  ipcom#
+  """
+  parsed = dict()
+  patterns = (
+    ('intake', r'Intake status(?:\s*):(?:\s*)(?P<target>\S+)'),
+    ('exhaust', r'Exhaust status(?:\s*):(?:\s*)(?P<target>\S+)'),
+    ('fan1', r'Fan1(?:\s*):(?:\s*)(?P<target>\S+)'),
+    ('memory', r'Memory(?:\s*):(?:\s*)(?P<target>\S+)'),
+    ('hdd', r'HDD(?:\s*):(?:\s*)(?P<target>\S+)'),
+  )
+  for key, pattern in patterns:
+    value = _search(pattern, data)
+    if value is not None:
+      parsed[key] = value
+  return parsed
+
+
+@register('fujitsu_ipcom', SHOW_INTERFACE)
+def ipcom_interface(data):
+  """
+  ipcom# show interface
+  lan0.0     MTU:   1500  <LINKUP>
+    Type: 10gigabit ethernet
+    Description:
+    MAC address: 00:50:56:83:1a:0d
+    IP address: 172.18.0.15/16     Broadcast address: 172.18.255.255
+    IP routing: enable
+    Proxy ARP: disabled
+    IPv6 address: none
+    IPv6 routing: disable
+  ipcom#
+  """
+  parsed = dict(interfaces=dict(), all_ipv4_addresses=list(), all_ipv6_addresses=list())
+
+  blocks = _split_blocks(data, r'^(\S+)\s+MTU', lambda line: line.startswith(' '))
+  for key, value in blocks.items():
+    intf = dict()
+
+    # IPv4アドレスをすべて見つける
+    # IP address: 172.18.0.15/16     Broadcast address: 172.18.255.255
+    intf['ipv4'] = IPV4_RE.findall(value)
+    parsed['all_ipv4_addresses'].extend(intf['ipv4'])
+
+    # IPv6アドレスをすべて見つける
+    # IPv6 address: fe80::1/64
+    intf['ipv6'] = re.findall(r"IPv6 address(?:\s*):(?:\s*)(\S.*)", value)
+    parsed['all_ipv6_addresses'].extend(intf['ipv6'])
+
+    # Proxy ARP: disabled
+    value_ = _search(r"Proxy ARP(?:\s*):(?:\s*)(?P<target>\S+)", value)
+    if value_ is not None:
+      intf['proxy_arp'] = value_
+
+    # Description:
+    value_ = _search(r"Description(?:\s*):(?:\s*)(?P<target>\S+)", value)
+    if value_ is not None:
+      intf['description'] = value_
+
+    # MAC address: 00:50:56:83:1a:0d
+    value_ = _search(r"MAC address(?:\s*):(?:\s*)(?P<target>\S+)", value)
+    if value_ is not None:
+      intf['mac'] = value_
+
+    parsed['interfaces'][key] = intf
+
+  return parsed
+
+
+#
+# fujitsu_sir and fujitsu_srs
+#
+
+@register('fujitsu_sir', SHOW_SYSTEM_INFO)
+@register('fujitsu_srs', SHOW_SYSTEM_INFO)
+def sir_system_info(data):
+  """
+  AccessFJWAN-SRS# show system information
+  --- Fri Jun  8 16:07:30 2018 ---
+  Current-time : Fri Jun  8 16:07:30 2018
+  Startup-time : Mon Feb  5 10:01:03 2018
+  System : SR-S716C2
+  Serial No. : 00000105
+  ROM Ver. : 1.3
+  Firm Ver. : V13.02 NY0019 Fri Mar 26 14:03:40 JST 2010
+  Security Software Ver. : SR-S Security Software V01.02
+  Startup-config : Fri Sep  1 18:08:39 2017 config1
+  Running-config : Mon Feb  5 10:01:03 2018
+  MAC : 000b5d891100
+  Memory : 256MB
+  AccessFJWAN-SRS#
+  """
+  return {
+    'firm': _search(r'Firm Ver\.(?:\s*):(?:\s*)(?P<target>\S.*)', data),
+    'version': _search(r'Security Software Ver\.(?:\s*):(?:\s*)(?P<target>\S.*)', data),
+    'serialnum': _search(r'Serial No\.(?:\s*):(?:\s*)(?P<target>\S+)', data),
+    'model': _search(r'System(?:\s*):(?:\s*)(?P<target>\S+)', data),
+  }
+
+
+@register('fujitsu_sir', SHOW_SYSTEM_STATUS)
+def sir_system_status(data):
+  """
+  Si-R220C# show system status
+  Current-time         : Thu Jan  1 11:02:22 1970
+  Startup-time         : Thu Jan  1 09:00:00 1970
+  restart_cause        : power on
+  machine_state        : RUNNING
+  inspiration_state    : NORMAL
+  inspiration_temp     : 51 C
+  Si-R220C#
+  """
+  return {
+    'restart_cause': _search(r'restart_cause(?:\s*):(?:\s*)(?P<target>\S.*)', data),
+    'machine_state': _search(r'machine_state(?:\s*):(?:\s*)(?P<target>\S+)', data),
+    'inspiration_state': _search(r'inspiration_state(?:\s*):(?:\s*)(?P<target>\S+)', data),
+    'inspiration_temp': _search(r'inspiration_temp(?:\s*):(?:\s*)(?P<target>\S+)', data),
+  }
+
+
+@register('fujitsu_srs', SHOW_SYSTEM_STATUS)
+def srs_system_status(data):
+  """
+  AccessFJWAN-SRS# show system status
+  --- Fri Jun  8 16:37:49 2018 ---
+  Current-time         : Fri Jun  8 16:37:49 2018
+  Startup-time         : Mon Feb  5 10:01:03 2018
+  restart_cause        : power on
+  machine_state        : RUNNING
+  power0_state         : NORMAL
+  power1_state         : NO_PRESENT
+  fan0_state           : NORMAL
+  inspiration_state    : NORMAL
+  phy_state            : NORMAL
+  inspiration_temp     : 51 C
+  phy_temp             : 57 C
+  AccessFJWAN-SRS#
+  """
+  parsed = dict()
+  for power_id in (0, 1):
+    prefix = 'power' + str(power_id) + '_state'
+    parsed[prefix] = _search(prefix + r'(?:\s*):(?:\s*)(?P<target>\S+)', data)
+  return parsed
+
+
+def _ether_port(value):
+  """parse a block of show ether
+  """
+  return {
+    'status': _search(r'status(?:\s*):(?:\s*)(?P<target>\S.*)$', value, re.M),
+    'media': _search(r'media(?:\s*):(?:\s*)(?P<target>\S.*)$', value, re.M),
+    'flowcontrol': _search(r'flow control(?:\s*):(?:\s*)(?P<target>\S.*)$', value, re.M),
+    'type': _search(r'type(?:\s*):(?:\s*)(?P<target>\S.*)$', value, re.M),
+    'since': _search(r'since(?:\s*):(?:\s*)(?P<target>\S.*)$', value, re.M),
+    'config': _search(r'config(?:\s*):(?:\s*)(?P<target>\S.*)$', value, re.M),
+    'linkcontrol': _search(r'linkcontrol(?:\s*):(?:\s*)(?P<target>\S.*)$', value, re.M),
+  }
+
+
+@register('fujitsu_sir', SHOW_ETHER)
+def sir_ether(data):
+  """
+  Si-R220C# show ether
+  [LAN PORT-0]
+  status                  : auto 100M Full MDI-X
+  media                   : Metal
+  flow control            : send off, receive off
+  since                   : Jan  1 09:01:39 1970
+  Si-R220C#
+  """
+  ports = dict()
+  blocks = _split_blocks(data, r'^\[LAN (PORT-\d+)\]', lambda line: ': ' in line)
+  for key, value in blocks.items():
+    port = _ether_port(value)
+    ports[key] = dict((k, port[k]) for k in ('status', 'media', 'flowcontrol', 'since'))
+  return dict(lan_port=ports)
+
+
+@register('fujitsu_srs', SHOW_ETHER)
+def srs_ether(data):
+  """
+  AccessFJWAN-SRS# show ether
+  --- Fri Jun  8 17:48:30 2018 ---
+  [ETHER PORT-1]
+  status		: auto 1000M Full MDI
+  media		: Metal
+  flow control	: send off, receive off
+  type		: Normal
+  since		: Feb  5 10:01:09 2018
+  config		: mode(auto), mdi(auto)
+  linkcontrol	: online, recovery(-), downrelay(-)
+  AccessFJWAN-SRS#
+  """
+  ports = dict()
+  blocks = _split_blocks(data, r'^\[ETHER (\S+)\]', lambda line: ': ' in line)
+  for key, value in blocks.items():
+    ports[key] = _ether_port(value)
+  return dict(ether_port=ports)
+
+
+@register('fujitsu_sir', SHOW_INTERFACE)
+def sir_interface(data):
+  """
+  Si-R220C# show interface
+  lan0           MTU 1500    <UP,BROADCAST,RUNNING,SIMPLEX,MULTICAST>
+      Type: ethernet
+      MAC address: 00:17:42:4a:1e:8c
+      Status: up since Jan  1 09:01:39 1970
+      IP address/masklen:
+        172.20.0.200/24       Broadcast 172.20.0.255
+      ICMP redirect: enabled
+      Proxy ARP: enabled
+  Si-R220C#
+  """
+  parsed = dict(interfaces=dict(), all_ipv4_addresses=list(), all_ipv6_addresses=list())
+
+  blocks = _split_blocks(data, r'^(\S+)\s+MTU', lambda line: line.startswith(' '))
+  for key, value in blocks.items():
+    intf = dict()
+    intf['ipv4'] = IPV4_RE.findall(value)
+    parsed['all_ipv4_addresses'].extend(intf['ipv4'])
+
+    value_ = _search(r"Proxy ARP(?:\s*):(?:\s*)(?P<target>\S+)", value)
+    if value_ is not None:
+      intf['proxy_arp'] = value_
+
+    value_ = _search(r"ICMP redirect(?:\s*):(?:\s*)(?P<target>\S+)", value)
+    if value_ is not None:
+      intf['icmp_redirect'] = value_
+
+    parsed['interfaces'][key] = intf
+
+  return parsed
+
+
+@register('fujitsu_srs', SHOW_INTERFACE)
+def srs_interface(data):
+  """
+  AccessFJWAN-SRS# show interface
+  --- Fri Jun  8 17:50:21 2018 ---
+  lan0           MTU 1500    <UP,BROADCAST,RUNNING,SIMPLEX,MULTICAST>
+      Type: port vlan
+      VLAN ID is 1000
+      MAC address: 00:0b:5d:89:11:00
+      Status: up since Feb  5 10:04:35 2018
+      IP address/masklen:
+        192.168.1.200/24       Broadcast 192.168.1.255
+      Proxy ARP: enabled
+      IPv6 address/prefixlen:
+        fe80::20b:5dff:fe89:1100/64
+        999::716:1/64
+  AccessFJWAN-SRS#
+  """
+  parsed = dict(interfaces=dict(), all_ipv4_addresses=list(), all_ipv6_addresses=list())
+
+  blocks = _split_blocks(data, r'^(\S+)\s+MTU', lambda line: line.startswith(' '))
+  for key, value in blocks.items():
+    intf = dict()
+    intf['ipv4'] = IPV4_RE.findall(value)
+    parsed['all_ipv4_addresses'].extend(intf['ipv4'])
+
+    # pylint: disable=C0301
+    intf['ipv6'] = re.findall(r"\s+(\S+:\S+\/\d+)", value)
+    parsed['all_ipv6_addresses'].extend(intf['ipv6'])
+
+    parsed['interfaces'][key] = intf
+
+  return parsed
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""module_utils/fujitsu_pool.py
+
+Process pool shared by the offline modules which check many hosts, fujitsu_fleet_diff and fujitsu_validate.
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+import multiprocessing
+
+try:
+  from concurrent.futures import ProcessPoolExecutor
+  HAS_FUTURES = True
+except ImportError:
+  # python2 without futures backport
+  HAS_FUTURES = False
+
+
+def map_jobs(func, jobs, workers=None):
+  """apply func to each job using process pool, func must be a module level function
+
+  The jobs are run in this process when the pool is not worth it or not available.
+
+  Returns:
+    list -- results in the order of jobs
+  """
+  jobs = list(jobs)
+  if not HAS_FUTURES or workers == 1 or len(jobs) < 2:
+    return [func(job) for job in jobs]
+
+  # os.cpu_count() is not in python2
+  workers = workers or multiprocessing.cpu_count()
+  # chunksize reduces the round trips between the processes
+  chunksize = max(1, len(jobs) // (workers * 4))
+  with ProcessPoolExecutor(max_workers=workers) as executor:
+    return list(executor.map(func, jobs, chunksize=chunksize))
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""module_utils/fujitsu_rollback.py
+
+Implementation of the fujitsu_*_rollback modules.
+
+The checkpoints are stored by fujitsu_*_config with checkpoint=true,
+as <checkpoint_dir>/<host>/<checkpoint>.cfg, see rollback() of cliconf/fujitsu_common.py
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.connection import ConnectionError as AnsibleConnectionError
+
+# pylint: disable=no-name-in-module
+from ansible.module_utils.fujitsu_common import rollback_config, run_commands, get_timings, check_args, get_family
+from ansible.module_utils.fujitsu_common import fujitsu_argument_spec
+
+
+def run_module(network_os):
+  """main entry point for fujitsu_*_rollback module execution
+  """
+  family = get_family(network_os)
+
+  argument_spec = dict(
+    checkpoint=dict(),
+    checkpoint_dir=dict(type='path', default='~/.ansible/fujitsu_checkpoints'),
+  )
+
+  argument_spec.update(fujitsu_argument_spec)
+
+  module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=True)
+
+  warnings = list()
+  check_args(module, warnings)
+
+  try:
+    r = rollback_config(module, module.params['checkpoint_dir'],
+                        rollback_id=module.params['checkpoint'], commit=not module.check_mode)
+  except AnsibleConnectionError as e:
+    module.fail_json(msg=str(e))
+
+  if r.get('aborted'):
+    errors = r['errors']
+    module.fail_json(msg='line %d was rejected by the device: %s' % (errors[0]['index'], errors[0]['command']),
+                     failed_index=errors[0]['index'], errors=errors, checkpoint=r.get('checkpoint'))
+
+  changed = bool(r.get('request'))
+  if changed and not module.check_mode and family['save_when'] == 'changed':
+    # the commit of si-r and sr-s does not save, see save_when of fujitsu_*_config
+    run_commands(module, family['save_command'])
+
+  result = {
+    'changed': changed,
+    'checkpoint': r.get('checkpoint'),
+    'commands': r.get('request'),
+    'warnings': warnings,
+    'command_timings': get_timings(module),
+  }
+
+  commit_resp = r.get('commit_response')
+  if commit_resp:
+    result['warnings'].extend(commit_resp)
+
+  module.exit_json(**result)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""module_utils/fujitsu_snapshot.py
+
+Snapshots of command outputs for the before/after comparison of fujitsu_*_command.
+
+A snapshot is stored as <snapshot_dir>/<name>/<host>.json, {command: normalized output}.
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+import difflib
+import json
+import os
+import re
+
+# lines which differ on every run
+#   --- Mon Jun 11 21:17:57 2018 ---
+#   Current-time : Mon Jun 11 21:17:57 2018
+VOLATILE_LINES = [
+  re.compile(r'^\s*---.*---\s*$'),
+  re.compile(r'^\s*Current-time\s*:'),
+]
+
+
+def normalize(output):
+  """return the output without volatile lines and trailing spaces
+  """
+  lines = []
+  for line in output.split('\n'):
+    line = line.rstrip()
+    if not line or any(p.match(line) for p in VOLATILE_LINES):
+      continue
+    lines.append(line)
+  return '\n'.join(lines)
+
+
+def snapshot_path(snapshot_dir, name, host):
+  return os.path.join(os.path.expanduser(snapshot_dir), name, '%s.json' % host)
+
+
+def load_snapshot(snapshot_dir, name, host):
+  """return {command: normalized output}, None if the snapshot does not exist
+  """
+  try:
+    with open(snapshot_path(snapshot_dir, name, host)) as f:
+      return json.load(f)
+  except (IOError, OSError):
+    return None
+
+
+def save_snapshot(snapshot_dir, name, host, commands, responses):
+  """store the normalized outputs, the commands of the same name are overwritten
+
+  Returns:
+    str -- path of the snapshot
+  """
+  path = snapshot_path(snapshot_dir, name, host)
+  snapshot = load_snapshot(snapshot_dir, name, host) or {}
+  for command, output in zip(commands, responses):
+    snapshot[' '.join(command.split())] = normalize(output)
+
+  if not os.path.isdir(os.path.dirname(path)):
+    os.makedirs(os.path.dirname(path))
+  tmp = path + '.tmp'
+  with open(tmp, 'w') as f:
+    json.dump(snapshot, f, indent=2, sort_keys=True)
+  os.rename(tmp, path)
+  return path
+
+
+def _split(text):
+  return text.split('\n') if text else []
+
+
+def diff_lines(before, after):
+  """return the list of hunks between two lists of lines
+
+  The common head and tail are cut before SequenceMatcher,
+  because only a few lines are changed in most cases.
+
+  Returns:
+    list -- [{ line: int, removed: [], added: [] }], line is 1-origin in before
+  """
+  head = 0
+  limit = min(len(before), len(after))
+  while head < limit and before[head] == after[head]:
+    head += 1
+
+  tail = 0
+  limit -= head
+  while tail < limit and before[-1 - tail] == after[-1 - tail]:
+    tail += 1
+
+  before = before[head:len(before) - tail]
+  after = after[head:len(after) - tail]
+
+  hunks = []
+  matcher = difflib.SequenceMatcher(None, before, after, autojunk=False)
+  for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+    if tag == 'equal':
+      continue
+    hunks.append({'line': head + i1 + 1, 'removed': before[i1:i2], 'added': after[j1:j2]})
+  return hunks
+
+
+def compare_snapshot(snapshot, commands, responses):
+  """compare the outputs with the snapshot
+
+  Returns:
+    dict -- {command: {changed: bool, hunks: []}}, the commands not in the snapshot are skipped
+  """
+  result = {}
+  for command, output in zip(commands, responses):
+    key = ' '.join(command.split())
+    if key not in snapshot:
+      continue
+    before = _split(snapshot[key])
+    after = _split(normalize(output))
+    hunks = diff_lines(before, after) if before != after else []
+    result[key] = {'changed': bool(hunks), 'hunks': hunks}
+  return result
@@ -0,0 +1,196 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""fujitsu_fleet_diff module.
+
+Compute config diff of many hosts against cached running configs without device access.
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+ANSIBLE_METADATA = {'metadata_version': '0.1', 'status': ['preview'], 'supported_by': 'community'}
+
+DOCUMENTATION = """
+---
+module: fujitsu_fleet_diff
+version_added: "2.9"
+author: "Takamitsu IIDA (@takamitsu-iida)"
+short_description: Compute config diff of fujitsu devices offline
+description:
+  - Computes the commands which would be pushed to each host, comparing the intended config with the cached running config.
+  - The config is parsed in the same way as get_diff() of the fujitsu cliconf plugins.
+  - Hosts are processed in parallel by a process pool, no device access is needed.
+  - 'Run this module on the controller, e.g. with C(delegate_to: localhost) and C(run_once: true).'
+options:
+  cache_dir:
+    description:
+      - Directory of the cached running configs, one file per host named C(<host><suffix>).
+    type: path
+    required: true
+  suffix:
+    description:
+      - Suffix of the cached running config files.
+    default: .cfg
+  hosts:
+    description:
+      - The hosts to compute. All files in I(cache_dir) are used when omitted.
+    type: list
+  src:
+    description:
+      - Path of the intended config applied to every host.
+    type: path
+  lines:
+    description:
+      - The intended config as list of lines applied to every host.
+    type: list
+  intended_dir:
+    description:
+      - Directory of the intended configs per host, named C(<host><suffix>).
+    type: path
+  diff_match:
+    description:
+      - Match mode of the diff, see get_diff() of the cliconf plugins.
+    choices: ['line', 'strict', 'exact', 'none']
+    default: line
+  diff_ignore_lines:
+    description:
+      - List of regular expressions of the running config lines to be ignored.
+    type: list
+  workers:
+    description:
+      - Number of worker processes. Defaults to the number of CPUs.
+    type: int
+  show_commands:
+    description:
+      - Return the commands of each host, not only the number of lines.
+    type: bool
+    default: false
+"""
+
+EXAMPLES = r"""
+- name: compute which hosts would change
+  fujitsu_fleet_diff:
+    cache_dir: ./cache/running
+    src: ./intended/ipcom_common.cfg
+    hosts: "{{ groups['ipcom'] }}"
+  delegate_to: localhost
+  run_once: true
+  register: fleet
+
+- debug:
+    var: fleet.changed_hosts
+"""
+
+RETURN = """
+changed_hosts:
+  description: The hosts which would change
+  returned: always
+  type: list
+
+hosts:
+  description: Number of lines (and commands if show_commands) which would be pushed per host
+  returned: always
+  type: dict
+  sample: {'iida_ve2': {'lines': 2}}
+
+missing:
+  description: The hosts without cached running config or intended config
+  returned: always
+  type: list
+
+failed_hosts:
+  description: The hosts failed to compute with the reason
+  returned: always
+  type: dict
+"""
+
+import os
+
+from ansible.module_utils.basic import AnsibleModule
+
+# pylint: disable=no-name-in-module
+# see, module_utils/fujitsu_diff.py
+from ansible.module_utils.fujitsu_diff import diff_hosts, read_config
+
+
+def main():
+  """main entry point for module execution
+  """
+
+  argument_spec = dict(
+    cache_dir=dict(type='path', required=True),
+    suffix=dict(default='.cfg'),
+    hosts=dict(type='list'),
+    src=dict(type='path'),
+    lines=dict(type='list'),
+    intended_dir=dict(type='path'),
+    diff_match=dict(choices=['line', 'strict', 'exact', 'none'], default='line'),
+    diff_ignore_lines=dict(type='list'),
+    workers=dict(type='int'),
+    show_commands=dict(type='bool', default=False),
+  )
+
+  module = AnsibleModule(
+    argument_spec=argument_spec,
+    required_one_of=[['src', 'lines', 'intended_dir']],
+    mutually_exclusive=[['src', 'lines', 'intended_dir']],
+    supports_check_mode=True
+  )
+
+  cache_dir = module.params['cache_dir']
+  suffix = module.params['suffix']
+  intended_dir = module.params['intended_dir']
+
+  if not os.path.isdir(cache_dir):
+    module.fail_json(msg='cache_dir %s is not a directory' % cache_dir)
+
+  hosts = module.params['hosts']
+  if hosts is None:
+    hosts = sorted(f[:-len(suffix)] for f in os.listdir(cache_dir) if f.endswith(suffix))
+
+  # the intended config shared by all hosts
+  candidate = None
+  if module.params['src']:
+    try:
+      candidate = read_config(module.params['src'])
+    except (IOError, OSError) as e:
+      module.fail_json(msg='failed to read src: %s' % e)
+  elif module.params['lines']:
+    candidate = '\n'.join(module.params['lines'])
+
+  jobs = list()
+  missing = list()
+  for host in hosts:
+    running_path = os.path.join(cache_dir, host + suffix)
+    candidate_path = os.path.join(intended_dir, host + suffix) if intended_dir else None
+    if not os.path.isfile(running_path) or (candidate is None and not os.path.isfile(candidate_path)):
+      missing.append(host)
+      continue
+    jobs.append((host, running_path, candidate, candidate_path, module.params['diff_match'], module.params['diff_ignore_lines']))
+
+  changed_hosts = list()
+  failed_hosts = dict()
+  result_hosts = dict()
+  for host, commands, error in diff_hosts(jobs, workers=module.params['workers']):
+    if error:
+      failed_hosts[host] = error
+      continue
+    result_hosts[host] = dict(lines=len(commands))
+    if module.params['show_commands']:
+      result_hosts[host]['commands'] = commands
+    if commands:
+      changed_hosts.append(host)
+
+  result = {
+    'changed': False,
+    'changed_hosts': changed_hosts,
+    'hosts': result_hosts,
+    'missing': missing,
+    'failed_hosts': failed_hosts,
+  }
+
+  module.exit_json(**result)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,76 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""fujitsu_ipcom_backup module.
+
+Back up running-config and startup-config of the remote node to a content-addressed store.
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+ANSIBLE_METADATA = {'metadata_version': '0.1', 'status': ['preview'], 'supported_by': 'community'}
+
+DOCUMENTATION = """
+---
+module: fujitsu_ipcom_backup
+version_added: "2.9"
+author: "Takamitsu IIDA (@takamitsu-iida)"
+short_description: Back up configs of remote devices running Fujitsu IPCOM
+description:
+  - Fetches running-config and startup-config from IPCOM, and stores them in I(backup_dir).
+  - The configs are normalized, the timestamp lines, blank lines and trailing spaces are removed.
+    The normalized config is hashed and stored, it is not byte for byte the same as the config of the device.
+  - The config is written only when the hash differs from the last backup of the host.
+  - The same content is stored once, even if it is shared by several hosts or sources.
+options:
+  backup_dir:
+    description:
+      - Directory of the store. The configs are stored as C(objects/<sha256[:2]>/<sha256>),
+        and the history of each host as C(hosts/<host>/<source>.json).
+    type: path
+    default: ./backup
+  sources:
+    description:
+      - The configs to back up.
+    type: list
+    default: ['running', 'startup']
+    choices: ['running', 'startup']
+"""
+
+EXAMPLES = r"""
+- name: nightly backup
+  fujitsu_ipcom_backup:
+    backup_dir: /var/backup/fujitsu
+  register: result
+
+- name: the config of the last backup
+  debug:
+    msg: "{{ lookup('file', '/var/backup/fujitsu/objects/' + result.backups.running.sha256[:2] + '/' + result.backups.running.sha256) }}"
+"""
+
+RETURN = """
+host:
+  description: The address of the device, the name of the history directory
+  returned: always
+  type: str
+
+backups:
+  description: The hash and the path of the stored object per source, changed is true if the history was appended
+  returned: always
+  type: dict
+  sample: {'running': {'sha256': '...', 'path': '...', 'changed': true, 'new_object': true}}
+"""
+
+# pylint: disable=no-name-in-module
+# see, module_utils/fujitsu_backup.py
+from ansible.module_utils.fujitsu_backup import run_module
+
+
+def main():
+  """main entry point for module execution
+  """
+  run_module('fujitsu_ipcom')
+
+
+if __name__ == '__main__':
+  main()
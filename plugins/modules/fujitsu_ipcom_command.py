@@ -21,7 +21,104 @@ options:
   commands:
     description:
       - List of commands to send to the remote device.
+      - Each item is a command, or a dict of C(command), C(prompt), C(answer) and C(timeout).
+      - C(timeout) is the seconds to wait for the command instead of the global command timeout.
     required: True
+  wait_for:
+    description:
+      - List of conditions to evaluate against the output of the commands, e.g. C(result[0] contains LINKUP).
+      - When retrying, only the commands referenced by the unsatisfied conditions are sent again.
+    aliases: ['waitfor']
+  match:
+    description:
+      - C(all) requires all conditions in I(wait_for) to be satisfied, C(any) requires one of them.
+    default: all
+    choices: ['all', 'any']
+  retries:
+    description:
+      - Number of attempts to run the commands before the conditions are considered failed.
+    default: 10
+  interval:
+    description:
+      - Seconds to wait before the next attempt. This is the base delay for I(backoff).
+    default: 1
+  backoff:
+    description:
+      - C(fixed) waits I(interval) every time.
+      - C(exponential) doubles the wait on every attempt up to I(max_interval).
+      - C(jitter) is C(exponential) randomized between half and full of the wait.
+    default: fixed
+    choices: ['fixed', 'exponential', 'jitter']
+  max_interval:
+    description:
+      - Upper limit of the wait in seconds for I(backoff).
+    default: 30
+  deadline:
+    description:
+      - Overall seconds to keep retrying, regardless of I(retries).
+  parse:
+    description:
+      - Parse the outputs of the known commands and return them in C(parsed).
+      - C(show system info), C(show system status), C(show interface) and C(show ether) are known,
+        with the same parsers as the facts module.
+    type: bool
+    default: false
+  cache_ttl:
+    description:
+      - Seconds to reuse the outputs of show commands cached in the persistent connection.
+      - The cache is shared by the tasks on the same connection, and cleared when
+        a configuration or any command other than show is sent.
+      - 0 disables the cache.
+    type: int
+    default: 0
+  adaptive_timeout:
+    description:
+      - Record the latencies per host and command in I(latency_store),
+        and wait for each command up to twice the 99th percentile of its history.
+      - The global command timeout is used until five latencies are recorded,
+        and C(timeout) of the command takes precedence.
+    type: bool
+    default: false
+  latency_store:
+    description:
+      - Directory to store the latencies for I(adaptive_timeout).
+    type: path
+    default: ~/.ansible/fujitsu_latency
+  compress:
+    description:
+      - Compress large outputs such as configs or logs between the persistent connection and the module.
+      - This reduces the payload and the memory for multi-megabyte outputs at a small CPU cost,
+        see tools/bench_compress.py. The result is not affected.
+    type: bool
+    default: false
+  include:
+    description:
+      - List of regular expressions, only the lines of the outputs matching any of them are returned.
+      - The outputs are filtered in the persistent connection, so only the matching lines are returned to the module.
+      - I(wait_for) is evaluated against the filtered outputs.
+    type: list
+  exclude:
+    description:
+      - List of regular expressions, the lines of the outputs matching any of them are dropped.
+    type: list
+  section:
+    description:
+      - List of regular expressions, only the lines matching any of them
+        and the indented lines following them are returned.
+    type: list
+  snapshot:
+    description:
+      - Name of the snapshot to store the outputs per host and command in I(snapshot_dir).
+      - The outputs are normalized, the timestamp lines such as C(--- ... ---) and C(Current-time) are removed.
+  compare_to:
+    description:
+      - Name of the snapshot to compare the outputs with, the difference is returned in C(snapshot_diff).
+      - The commands which are not in the snapshot are not compared.
+  snapshot_dir:
+    description:
+      - Directory to store the snapshots.
+    type: path
+    default: ~/.ansible/fujitsu_snapshots
 
 author:
   - Takamitsu IIDA (@takamitsu-iida)
@@ -36,6 +133,55 @@ tasks:
         - show running-config
         - show interface
     register: output
+
+  - name: wait for the interface up, only 'show interface' is sent again
+    fujitsu_ipcom_command:
+      commands:
+        - show system info
+        - show interface
+      wait_for:
+        - result[1] contains LINKUP
+      backoff: exponential
+      deadline: 120
+
+  - name: the outputs taken in the last 60 seconds are reused
+    fujitsu_ipcom_command:
+      commands:
+        - show system info
+      cache_ttl: 60
+
+  - name: slow commands get long timeouts, dead devices fail fast
+    fujitsu_ipcom_command:
+      commands:
+        - show system info
+        - command: show running-config
+          timeout: 300
+      adaptive_timeout: true
+
+  - name: only the lines of interest are returned
+    fujitsu_ipcom_command:
+      commands:
+        - show running-config
+      include:
+        - '^lan 0 '
+      exclude:
+        - description
+
+  - name: take the snapshot before the change
+    fujitsu_ipcom_command:
+      commands:
+        - show system info
+        - show interface
+      snapshot: before
+
+  - name: compare with the snapshot after the change
+    fujitsu_ipcom_command:
+      commands:
+        - show system info
+        - show interface
+      compare_to: before
+    register: result
+    failed_when: result.differs
 '''
 
 RETURN = '''
@@ -50,107 +196,57 @@ stdout_lines:
   type: list
   returned: always
   sample: [ ['...', '...'], ['...'], ['...'] ]
-'''
-
-import time
-
-# see, module_utils/fujitsu_ipcom.py
-# pylint: disable=no-name-in-module
-from ansible.module_utils.fujitsu_ipcom import run_commands, fujitsu_ipcom_argument_spec, check_args
-
-from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.network.common.utils import ComplexList
-from ansible.module_utils.network.common.parsing import Conditional
-from ansible.module_utils.six import string_types
 
+command_timings:
+  description: Elapsed seconds of each command sent to the device, consumed by the fujitsu_metrics callback
+  type: list
+  returned: always
+  sample: [ {'command': 'show system info', 'elapsed': 0.412} ]
+
+cache:
+  description: The hit and miss counts of the show command cache
+  type: dict
+  returned: when cache_ttl is set
+  sample: {'hits': 1, 'misses': 1}
+
+snapshot_diff:
+  description: The difference from the snapshot of compare_to per command, line is 1-origin in the snapshot
+  type: dict
+  returned: when compare_to is given
+  sample: {'show interface': {'changed': true, 'hunks': [{'line': 3, 'removed': ['...'], 'added': ['...']}]}}
+
+differs:
+  description: True if any output differs from the snapshot of compare_to
+  type: bool
+  returned: when compare_to is given
+
+snapshot_path:
+  description: The path of the stored snapshot
+  type: str
+  returned: when snapshot is given
+
+attempts:
+  description: The number of attempts to satisfy wait_for
+  type: int
+  returned: always
+  sample: 1
 
-def to_lines(stdout):
-  """split text to lines and yield it
-  """
-  for item in stdout:
-    if isinstance(item, string_types):
-      item = str(item).split('\n')
-    yield item
-
-
-def parse_commands(module, warnings):
-  """parse commands
-  see Entity class document of module_utils/network/common/utils.py
-  """
-  transform = ComplexList(dict(command=dict(key=True), prompt=dict(), answer=dict()), module)
-
-  # commands as dict
-  commands = transform(module.params['commands'])
-
-  # check_mode restrict command except 'show'
-  if module.check_mode:
-    for item in list(commands):
-      if not item['command'].startswith('show'):
-        warnings.append('only show commands are supported when using check mode, not executing `%s`' % item['command'])
-        commands.remove(item)
+parsed:
+  description: The parsed outputs in the order of commands, null for the commands without parser
+  type: list
+  returned: when parse is true
+  sample: [ {'model': 'SR-S716C2', 'serialnum': '00000105', 'firm': '...', 'version': '...'}, null ]
+'''
 
-  return commands
+# pylint: disable=no-name-in-module
+# see, module_utils/fujitsu_command.py
+from ansible.module_utils.fujitsu_command import run_module
 
 
 def main():
   """main entry point for module execution
   """
-
-  argument_spec = dict(
-    commands=dict(type='list', required=True),
-    wait_for=dict(type='list', aliases=['waitfor']),
-    match=dict(default='all', choices=['all', 'any']),
-    retries=dict(default=10, type='int'),
-    interval=dict(default=1, type='int')
-  )
-
-  argument_spec.update(fujitsu_ipcom_argument_spec)
-
-  module = AnsibleModule(argument_spec=argument_spec, supports_check_mode=True)
-
-  warnings = list()
-
-  commands = parse_commands(module, warnings)
-
-  result = {
-    'changed': False
-  }
-
-  check_args(module, warnings)
-  result['warnings'] = warnings
-
-  wait_for = module.params['wait_for'] or list()
-  conditionals = [Conditional(c) for c in wait_for]
-
-  retries = module.params['retries']
-  interval = module.params['interval']
-  match = module.params['match']
-
-  while retries > 0:
-
-    responses = run_commands(module, commands)
-
-    for item in list(conditionals):
-      if item(responses):
-        if match == 'any':
-          conditionals = list()
-          break
-        conditionals.remove(item)
-
-    if not conditionals:
-      break
-
-    time.sleep(interval)
-    retries -= 1
-
-  if conditionals:
-    failed_conditions = [item.raw for item in conditionals]
-    msg = 'One or more conditional statements have not been satisfied'
-    module.fail_json(msg=msg, failed_conditions=failed_conditions)
-
-  result.update({'changed': False, 'stdout': responses, 'stdout_lines': list(to_lines(responses))})
-
-  module.exit_json(**result)
+  run_module('fujitsu_ipcom')
 
 
 if __name__ == '__main__':
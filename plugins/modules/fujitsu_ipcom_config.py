@@ -23,73 +23,147 @@ options:
     description:
       - The ordered set of commands that should be sent to the remote device.
     aliases: ['commands']
+  src:
+    description:
+      - Path of the file of the config lines, used instead of I(lines).
+    type: path
+  replace:
+    description:
+      - C(line) sends I(lines) as they are.
+      - C(config) takes I(lines) or I(src) as the whole intended config, and sends only the difference
+        from running-config, C(no) for the lines to be removed and the lines to be added, then commits once.
+    choices: ['line', 'config']
+    default: line
+  checkpoint:
+    description:
+      - Store running-config before the change as a checkpoint, which is restored by fujitsu_ipcom_rollback.
+      - The checkpoint id is returned in C(checkpoint).
+    type: bool
+    default: false
+  checkpoint_dir:
+    description:
+      - Directory of the checkpoints, stored as C(<host>/<checkpoint>.cfg).
+    type: path
+    default: ~/.ansible/fujitsu_checkpoints
+  defer_commit:
+    description:
+      - When set to true, I(lines) are staged in the persistent connection instead of being committed.
+      - The lines staged by several tasks are committed at once by a later task (or handler) with I(flush=true).
+      - The staged lines are lost when the persistent connection is closed,
+        so keep C(ANSIBLE_PERSISTENT_CONNECT_TIMEOUT) longer than the interval between the tasks.
+      - The task reports C(changed) when the lines are staged, so that it notifies the handler with I(flush=true),
+        though nothing is sent to the device yet. The device is changed by the flush task,
+        whose C(changed) tells if anything has been committed.
+      - Mutually exclusive with I(flush=true).
+    type: bool
+    default: false
+  flush:
+    description:
+      - Commit the lines staged by I(defer_commit) together with I(lines), if any.
+      - One of I(lines), I(src) or I(flush=true) is required.
+    type: bool
+    default: false
+  on_error:
+    description:
+      - What to do when a line is rejected by the device with an error.
+      - C(abort) stops sending the rest of the lines, and leaves the configuration mode without commit.
+        The task fails with the index of the rejected line in C(failed_index).
+      - C(discard) is the same as C(abort), and also discards the changes made by the lines sent before it.
+      - C(continue) sends the rest of the lines and commits them, the rejected lines are returned in C(errors).
+    choices: ['abort', 'continue', 'discard']
+    default: abort
+  validate:
+    description:
+      - Check the syntax of I(lines) or I(src) with the command grammar before anything is sent.
+      - The task fails with the invalid lines in C(errors) without device access, also in check mode.
+      - The grammars shipped in plugins/grammars are seeds with the commands in use, not the whole CLI.
+        The lines of the commands not in the grammar are not checked, they are returned in C(warnings).
+        Add the commands from the help (?) of the firmware to I(grammar) to check them.
+    type: bool
+    default: false
+  grammar:
+    description:
+      - Path of the command grammar used by I(validate).
+      - Defaults to C(~/.ansible/plugins/grammars/fujitsu_ipcom.txt) installed by installer/install.yml.
+    type: path
+  save_when:
+    description:
+      - When to save running-config to startup-config.
+      - C(always) saves every time, C(changed) saves if the task has changed the config.
+      - C(modified) saves if running-config differs from startup-config.
+        The timestamps of the configs in C(show system info) are compared first,
+        and the configs are compared only when running-config is newer.
+    choices: ['always', 'never', 'modified', 'changed']
+    default: never
+  diff_ignore_lines:
+    description:
+      - List of regular expressions, the lines matching any of them are ignored
+        when the configs are compared by I(save_when=modified).
+    type: list
 
 """
 
 EXAMPLES = r"""
+tasks:
+  - name: stage config lines
+    fujitsu_ipcom_config:
+      lines:
+        - hostname iida-ve2
+      defer_commit: true
+    notify: commit staged config
+
+  - name: save the config if it is not saved yet
+    fujitsu_ipcom_config:
+      lines:
+        - hostname iida-ve2
+      save_when: modified
+
+  - name: replace the whole config
+    fujitsu_ipcom_config:
+      src: "configs/{{ inventory_hostname }}.cfg"
+      replace: config
+      validate: true
+
+handlers:
+  - name: commit staged config
+    fujitsu_ipcom_config:
+      flush: true
 """
 
 RETURN = """
+failed_index:
+  description: The index of the line rejected by the device, the lines after it are not sent
+  returned: when a line is rejected with on_error=abort or discard
+  type: int
+
+errors:
+  description:
+    - The invalid lines found by validate, nothing is sent if any.
+    - The lines rejected by the device, [{index, command, error}], with on_error.
+  returned: failed, or when a line is rejected with on_error=continue
+  type: list
+  sample: [{'index': 3, 'line': ' mtu 15OO', 'error': 'invalid input at "15OO"', 'unknown': false}]
+
+staged:
+  description: The number of lines staged in the persistent connection
+  returned: when defer_commit is true
+  type: int
+
+checkpoint:
+  description: The checkpoint id of running-config before the change
+  returned: when checkpoint is true and the config is changed
+  type: str
 """
 
-from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.network.common.config import NetworkConfig
-
 # pylint: disable=no-name-in-module
-# see, module_utils/fujitsu_ipcom.py and plugins/cliconf/fujitsu_ipcom.py
-from ansible.module_utils.fujitsu_ipcom import edit_config, run_commands
-
-
-def save_config(module, result):
-  result['changed'] = True
-  if not module.check_mode:
-    run_commands(module, 'copy running-config startup-config\r')
-  else:
-    module.warn('Configuration not saved due to check mode')
+# see, module_utils/fujitsu_config.py and plugins/cliconf/fujitsu_ipcom.py
+from ansible.module_utils.fujitsu_config import run_module
 
 
 def main():
   """main entry point for module execution
   """
-
-  argument_spec = dict(
-    lines=dict(type='list', aliases=['commands'], required=True),
-    save_when=dict(choices=['always', 'never', 'modified', 'changed'], default='never'),
-  )
-
-  module = AnsibleModule(
-    argument_spec=argument_spec,
-    supports_check_mode=True
-  )
-
-  lines = module.params['lines']
-
-  result = {
-    'changed': False
-  }
-
-  if lines and not module.check_mode:
-    r = edit_config(module, lines)
-    result['changed'] = True
-    result['commands'] = lines
-    result['updates'] = lines
-    result['result'] = r
-
-    commit_resp = r.get('commit_response')
-    if commit_resp:
-      result['warnings'] = commit_resp
-
-  if module.params['save_when'] == 'modified':
-    output = run_commands(module, ['show running-config', 'show startup-config'])
-
-    diff_ignore_lines = module.params['diff_ignore_lines']
-    running_config = NetworkConfig(indent=1, contents=output[0], ignore_lines=diff_ignore_lines)
-    startup_config = NetworkConfig(indent=1, contents=output[1], ignore_lines=diff_ignore_lines)
-
-    if running_config.sha1 != startup_config.sha1:
-      save_config(module, result)
-
-  module.exit_json(**result)
+  run_module('fujitsu_ipcom')
 
 
 if __name__ == '__main__':
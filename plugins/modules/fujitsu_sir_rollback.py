@@ -0,0 +1,80 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""fujitsu_sir_rollback module.
+
+Restore running-config of the remote node to a checkpoint taken by fujitsu_sir_config.
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+ANSIBLE_METADATA = {'metadata_version': '0.1', 'status': ['preview'], 'supported_by': 'community'}
+
+DOCUMENTATION = """
+---
+module: fujitsu_sir_rollback
+version_added: "2.9"
+author: "Takamitsu IIDA (@takamitsu-iida)"
+short_description: Roll back configs of remote devices running Fujitsu Si-R
+description:
+  - Restores running-config of Si-R to a checkpoint stored by fujitsu_sir_config with I(checkpoint=true).
+  - Only the difference from the current running-config is sent and committed once,
+    then running-config is saved to startup-config if it has been changed.
+  - In check mode, the commands are returned without being sent.
+options:
+  checkpoint:
+    description:
+      - The checkpoint id returned by fujitsu_sir_config. The latest checkpoint of the host is used when omitted.
+  checkpoint_dir:
+    description:
+      - Directory of the checkpoints.
+    type: path
+    default: ~/.ansible/fujitsu_checkpoints
+"""
+
+EXAMPLES = r"""
+- block:
+    - name: change config with a checkpoint
+      fujitsu_sir_config:
+        lines: "{{ lines }}"
+        checkpoint: true
+      register: result
+
+    - name: verify
+      fujitsu_sir_command:
+        commands:
+          - show interface
+        wait_for:
+          - result[0] contains up
+
+  rescue:
+    - name: roll back to the checkpoint
+      fujitsu_sir_rollback:
+        checkpoint: "{{ result.checkpoint }}"
+"""
+
+RETURN = """
+checkpoint:
+  description: The checkpoint id restored
+  returned: always
+  type: str
+
+commands:
+  description: The commands sent to restore the checkpoint
+  returned: always
+  type: list
+"""
+
+# pylint: disable=no-name-in-module
+# see, module_utils/fujitsu_rollback.py and plugins/cliconf/fujitsu_sir.py
+from ansible.module_utils.fujitsu_rollback import run_module
+
+
+def main():
+  """main entry point for module execution
+  """
+  run_module('fujitsu_sir')
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,187 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""fujitsu_validate module.
+
+Check the syntax of candidate configs of many hosts with the command grammar without device access.
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+ANSIBLE_METADATA = {'metadata_version': '0.1', 'status': ['preview'], 'supported_by': 'community'}
+
+DOCUMENTATION = """
+---
+module: fujitsu_validate
+version_added: "2.9"
+author: "Takamitsu IIDA (@takamitsu-iida)"
+short_description: Check the syntax of fujitsu configs offline
+description:
+  - Checks the candidate config lines of each host with the command grammar of the family,
+    and reports the invalid lines before anything is sent to the devices.
+  - Hosts are processed in parallel by a process pool.
+  - The grammars shipped in plugins/grammars are seeds with the commands in use, not the whole CLI.
+    The lines of the commands not in the grammar are not checked, they are returned in C(unknown) of the host
+    and do not make the host invalid. Add the commands from the help (?) of the firmware to I(grammar) to check them.
+  - 'No device is accessed, so run it once on the controller with C(delegate_to: localhost) and C(run_once: true).'
+options:
+  network_os:
+    description:
+      - The family of the hosts, which selects the grammar and the word negating a command.
+    choices: ['fujitsu_ipcom', 'fujitsu_sir', 'fujitsu_srs']
+    required: true
+  grammar:
+    description:
+      - Path of the command grammar.
+      - Defaults to C(~/.ansible/plugins/grammars/<network_os>.txt) installed by installer/install.yml.
+    type: path
+  hosts:
+    description:
+      - The hosts to check. All files in I(intended_dir) are used when omitted.
+    type: list
+  intended_dir:
+    description:
+      - Directory of the candidate configs per host, named C(<host><suffix>).
+    type: path
+  suffix:
+    description:
+      - Suffix of the candidate config files.
+    default: .cfg
+  src:
+    description:
+      - Path of the candidate config, checked once as a host named C(src).
+    type: path
+  lines:
+    description:
+      - The candidate config as list of lines, checked once as a host named C(lines).
+    type: list
+  workers:
+    description:
+      - Number of worker processes. Defaults to the number of CPUs.
+    type: int
+"""
+
+EXAMPLES = r"""
+- name: check the configs before pushing them
+  fujitsu_validate:
+    network_os: fujitsu_ipcom
+    intended_dir: ./intended
+    hosts: "{{ groups['ipcom'] }}"
+  delegate_to: localhost
+  run_once: true
+  register: validated
+
+- debug:
+    var: validated.invalid_hosts
+"""
+
+RETURN = """
+invalid_hosts:
+  description: The hosts which have invalid lines, the unknown commands are not counted
+  returned: always
+  type: list
+
+hosts:
+  description: The invalid lines and the lines of the commands not in the grammar per host
+  returned: always
+  type: dict
+  sample: {'iida_ve2': {'errors': [{'index': 3, 'line': ' mtu 15OO', 'error': 'invalid input at "15OO"'}],
+                        'unknown': [{'index': 5, 'line': 'hostnam iida-ve2', 'error': 'invalid input at "hostnam"'}]}}
+
+missing:
+  description: The hosts without candidate config
+  returned: always
+  type: list
+
+failed_hosts:
+  description: The hosts failed to check with the reason
+  returned: always
+  type: dict
+"""
+
+import os
+
+from ansible.module_utils.basic import AnsibleModule
+
+# pylint: disable=no-name-in-module
+# see, module_utils/fujitsu_grammar.py
+from ansible.module_utils.fujitsu_common import get_family
+from ansible.module_utils.fujitsu_grammar import validate_hosts
+
+
+def main():
+  """main entry point for module execution
+  """
+
+  argument_spec = dict(
+    network_os=dict(required=True, choices=['fujitsu_ipcom', 'fujitsu_sir', 'fujitsu_srs']),
+    grammar=dict(type='path'),
+    hosts=dict(type='list'),
+    intended_dir=dict(type='path'),
+    suffix=dict(default='.cfg'),
+    src=dict(type='path'),
+    lines=dict(type='list'),
+    workers=dict(type='int'),
+  )
+
+  module = AnsibleModule(
+    argument_spec=argument_spec,
+    required_one_of=[['src', 'lines', 'intended_dir']],
+    mutually_exclusive=[['src', 'lines', 'intended_dir']],
+    supports_check_mode=True
+  )
+
+  family = get_family(module.params['network_os'])
+  grammar = module.params['grammar'] or os.path.expanduser('~/.ansible/plugins/grammars/%s.txt' % family['network_os'])
+  if not os.path.isfile(grammar):
+    module.fail_json(msg='grammar %s is not found' % grammar)
+
+  suffix = module.params['suffix']
+  intended_dir = module.params['intended_dir']
+
+  jobs = list()
+  missing = list()
+  if module.params['src']:
+    jobs.append(('src', grammar, family['negate'], None, module.params['src']))
+  elif module.params['lines']:
+    jobs.append(('lines', grammar, family['negate'], module.params['lines'], None))
+  else:
+    if not os.path.isdir(intended_dir):
+      module.fail_json(msg='intended_dir %s is not a directory' % intended_dir)
+    hosts = module.params['hosts']
+    if hosts is None:
+      hosts = sorted(f[:-len(suffix)] for f in os.listdir(intended_dir) if f.endswith(suffix))
+    for host in hosts:
+      path = os.path.join(intended_dir, host + suffix)
+      if not os.path.isfile(path):
+        missing.append(host)
+        continue
+      jobs.append((host, grammar, family['negate'], None, path))
+
+  invalid_hosts = list()
+  failed_hosts = dict()
+  result_hosts = dict()
+  for host, errors, error in validate_hosts(jobs, workers=module.params['workers']):
+    if error:
+      failed_hosts[host] = error
+      continue
+    if errors:
+      invalid = [dict((k, e[k]) for k in ('index', 'line', 'error')) for e in errors if not e['unknown']]
+      unknown = [dict((k, e[k]) for k in ('index', 'line', 'error')) for e in errors if e['unknown']]
+      if invalid:
+        invalid_hosts.append(host)
+      result_hosts[host] = dict(errors=invalid, unknown=unknown)
+
+  result = {
+    'changed': False,
+    'invalid_hosts': invalid_hosts,
+    'hosts': result_hosts,
+    'missing': missing,
+    'failed_hosts': failed_hosts,
+  }
+
+  module.exit_json(**result)
+
+
+if __name__ == '__main__':
+  main()
@@ -18,6 +18,13 @@ from ansible.plugins.terminal import TerminalBase
 from ansible.module_utils._text import to_text, to_bytes
 
 
+def prompt_mode(prompt):
+  """return (privileged, config_mode) of the prompt
+  """
+  prompt = (prompt or b'').strip()
+  return prompt.endswith(b'#'), b'(config' in prompt or b'(edit' in prompt
+
+
 class TerminalModule(TerminalBase):
   """TerminalModule for Fujitsu SR-S Switch
   """
@@ -31,6 +38,31 @@ class TerminalModule(TerminalBase):
     re.compile(br"Permission denied, please try again", re.M)
   ]
 
+  def __init__(self, *args, **kwargs):
+    super(TerminalModule, self).__init__(*args, **kwargs)
+
+    # (privileged, config_mode) of the last prompt received, set by on_prompt()
+    self._mode = None
+
+
+  def on_prompt(self, prompt):
+    """called by connection/fujitsu_cli.py with each prompt received
+    """
+    self._mode = prompt_mode(prompt)
+
+
+  def get_mode(self):
+    """return (privileged, config_mode) of the current prompt
+
+    The mode is tracked from the prompts received by fujitsu_cli, nothing is sent.
+    With network_cli, which does not call on_prompt(), it is derived from the current prompt.
+    This is used by on_become(), on_unbecome() and the cliconf plugin.
+    """
+    if self._mode is None:
+      return prompt_mode(self._get_prompt())
+    return self._mode
+
+
   def on_open_shell(self):
     """[on open shell]
     disable pager using 'terminal pager disable' commnad.
@@ -45,8 +77,11 @@ class TerminalModule(TerminalBase):
     """[on become]
     escalate privilege mode using 'admin' command.
     """
-    prompt = self._get_prompt()
-    if prompt is None or prompt.strip().endswith(b'#'):
+    if self._get_prompt() is None:  # terminal hang up?
+      return
+
+    privileged, _ = self.get_mode()
+    if privileged:
       return
 
     cmd = {u'command': u'admin'}
@@ -57,8 +92,9 @@ class TerminalModule(TerminalBase):
 
     try:
       self._exec_cli_command(to_bytes(json.dumps(cmd), errors='surrogate_or_strict'))
-      prompt = self._get_prompt()
-      if prompt is None or not prompt.strip().endswith(b'#'):
+      privileged, _ = self.get_mode()
+      if not privileged:
+        prompt = self._get_prompt()
         raise AnsibleConnectionFailure('failed to elevate privilege to enable mode still at prompt [%s]' % prompt)
     except AnsibleConnectionFailure as e:
       prompt = self._get_prompt()
@@ -69,15 +105,15 @@ class TerminalModule(TerminalBase):
     """[on unbecome]
     exit from privilege mode using 'exit' command.
     """
-    prompt = self._get_prompt()
-    if prompt is None:  # terminal hang up?
+    if self._get_prompt() is None:  # terminal hang up?
       return
 
-    prompt = prompt.strip()
+    privileged, config_mode = self.get_mode()
 
-    if b'(config' in prompt:
+    if config_mode:
       # endコマンドでコンフィグモードを抜ける
       self._exec_cli_command(b'end')
+      privileged, _ = self.get_mode()
 
-    if prompt.endswith(b'#'):
+    if privileged:
       self._exec_cli_command(b'exit')
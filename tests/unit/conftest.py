@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""tests/unit/conftest.py
+
+The plugins of this repo are loaded from the tree, without installer/install.yml.
+
+  python -m pytest tests/unit
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+import os
+
+import ansible.module_utils
+from ansible.plugins.loader import cliconf_loader, connection_loader, terminal_loader
+
+PLUGINS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'plugins')
+
+# ansible.module_utils.fujitsu_* are imported from plugins/module_utils, like the installed ones
+ansible.module_utils.__path__.append(os.path.join(PLUGINS_DIR, 'module_utils'))
+
+connection_loader.add_directory(os.path.join(PLUGINS_DIR, 'connection'))
+terminal_loader.add_directory(os.path.join(PLUGINS_DIR, 'terminal'))
+cliconf_loader.add_directory(os.path.join(PLUGINS_DIR, 'cliconf'))
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""tests/unit/plugins/cliconf/test_fujitsu_common.py
+
+replace_commands() of replace=config.
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', '..', 'plugins', 'cliconf'))
+from fujitsu_common import FAMILIES, replace_commands  # pylint: disable=wrong-import-position
+
+RUNNING = """hostname ipcom
+interface lan0.0
+ ip address 10.0.0.1 255.255.255.0
+ description old
+ no shutdown
+interface lan1.0
+ ip address 10.1.0.1 255.255.255.0
+ntp server 1.1.1.1
+"""
+
+CANDIDATE = """hostname ipcom
+interface lan0.0
+ ip address 10.0.0.1 255.255.255.0
+ description new
+interface lan2.0
+ ip address 10.2.0.1 255.255.255.0
+ntp server 2.2.2.2
+"""
+
+
+def test_same_config():
+  assert replace_commands(RUNNING, RUNNING) == []
+
+
+def test_replace_ipcom():
+  assert replace_commands(CANDIDATE, RUNNING, FAMILIES['fujitsu_ipcom']['negate']) == [
+    # the lines of running-config not in the candidate are removed first
+    'interface lan0.0',
+    'no description old',
+    # already negated, removed without the word
+    'shutdown',
+    'exit',
+    # the children are removed with the parent
+    'no interface lan1.0',
+    'no ntp server 1.1.1.1',
+    'interface lan0.0',
+    'description new',
+    'exit',
+    'interface lan2.0',
+    'ip address 10.2.0.1 255.255.255.0',
+    'exit',
+    'ntp server 2.2.2.2',
+  ]
+
+
+def test_replace_sir():
+  running = 'lan 0 ip address 192.168.0.1/24 3\nsysname r1\n'
+  candidate = 'lan 0 ip address 192.168.1.1/24 3\nsysname r1\n'
+  assert replace_commands(candidate, running, FAMILIES['fujitsu_sir']['negate']) == [
+    'delete lan 0 ip address 192.168.0.1/24 3',
+    'lan 0 ip address 192.168.1.1/24 3',
+  ]
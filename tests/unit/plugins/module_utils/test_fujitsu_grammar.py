@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""tests/unit/plugins/module_utils/test_fujitsu_grammar.py
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+import os
+
+import pytest
+
+from ansible.module_utils.fujitsu_grammar import compile_grammar, load_grammar, validate_lines
+
+GRAMMARS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', '..', 'plugins', 'grammars')
+
+GRAMMAR = """
+hostname <word>
+interface <word>
+ ip address <ipv4> <ipv4>
+ description <string>
+ shutdown
+lan <number> mode auto|100full|100half
+"""
+
+
+def _errors(lines, negate='no'):
+  return [(e['index'], e['error'], e['unknown']) for e in validate_lines(compile_grammar(GRAMMAR), lines, negate)]
+
+
+def test_valid_lines():
+  assert _errors(['hostname r1', 'interface lan0.0', ' ip address 10.0.0.1 255.255.255.0',
+                  ' description to the core', 'exit', 'lan 0 mode 100full']) == []
+
+
+def test_commands_sent_without_indent():
+  # the sub mode is kept until a command of the outer mode
+  assert _errors(['interface lan0.0', 'shutdown', 'description a', 'hostname r1']) == []
+
+
+def test_invalid_parameter():
+  assert _errors(['lan 0 mode 10full', 'interface lan0.0', ' ip address 10.0.0.1 x']) == [
+    (0, 'invalid input at "10full"', False),
+    (2, 'invalid input at "x"', False),
+  ]
+
+
+def test_incomplete_and_unknown():
+  assert _errors(['hostname', 'snmp enable']) == [(0, 'incomplete command', False), (1, 'invalid input at "snmp"', True)]
+
+
+def test_negate():
+  assert _errors(['no hostname', 'interface lan0.0', ' no shutdown']) == []
+  assert _errors(['delete hostname'], negate='delete') == []
+
+
+def test_sub_mode_left_with_exit():
+  assert _errors(['interface lan0.0', 'exit', ' shutdown']) == [(2, 'invalid input at "shutdown"', True)]
+
+
+def test_unknown_type():
+  with pytest.raises(ValueError):
+    compile_grammar('hostname <name>')
+
+
+@pytest.mark.parametrize('network_os', ['fujitsu_ipcom', 'fujitsu_sir', 'fujitsu_srs'])
+def test_grammars_compile(network_os):
+  assert load_grammar(os.path.join(GRAMMARS_DIR, '%s.txt' % network_os))['kw']
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""tests/unit/plugins/module_utils/test_fujitsu_parsers.py
+
+The parsers with the sample outputs in their docstrings.
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+from datetime import datetime
+
+from ansible.module_utils.fujitsu_parsers import get_config_times, get_parser, parse_output
+
+IPCOM_SYSTEM_INFO = """ipcom# show system info
+System information
+
+Current-time:   2019/03/20(Wed)20:49:40
+Startup-time:   2019/03/19(Tue)16:14:26
+System:         IPCOM VE2-100_LS_PLUS
+Device ID:      00VE2100LSP###NB751022XX##BG990001200172
+Software ID:    00VE2100LSP###NB751022XX##BG990001200172
+Firm Ver.:      V01L04 NF0001 B14  Tue, 29 Jan 2019 20:15:49 +0900
+Security Ver.:  V4.2.00
+Startup-config: 2019/03/19(Tue)16:52:42
+Running-config: 2019/03/19(Tue)16:52:43
+ipcom#"""
+
+SRS_SYSTEM_INFO = """AccessFJWAN-SRS# show system information
+--- Fri Jun  8 16:07:30 2018 ---
+Current-time : Fri Jun  8 16:07:30 2018
+Startup-time : Mon Feb  5 10:01:03 2018
+System : SR-S716C2
+Serial No. : 00000105
+ROM Ver. : 1.3
+Firm Ver. : V13.02 NY0019 Fri Mar 26 14:03:40 JST 2010
+Security Software Ver. : SR-S Security Software V01.02
+Startup-config : Fri Sep  1 18:08:39 2017 config1
+Running-config : Mon Feb  5 10:01:03 2018
+MAC : 000b5d891100
+Memory : 256MB
+AccessFJWAN-SRS#"""
+
+SIR_INTERFACE = """Si-R220C# show interface
+lan0           MTU 1500    <UP,BROADCAST,RUNNING,SIMPLEX,MULTICAST>
+    Type: ethernet
+    MAC address: 00:17:42:4a:1e:8c
+    Status: up since Jan  1 09:01:39 1970
+    IP address/masklen:
+      172.20.0.200/24       Broadcast 172.20.0.255
+    ICMP redirect: enabled
+    Proxy ARP: enabled
+lan1           MTU 1500    <UP,BROADCAST,RUNNING,SIMPLEX,MULTICAST>
+    IP address/masklen:
+      10.0.0.1/8       Broadcast 10.255.255.255
+Si-R220C#"""
+
+SRS_ETHER = """AccessFJWAN-SRS# show ether
+--- Fri Jun  8 17:48:30 2018 ---
+[ETHER PORT-1]
+status\t\t: auto 1000M Full MDI
+media\t\t: Metal
+flow control\t: send off, receive off
+type\t\t: Normal
+since\t\t: Feb  5 10:01:09 2018
+config\t\t: mode(auto), mdi(auto)
+linkcontrol\t: online, recovery(-), downrelay(-)
+AccessFJWAN-SRS#"""
+
+
+def test_get_parser_abbreviated():
+  assert get_parser('fujitsu_sir', 'sh  sys info') is get_parser('fujitsu_sir', 'show system information')
+  assert get_parser('fujitsu_sir', 'show running-config') is None
+  assert get_parser('unknown', 'show system info') is None
+
+
+def test_parse_output_empty():
+  assert parse_output('fujitsu_ipcom', 'show system info', '') is None
+
+
+def test_ipcom_system_info():
+  assert parse_output('fujitsu_ipcom', 'show system info', IPCOM_SYSTEM_INFO) == {
+    'firm': 'V01L04 NF0001 B14  Tue, 29 Jan 2019 20:15:49 +0900',
+    'security': 'V4.2.00',
+    'deviceid': '00VE2100LSP###NB751022XX##BG990001200172',
+    'softwareid': '00VE2100LSP###NB751022XX##BG990001200172',
+    'system': 'IPCOM VE2-100_LS_PLUS',
+  }
+
+
+def test_srs_system_info():
+  assert parse_output('fujitsu_srs', 'show system info', SRS_SYSTEM_INFO) == {
+    'firm': 'V13.02 NY0019 Fri Mar 26 14:03:40 JST 2010',
+    'version': 'SR-S Security Software V01.02',
+    'serialnum': '00000105',
+    'model': 'SR-S716C2',
+  }
+
+
+def test_sir_interface():
+  parsed = parse_output('fujitsu_sir', 'show interface', SIR_INTERFACE)
+  assert parsed['all_ipv4_addresses'] == ['172.20.0.200/24', '10.0.0.1/8']
+  assert parsed['interfaces']['lan0'] == {'ipv4': ['172.20.0.200/24'], 'proxy_arp': 'enabled', 'icmp_redirect': 'enabled'}
+  assert parsed['interfaces']['lan1'] == {'ipv4': ['10.0.0.1/8']}
+
+
+def test_srs_ether():
+  port = parse_output('fujitsu_srs', 'show ether', SRS_ETHER)['ether_port']['PORT-1']
+  assert port['status'] == 'auto 1000M Full MDI'
+  assert port['flowcontrol'] == 'send off, receive off'
+  assert port['linkcontrol'] == 'online, recovery(-), downrelay(-)'
+
+
+def test_get_config_times_ipcom():
+  assert get_config_times(IPCOM_SYSTEM_INFO) == (datetime(2019, 3, 19, 16, 52, 42), datetime(2019, 3, 19, 16, 52, 43))
+
+
+def test_get_config_times_srs():
+  # the name of the config file follows the year of Startup-config
+  assert get_config_times(SRS_SYSTEM_INFO) == (datetime(2017, 9, 1, 18, 8, 39), datetime(2018, 2, 5, 10, 1, 3))
+
+
+def test_get_config_times_missing():
+  assert get_config_times('Startup-config : unknown\n') == (None, None)
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""tests/unit/plugins/module_utils/test_fujitsu_snapshot.py
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+from ansible.module_utils.fujitsu_snapshot import compare_snapshot, diff_lines, normalize
+
+
+def test_diff_lines_same():
+  assert diff_lines(['a', 'b'], ['a', 'b']) == []
+
+
+def test_diff_lines_changed():
+  before = ['a', 'b', 'c', 'd', 'e']
+  after = ['a', 'B', 'c', 'd', 'e', 'f']
+  assert diff_lines(before, after) == [
+    {'line': 2, 'removed': ['b'], 'added': ['B']},
+    {'line': 6, 'removed': [], 'added': ['f']},
+  ]
+
+
+def test_diff_lines_removed():
+  assert diff_lines(['a', 'b', 'c'], ['a', 'c']) == [{'line': 2, 'removed': ['b'], 'added': []}]
+
+
+def test_compare_snapshot_ignores_volatile_lines():
+  snapshot = {'show system status': normalize('--- Fri Jun  8 16:37:49 2018 ---\nmachine_state : RUNNING\n')}
+  result = compare_snapshot(snapshot, ['show  system status', 'show ether'],
+                            ['--- Fri Jun  8 17:00:00 2018 ---\nmachine_state : RUNNING  \n', ''])
+  assert result == {'show system status': {'changed': False, 'hunks': []}}
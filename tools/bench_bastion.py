@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""tools/bench_bastion.py
+
+Benchmark the connections to many devices through a jump host, one session per device vs the shared session.
+
+  python tools/bench_bastion.py [devices [concurrency]]
+
+A stand-in jump host (paramiko ssh server) and a stand-in device (echo server) run on localhost.
+Each device connection is the ProxyCommand of the fujitsu_cli connection plugin, ssh -W to the device,
+which sends one line and waits for the echo, so the time includes the ssh handshake and the authentication.
+
+  direct  ProxyCommand without ControlMaster, the jump host authenticates every device connection
+  auto    ControlMaster=auto only, the connections starting at the same time each become the master
+  shared  start_bastion_master() and bastion_proxy_command() of connection/fujitsu_cli.py,
+          one session and a channel per device
+
+Requires paramiko and the OpenSSH client.
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+import os
+import select
+import shlex
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+try:
+  from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+  # python2 without futures backport
+  ThreadPoolExecutor = None
+
+import paramiko
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'plugins', 'connection'))
+from fujitsu_cli import bastion_proxy_command, start_bastion_master  # pylint: disable=wrong-import-position
+
+USER = 'bench'
+
+
+class Stats(object):
+
+  def __init__(self):
+    self.lock = threading.Lock()
+    self.sessions = 0
+    self.channels = 0
+    self.max_channels = 0
+    self._open = 0
+
+  def add_session(self):
+    with self.lock:
+      self.sessions += 1
+
+  def open_channel(self):
+    with self.lock:
+      self.channels += 1
+      self._open += 1
+      self.max_channels = max(self.max_channels, self._open)
+
+  def close_channel(self):
+    with self.lock:
+      self._open -= 1
+
+
+class BastionServer(paramiko.ServerInterface):
+
+  def __init__(self, client_key):
+    self.client_key = client_key
+
+  def get_allowed_auths(self, username):
+    return 'publickey'
+
+  def check_auth_publickey(self, username, key):
+    if username == USER and key == self.client_key:
+      return paramiko.AUTH_SUCCESSFUL
+    return paramiko.AUTH_FAILED
+
+  def check_channel_request(self, kind, chanid):
+    if kind == 'session':
+      return paramiko.OPEN_SUCCEEDED
+    return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+  def check_channel_direct_tcpip_request(self, chanid, origin, destination):
+    return paramiko.OPEN_SUCCEEDED
+
+
+def relay(channel, destination, stats):
+  stats.open_channel()
+  try:
+    sock = socket.create_connection(destination)
+    try:
+      while True:
+        readable = select.select([channel, sock], [], [])[0]
+        if channel in readable:
+          data = channel.recv(4096)
+          if not data:
+            break
+          sock.sendall(data)
+        if sock in readable:
+          data = sock.recv(4096)
+          if not data:
+            break
+          channel.sendall(data)
+    finally:
+      sock.close()
+  finally:
+    channel.close()
+    stats.close_channel()
+
+
+def serve_bastion(client_sock, host_key, client_key, stats):
+  """one ssh session of the jump host, relaying direct-tcpip channels (ssh -W) to the destination
+  """
+  transport = paramiko.Transport(client_sock)
+  transport.add_server_key(host_key)
+  server = BastionServer(client_key)
+  # the destinations are taken from the requests
+  requests = []
+  original = server.check_channel_direct_tcpip_request
+
+  def check_direct(chanid, origin, destination):
+    requests.append((chanid, destination))
+    return original(chanid, origin, destination)
+  server.check_channel_direct_tcpip_request = check_direct
+
+  try:
+    transport.start_server(server=server)
+  except (paramiko.SSHException, EOFError):
+    return
+  stats.add_session()
+  while transport.is_active():
+    channel = transport.accept(1)
+    if channel is None:
+      continue
+    destination = dict(requests).get(channel.get_id())
+    if destination is None:
+      # session channel of the control master, nothing to do
+      continue
+    threading.Thread(target=relay, args=(channel, destination, stats), daemon=True).start()
+
+
+def listen(handler):
+  sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+  sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+  sock.bind(('127.0.0.1', 0))
+  sock.listen(128)
+
+  def accept():
+    while True:
+      client, _ = sock.accept()
+      threading.Thread(target=handler, args=(client,), daemon=True).start()
+  threading.Thread(target=accept, daemon=True).start()
+  return sock.getsockname()[1]
+
+
+def echo(client):
+  # stand-in device
+  with client:
+    while True:
+      data = client.recv(4096)
+      if not data:
+        break
+      client.sendall(data)
+
+
+def connect_device(proxy_command, device_port, master=None):
+  """run ProxyCommand like the paramiko plugin, return seconds until the device answers
+
+  master is the arguments of start_bastion_master() called before, like the connection plugin.
+  """
+  command = proxy_command.replace('%h', '127.0.0.1').replace('%p', str(device_port))
+  start = time.time()
+  if master:
+    error = start_bastion_master(*master)[1]
+    assert error is None, error
+  proc = subprocess.Popen(shlex.split(command), stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+  proc.stdin.write(b'hello\n')
+  proc.stdin.flush()
+  line = proc.stdout.readline()
+  elapsed = time.time() - start
+  proc.stdin.close()
+  proc.wait()
+  assert line == b'hello\n', line
+  return elapsed
+
+
+def run(proxy_command, device_port, devices, concurrency, master=None):
+  start = time.time()
+  if concurrency == 1 or ThreadPoolExecutor is None:
+    latencies = [connect_device(proxy_command, device_port, master) for _ in range(devices)]
+  else:
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+      latencies = list(executor.map(lambda _: connect_device(proxy_command, device_port, master), range(devices)))
+  latencies.sort()
+  return time.time() - start, latencies[len(latencies) // 2], latencies[-1]
+
+
+def main():
+  devices = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+  concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+  work_dir = tempfile.mkdtemp()
+  try:
+    host_key = paramiko.RSAKey.generate(2048)
+    client_key = paramiko.RSAKey.generate(2048)
+    key_file = os.path.join(work_dir, 'id_rsa')
+    client_key.write_private_key_file(key_file)
+
+    device_port = listen(echo)
+
+    print('%-8s  %11s  %8s  %9s  %9s  %8s  %8s  %12s' % (
+      'mode', 'concurrency', 'devices', 'total_ms', 'p50_ms', 'max_ms', 'sessions', 'max_channels'))
+    # the stand-in jump host is not in known_hosts
+    ssh_args = '-i %s -o StrictHostKeyChecking=no -o UserKnownHostsFile=/dev/null -o LogLevel=ERROR' % key_file
+
+    for mode in ('direct', 'auto', 'shared'):
+      for workers in sorted(set([1, concurrency])):
+        stats = Stats()
+        bastion_port = listen(lambda sock, s=stats: serve_bastion(sock, host_key, client_key, s))
+        bastion = '%s@127.0.0.1:%d' % (USER, bastion_port)
+        control_dir = os.path.join(work_dir, 'control_%s_%d' % (mode, workers))
+        os.mkdir(control_dir)
+
+        proxy_command = bastion_proxy_command(bastion, control_dir, 60, ssh_args)
+        master = None
+        if mode == 'direct':
+          proxy_command = proxy_command.replace('ControlMaster=auto', 'ControlMaster=no')
+        elif mode == 'shared':
+          master = (bastion, control_dir, 60, ssh_args)
+
+        total, p50, worst = run(proxy_command, device_port, devices, workers, master)
+        print('%-8s  %11d  %8d  %9.1f  %9.1f  %8.1f  %8d  %12d' % (
+          mode, workers, devices, total * 1000, p50 * 1000, worst * 1000, stats.sessions, stats.max_channels))
+
+        # stop the control master
+        subprocess.call(shlex.split(proxy_command.replace('-q -W %h:%p', '-O exit')),
+                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+  finally:
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+  main()
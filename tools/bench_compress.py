@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""tools/bench_compress.py
+
+Benchmark the compressed transport of large outputs from the persistent connection to the module.
+
+  python tools/bench_compress.py [size_mb ...]
+
+The json-rpc response is serialized by the persistent connection, sent over a unix socket,
+and deserialized by the module, in the same way as ansible.module_utils.connection.
+The output is a synthetic running-config of the given size.
+CPU time is measured on both ends, and the peak memory is taken by tracemalloc.
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+import base64
+import json
+import socket
+import sys
+import threading
+import time
+import tracemalloc
+import zlib
+
+from ansible.module_utils.connection import recv_data, send_data
+
+REPEAT = 5
+
+# same as cliconf/fujitsu_common.py
+COMPRESS_MIN_SIZE = 8192
+COMPRESS_LEVEL = 1
+
+
+def make_output(size):
+  lines = []
+  total = 0
+  i = 0
+  while total < size:
+    line = 'lan %d ip address 192.168.%d.%d/24 3\nlan %d description "port %d \\"uplink\\""\n' % (
+      i, (i // 256) % 256, i % 256, i, i)
+    lines.append(line)
+    total += len(line)
+    i += 1
+  return ''.join(lines)[:size]
+
+
+def compress(out):
+  if len(out) < COMPRESS_MIN_SIZE:
+    return out
+  data = zlib.compress(out.encode('utf-8'), COMPRESS_LEVEL)
+  return dict(encoding='zlib+base64', data=base64.b64encode(data).decode('ascii'))
+
+
+def decompress(out):
+  if isinstance(out, dict) and out.get('encoding') == 'zlib+base64':
+    return zlib.decompress(base64.b64decode(out['data'])).decode('utf-8')
+  return out
+
+
+def roundtrip(output, use_compress):
+  """return (server cpu, client cpu, payload bytes, peak memory)
+  """
+  server, client = socket.socketpair()
+  cpu = {}
+
+  def serve():
+    start = time.process_time()
+    result = compress(output) if use_compress else output
+    data = json.dumps({'jsonrpc': '2.0', 'id': 1, 'result': result})
+    cpu['server'] = time.process_time() - start
+    cpu['payload'] = len(data)
+    send_data(server, data.encode('utf-8'))
+
+  tracemalloc.start()
+  thread = threading.Thread(target=serve)
+  thread.start()
+  data = recv_data(client)
+  start = time.process_time()
+  response = json.loads(data.decode('utf-8'))
+  out = decompress(response['result'])
+  client_cpu = time.process_time() - start
+  thread.join()
+  peak = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+
+  server.close()
+  client.close()
+  assert out == output
+  return cpu['server'], client_cpu, cpu['payload'], peak
+
+
+def bench(size):
+  output = make_output(size)
+  rows = []
+  for use_compress in (False, True):
+    samples = sorted(roundtrip(output, use_compress) for _ in range(REPEAT))
+    server_cpu, client_cpu, payload, peak = samples[len(samples) // 2]
+    rows.append((use_compress, server_cpu, client_cpu, payload, peak))
+  return rows
+
+
+def main():
+  sizes = [float(arg) for arg in sys.argv[1:]] or [1, 5, 20]
+
+  print('%8s  %-8s  %10s  %10s  %12s  %10s' % ('size_mb', 'compress', 'server_ms', 'module_ms', 'payload_kb', 'peak_mb'))
+  for size in sizes:
+    for use_compress, server_cpu, client_cpu, payload, peak in bench(int(size * 1024 * 1024)):
+      print('%8.1f  %-8s  %10.1f  %10.1f  %12.1f  %10.1f' % (
+        size, use_compress, server_cpu * 1000, client_cpu * 1000, payload / 1024.0, peak / 1024.0 / 1024.0))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""tools/measure_modules.py
+
+Measure AnsiballZ payload size and import time of the fujitsu modules.
+
+  python tools/measure_modules.py [module_name ...]
+
+The payload is built by ansible's module_common on the controller,
+then the embedded zip is imported by a fresh interpreter without site-packages,
+in the same way as the module runs on the target.
+The import time excludes ansible.module_utils.basic, which every module needs.
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+import base64
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+from ansible.executor.module_common import modify_module
+from ansible.parsing.dataloader import DataLoader
+from ansible.plugins.loader import module_utils_loader
+from ansible.template import Templar
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PLUGINS_DIR = os.path.join(os.path.dirname(HERE), 'plugins')
+MODULES_DIR = os.path.join(PLUGINS_DIR, 'modules')
+
+REPEAT = 20
+
+# ansible.module_utils.basic is imported by every module,
+# it is imported first so that the time of the module's own imports is measured
+IMPORT_CODE = '''
+import sys, time
+sys.path.insert(0, %r)
+import ansible.module_utils.basic
+t = time.time()
+import ansible.modules.%s
+print(time.time() - t)
+'''
+
+
+def build_payload(name):
+  path = os.path.join(MODULES_DIR, name + '.py')
+  templar = Templar(loader=DataLoader())
+  b_data, _, _ = modify_module(name, path, {}, templar, task_vars={'ansible_python_interpreter': sys.executable}, module_compression='ZIP_DEFLATED')
+  return b_data
+
+
+def extract_zip(b_data, dest):
+  match = re.search(br'ZIPDATA = """(.*?)"""', b_data, re.S)
+  zip_path = os.path.join(dest, 'payload.zip')
+  with open(zip_path, 'wb') as f:
+    f.write(base64.b64decode(match.group(1)))
+  return zip_path
+
+
+def measure_import(name, zip_path):
+  times = []
+  for _ in range(REPEAT):
+    # -S: do not see the ansible installed on the controller
+    out = subprocess.check_output([sys.executable, '-S', '-c', IMPORT_CODE % (zip_path, name)])
+    times.append(float(out))
+  times.sort()
+  return times[len(times) // 2]
+
+
+def main():
+  module_utils_loader.add_directory(os.path.join(PLUGINS_DIR, 'module_utils'))
+
+  names = sys.argv[1:]
+  if not names:
+    names = sorted(f[:-3] for f in os.listdir(MODULES_DIR) if f.startswith('fujitsu_') and f.endswith('.py'))
+
+  tmpdir = tempfile.mkdtemp()
+  print('%-28s %12s %12s' % ('module', 'payload(B)', 'import(ms)'))
+  for name in names:
+    b_data = build_payload(name)
+    zip_path = extract_zip(b_data, tempfile.mkdtemp(dir=tmpdir))
+    elapsed = measure_import(name, zip_path)
+    print('%-28s %12d %12.1f' % (name, len(b_data), elapsed * 1000))
+
+
+if __name__ == '__main__':
+  main()
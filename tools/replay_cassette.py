@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+# pylint: disable=missing-docstring
+"""tools/replay_cassette.py
+
+Replay the show commands in a cassette recorded by the fujitsu_cli connection, and benchmark the parsers on them.
+
+  python tools/replay_cassette.py <record_dir>/<host>.jsonl [speed]
+
+The first session in the cassette is replayed through the connection, terminal and cliconf plugins of this repo
+without the device, at the recorded timing divided by speed (0, the default, replays without waiting).
+The terminal is set up with become, as the playbooks do.
+Each show command is sent by get() of the cliconf plugin, and its output is parsed by module_utils/fujitsu_parsers.py.
+The other exchanges, like the configuration dialogue, are skipped, they are replayed by the playbook
+with ansible_fujitsu_replay_dir.
+
+Takamitsu IIDA (@takamitsu-iida)
+"""
+
+import os
+import re
+import sys
+import time
+
+from ansible.playbook.play_context import PlayContext
+from ansible.plugins.loader import cliconf_loader, connection_loader, terminal_loader
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PLUGINS_DIR = os.path.join(os.path.dirname(HERE), 'plugins')
+
+sys.path.insert(0, os.path.join(PLUGINS_DIR, 'module_utils'))
+sys.path.insert(0, os.path.join(PLUGINS_DIR, 'connection'))
+from fujitsu_cli import load_cassette  # pylint: disable=wrong-import-position
+from fujitsu_parsers import parse_output  # pylint: disable=wrong-import-position
+
+SHOW_COMMAND_RE = re.compile(br'^\s*sh(?:o|ow)?\s')
+
+
+def open_replay(path, speed):
+  """return the fujitsu_cli connection replaying the first session of the cassette
+  """
+  connection_loader.add_directory(os.path.join(PLUGINS_DIR, 'connection'))
+  terminal_loader.add_directory(os.path.join(PLUGINS_DIR, 'terminal'))
+  cliconf_loader.add_directory(os.path.join(PLUGINS_DIR, 'cliconf'))
+
+  header = load_cassette(path)[0][0]
+  play_context = PlayContext()
+  play_context.network_os = header['network_os']
+  play_context.remote_addr = header['host']
+  play_context.become = True
+  # the password is not in the cassette, anything matches it
+  play_context.become_pass = 'replay'
+
+  connection = connection_loader.get('fujitsu_cli', play_context, '/dev/null')
+  connection.set_options(var_options={
+    'ansible_fujitsu_replay_dir': os.path.dirname(os.path.abspath(path)),
+    'ansible_fujitsu_replay_speed': speed,
+  })
+  connection._connect()  # pylint: disable=protected-access
+  return connection
+
+
+def main():
+  if len(sys.argv) < 2:
+    sys.exit('usage: %s <cassette.jsonl> [speed]' % sys.argv[0])
+  path = sys.argv[1]
+  speed = float(sys.argv[2]) if len(sys.argv) > 2 else 0
+
+  # the replay takes <host>.jsonl in the directory, the host is taken from the file name
+  header, events = load_cassette(path)[0]
+  if os.path.basename(path) != '%s.jsonl' % header['host']:
+    sys.exit('the cassette of %s must be named %s.jsonl' % (header['host'], header['host']))
+
+  start = time.time()
+  connection = open_replay(path, speed)
+  setup = time.time() - start
+  network_os = connection._network_os  # pylint: disable=protected-access
+
+  commands = [data.strip() for _, kind, data in events if kind == 'send' and SHOW_COMMAND_RE.match(data)]
+
+  print('%-40s  %10s  %10s  %10s  %6s' % ('command', 'bytes', 'replay_ms', 'parse_ms', 'parsed'))
+  total_replay = total_parse = 0.0
+  for command in commands:
+    command = command.decode('utf-8')
+    start = time.time()
+    out = connection.get(command)
+    replay = time.time() - start
+    start = time.time()
+    parsed = parse_output(network_os, command, out)
+    parse = time.time() - start
+    total_replay += replay
+    total_parse += parse
+    print('%-40s  %10d  %10.2f  %10.2f  %6s' % (command[:40], len(out), replay * 1000, parse * 1000, parsed is not None))
+
+  print('')
+  print('network_os %s, setup %.1f ms, %d commands, replay %.1f ms, parse %.1f ms' % (
+    network_os, setup * 1000, len(commands), total_replay * 1000, total_parse * 1000))
+
+
+if __name__ == '__main__':
+  main()